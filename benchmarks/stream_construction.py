@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Stream construction benchmark
+
+Builds the same melody part (four notes per measure, a slur every four
+notes, as generate_melody_part does) two ways and reports how construction
+time grows with the number of measures:
+
+  append  one Stream.append per note and measure, one Stream.insert per slur
+  bulk    precomputed offsets with coreInsert and a single coreElementsChanged
+          per stream (src.core.streams)
+
+Both timings include a final walk over the notes so lazily deferred work
+(sorting, offset caches) is counted.
+
+Usage:
+  python benchmarks/stream_construction.py [--lengths 16 32 64 ...] [--repeat 3]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from music21 import key, meter, note, spanner, stream
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.streams import append_measures, fill_measure, insert_spanners
+from src.core.ticks import PPQ, to_quarter_length
+
+NAMES = ['C4', 'D4', 'E4', 'F4', 'G4', 'A4', 'B4']
+NOTE_TICKS = PPQ
+MEASURE_TICKS = 4 * PPQ
+
+
+def _events(length: int):
+    """Per-measure (pitch name, ticks) lists, independent of how the part is built."""
+    return [[(NAMES[(i + j) % len(NAMES)], NOTE_TICKS) for j in range(4)] for i in range(length)]
+
+
+def _header() -> stream.Part:
+    part = stream.Part()
+    part.append(meter.TimeSignature('4/4'))
+    part.append(key.Key('C', 'major'))
+    return part
+
+
+def _slurs(part: stream.Part):
+    notes = list(part.recurse().notes)
+    slurs = []
+    for i in range(0, len(notes) - 3, 4):
+        slur = spanner.Slur()
+        for n in notes[i:i + 4]:
+            slur.addSpannedElements(n)
+        slurs.append(slur)
+    return slurs
+
+
+def build_append(events) -> stream.Part:
+    part = _header()
+    for i, measure_events in enumerate(events):
+        m = stream.Measure(number=i + 1)
+        for name, ticks in measure_events:
+            n = note.Note(name)
+            n.quarterLength = to_quarter_length(ticks)
+            m.append(n)
+        part.append(m)
+    for slur in _slurs(part):
+        part.insert(0, slur)
+    return part
+
+
+def build_bulk(events) -> stream.Part:
+    part = _header()
+    measures = [fill_measure(i + 1, [(note.Note(name), ticks) for name, ticks in measure_events])
+                for i, measure_events in enumerate(events)]
+    append_measures(part, measures, MEASURE_TICKS)
+    insert_spanners(part, _slurs(part))
+    return part
+
+
+def best_time(build, events, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        part = build(events)
+        sum(1 for _ in part.recurse().notes)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark music21 stream construction')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[16, 32, 64, 128, 256, 512],
+                        help='Numbers of measures to build')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per length (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'measures':>8} {'notes':>6} {'append ms':>10} {'bulk ms':>9} {'speedup':>8}")
+    for length in args.lengths:
+        events = _events(length)
+        # Both builders must produce the same notes
+        assert ([n.nameWithOctave for n in build_append(events).recurse().notes] ==
+                [n.nameWithOctave for n in build_bulk(events).recurse().notes])
+        slow = best_time(build_append, events, args.repeat)
+        fast = best_time(build_bulk, events, args.repeat)
+        print(f"{length:>8} {length * 4:>6} {slow * 1000:>10.1f} {fast * 1000:>9.1f} "
+              f"{slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Notation export benchmark
+
+Renders the same seeded lead sheet (melody plus block chords) in each of
+these ways and reports the time from the planned form to the finished
+document, together with the document size:
+
+  musicxml  render_form builds music21 parts, score_to_musicxml serializes them
+  abc       render_form_events produces per-measure events, form_to_abc writes text
+  ly        render_form_events produces per-measure events, form_to_lilypond writes text
+
+Each path draws from the RNG in the same order as the others, so for a given
+seed all three documents contain the same music.
+
+Usage:
+  python benchmarks/text_export.py [--lengths 8 16 32 ...] [--repeat 3] [--structure AABA]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from music21 import metadata, stream
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core import plan_form, precompute_tables, render_form, render_form_events, render_text
+from src.utils import score_to_musicxml
+
+TONIC, MODE, TIME_SIG = 'C', 'major', '4/4'
+TITLE = 'Benchmark'
+
+
+def export_musicxml(length: int, structure: str, seed: int) -> bytes:
+    rng = random.Random(seed)
+    sections = plan_form(structure, TONIC, MODE, length, rng=rng)
+    score = stream.Score()
+    score.metadata = metadata.Metadata()
+    score.metadata.title = TITLE
+    for part in render_form(sections, TONIC, MODE, TIME_SIG, rng=rng):
+        score.append(part)
+    return score_to_musicxml(score)
+
+
+def export_text(fmt: str, length: int, structure: str, seed: int) -> bytes:
+    rng = random.Random(seed)
+    sections = plan_form(structure, TONIC, MODE, length, rng=rng)
+    melody, timelines = render_form_events(sections, TONIC, MODE, TIME_SIG, rng=rng)
+    return render_text(fmt, sections, melody, timelines, TONIC, MODE, TIME_SIG, TITLE).encode('utf-8')
+
+
+def best_time(export, repeat: int):
+    best, document = float('inf'), b''
+    for seed in range(repeat):
+        started = time.perf_counter()
+        document = export(seed)
+        best = min(best, time.perf_counter() - started)
+    return best, len(document)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MusicXML against ABC/LilyPond export')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[8, 16, 32, 64, 128],
+                        help='Numbers of measures to generate')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per length (best is reported)')
+    parser.add_argument('--structure', default='A', help='Form structure (e.g. A, AABA)')
+    args = parser.parse_args()
+
+    precompute_tables()
+    exporters = {
+        'musicxml': lambda n, seed: export_musicxml(n, args.structure, seed),
+        'abc': lambda n, seed: export_text('abc', n, args.structure, seed),
+        'ly': lambda n, seed: export_text('ly', n, args.structure, seed),
+    }
+    print(f"{'measures':>8} {'format':>8} {'ms':>9} {'bytes':>9} {'speedup':>8}")
+    for length in args.lengths:
+        baseline = None
+        for fmt, export in exporters.items():
+            seconds, size = best_time(lambda seed: export(length, seed), args.repeat)
+            baseline = baseline or seconds
+            print(f"{length:>8} {fmt:>8} {seconds * 1000:>9.1f} {size:>9} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -45,6 +45,9 @@ setup(
     python_requires=">=3.8",
     install_requires=requirements,
     extras_require={
+        "fast": [
+            "orjson>=3.8.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "black>=22.0.0",
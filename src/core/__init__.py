@@ -7,18 +7,174 @@
 
 from .chord_generator import (
     roman_to_chord,
+    PROGRESSION_STYLES,
     generate_progression,
     progression_to_part,
     generate_melody_part,
+    melody_events,
     analyze_harmony,
     print_analysis
 )
+from .deadline import (
+    DeadlineExceeded,
+    check_deadline,
+    deadline,
+    deadline_at,
+    remaining
+)
+from .batch import (
+    analyze_batch,
+    parse_progression
+)
+from .arrangement import (
+    ACCOMPANIMENT_PARTS,
+    BASS_STYLES,
+    chord_timeline,
+    arrange_progression
+)
+from .form import (
+    FORM_LAYOUTS,
+    plan_form,
+    form_progression,
+    render_form,
+    render_form_events,
+    section_runs,
+    analyze_form
+)
+from .text_export import (
+    TEXT_FORMATS,
+    form_to_abc,
+    form_to_lilypond,
+    render_text
+)
+from .svg_preview import (
+    PREVIEW_KINDS,
+    chord_chart_svg,
+    piano_roll_svg,
+    render_previews,
+    section_marks
+)
+from .compact_analysis import (
+    COMPACT_FIELDS,
+    analyze_compact,
+    select_fields
+)
+from .harmony_stats import (
+    HarmonyHistogram,
+    progression_statistics,
+    batch_statistics
+)
+from .progression_model import (
+    TransitionCounts,
+    count_progressions,
+    write_model,
+    corpus_model
+)
+from .reroll import (
+    reroll_progression,
+    HarmonyState
+)
+from .harmonizer import (
+    harmonize_melody,
+    harmonize_weights,
+    melody_measure_count,
+    melody_weights
+)
+from .chord_tables import (
+    chord_entry,
+    key_table,
+    precompute_tables,
+    export_tables,
+    install_tables
+)
+from .meters import (
+    SUPPORTED_TIME_SIGNATURES,
+    get_meter
+)
+from .ticks import (
+    PPQ,
+    to_ticks,
+    to_quarter_length
+)
+from .tracing import (
+    Tracer,
+    TraceWriter,
+    span,
+    traced
+)
+from .voicing import (
+    voicing_lattice,
+    voice_progression,
+    voicing_to_chord
+)
 
 __all__ = [
     'roman_to_chord',
+    'PROGRESSION_STYLES',
     'generate_progression', 
     'progression_to_part',
     'generate_melody_part',
+    'melody_events',
     'analyze_harmony',
-    'print_analysis'
+    'print_analysis',
+    'DeadlineExceeded',
+    'check_deadline',
+    'deadline',
+    'deadline_at',
+    'remaining',
+    'analyze_batch',
+    'parse_progression',
+    'ACCOMPANIMENT_PARTS',
+    'BASS_STYLES',
+    'chord_timeline',
+    'arrange_progression',
+    'FORM_LAYOUTS',
+    'plan_form',
+    'form_progression',
+    'render_form',
+    'render_form_events',
+    'section_runs',
+    'TEXT_FORMATS',
+    'form_to_abc',
+    'form_to_lilypond',
+    'render_text',
+    'PREVIEW_KINDS',
+    'chord_chart_svg',
+    'piano_roll_svg',
+    'render_previews',
+    'section_marks',
+    'analyze_form',
+    'COMPACT_FIELDS',
+    'analyze_compact',
+    'select_fields',
+    'HarmonyHistogram',
+    'progression_statistics',
+    'batch_statistics',
+    'TransitionCounts',
+    'count_progressions',
+    'write_model',
+    'corpus_model',
+    'reroll_progression',
+    'HarmonyState',
+    'harmonize_melody',
+    'harmonize_weights',
+    'melody_measure_count',
+    'melody_weights',
+    'chord_entry',
+    'key_table',
+    'precompute_tables',
+    'export_tables',
+    'install_tables',
+    'SUPPORTED_TIME_SIGNATURES',
+    'get_meter',
+    'PPQ',
+    'to_ticks',
+    'to_quarter_length',
+    'Tracer',
+    'TraceWriter',
+    'span',
+    'traced',
+    'voicing_lattice',
+    'voice_progression',
+    'voicing_to_chord'
 ] 
\ No newline at end of file
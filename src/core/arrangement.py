@@ -0,0 +1,356 @@
+"""
+반주 편곡 모듈
+
+이 모듈은 코드 진행을 한 번 해석하여 마디별 화음 타임라인(보이싱, 근음,
+3음, 5음)을 만들고, 이 타임라인에서 블록 코드, 베이스, 분산화음(아르페지오),
+패드 파트의 음표를 바로 만들어 냅니다. 파트를 더 추가해도 코드 해석과
+보이싱 탐색은 다시 하지 않습니다.
+"""
+
+import random
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from music21 import chord, clef, instrument, key, meter, note, stream, tie
+
+from .chord_tables import chord_entry, key_table, pitch_to_midi, voiced_figure
+from .deadline import check_deadline
+from .meters import get_meter, parse_time_signature
+from .streams import append_measures, fill_measure
+from .voicing import voice_progression
+
+# 지원하는 반주 파트
+ACCOMPANIMENT_PARTS = ('bass', 'arpeggio', 'pad')
+
+# 베이스 스타일 ('root': 박 묶음마다 근음, 'walking': 박마다 워킹 베이스)
+BASS_STYLES = ('root', 'walking')
+
+# 베이스 근음 음역 (C2~B2)
+BASS_LOW_MIDI = 36
+
+# 분산화음 음표 길이 (틱, 8분음표)
+ARPEGGIO_TICKS = 240
+
+# 분산화음/패드를 블록 코드보다 올리는 음정 (반음)
+UPPER_SHIFT = 12
+
+
+class ChordEvent(NamedTuple):
+    """
+    타임라인의 화음 하나 (한 마디)
+
+    Attributes:
+        figure: 로마숫자 코드 (진행에 쓰인 그대로)
+        offset: 시작 위치 (틱)
+        ticks: 길이 (틱)
+        names: 보이싱 성부별 음 이름 (옥타브 없음)
+        midi: 보이싱 성부별 MIDI 번호
+        root_name: 근음 이름
+        third_name: 3음 이름 (없으면 None)
+        fifth_name: 5음 이름 (없으면 None)
+    """
+    figure: str
+    offset: int
+    ticks: int
+    names: Tuple[str, ...]
+    midi: Tuple[int, ...]
+    root_name: str
+    third_name: Optional[str]
+    fifth_name: Optional[str]
+
+
+def spell(name: str, midi: int) -> str:
+    """
+    음 이름과 MIDI 번호로 옥타브가 포함된 음 이름을 만듭니다 (B#, Cb 철자 유지).
+
+    Args:
+        name: 옥타브 없는 음 이름
+        midi: MIDI 번호
+
+    Returns:
+        str: 옥타브 포함 음 이름 (예: 'B#3')
+    """
+    return f"{name}{4 + (midi - pitch_to_midi(f'{name}4')) // 12}"
+
+
+def _place(name: str, target: int) -> Tuple[str, int]:
+    """음 이름을 target MIDI 번호에 가장 가까운 옥타브에 배치합니다."""
+    base = pitch_to_midi(f"{name}4")
+    midi = base + 12 * round((target - base) / 12)
+    return spell(name, midi), midi
+
+
+def chord_timeline(prog: Sequence[str], tonic: str, mode: str = 'major',
+                   time_sig: str = '4/4', voicing: str = 'random',
+                   rng: Optional[random.Random] = None) -> List[ChordEvent]:
+    """
+    코드 진행을 마디별 화음 타임라인으로 변환합니다.
+
+    'random' 보이싱은 roman_to_chord와 같은 규칙(랜덤 전위, 3옥타브)과 같은
+    난수 순서를 쓰고, 'optimal'은 voice_progression의 최소 이동 보이싱을 씁니다.
+
+    Args:
+        prog: 로마숫자 코드 진행 리스트
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        voicing: 보이싱 방식 ('random', 'optimal')
+        rng: 난수 생성기 (시드 고정 시 사용, 기본값은 random 모듈)
+
+    Returns:
+        List[ChordEvent]: 마디별 화음
+    """
+    measure_ticks = get_meter(time_sig).measure_ticks
+    voicings = voice_progression(prog, tonic, mode) if voicing == 'optimal' else None
+    rng = rng or random
+
+    timeline = []
+    for i, rn in enumerate(prog):
+        check_deadline()
+        entry = chord_entry(voiced_figure(rn), tonic, mode)
+        base_names = list(entry.pitch_names)
+        if voicings is not None:
+            by_pc = {pitch_to_midi(f"{n}4") % 12: n for n in base_names}
+            midi = voicings[i]
+            names = tuple(by_pc[m % 12] for m in midi)
+        else:
+            # 전위(1전위, 2전위) 랜덤 적용, 3옥타브 배치
+            inversion = rng.choice([0, 1, 2]) if len(base_names) > 2 else 0
+            names = tuple(base_names[inversion:] + base_names[:inversion])
+            midi = tuple(pitch_to_midi(f"{n}3") for n in names)
+        timeline.append(ChordEvent(
+            figure=rn,
+            offset=i * measure_ticks,
+            ticks=measure_ticks,
+            names=names,
+            midi=tuple(midi),
+            root_name=entry.root_name,
+            third_name=entry.third_name,
+            fifth_name=entry.fifth_name,
+        ))
+    return timeline
+
+
+def block_measures(timeline: Sequence[ChordEvent]) -> List[stream.Measure]:
+    """
+    마디마다 보이싱된 블록 코드 하나를 둡니다.
+
+    Args:
+        timeline: 화음 타임라인
+
+    Returns:
+        List[music21.stream.Measure]: 마디 목록 (번호는 1부터)
+    """
+    measures = []
+    for i, e in enumerate(timeline):
+        check_deadline()
+        measures.append(fill_measure(i + 1, [(chord.Chord([spell(n, m) for n, m in zip(e.names, e.midi)]),
+                                              e.ticks)]))
+    return measures
+
+
+def _pulses(time_sig: str) -> List[int]:
+    """워킹 베이스의 박 길이 목록 (x/4는 4분음표, x/8은 박 묶음)."""
+    numerator, denominator = parse_time_signature(time_sig)
+    if denominator == 4:
+        return [480] * numerator
+    return list(get_meter(time_sig).beat_groups)
+
+
+def bass_measures(timeline: Sequence[ChordEvent], tonic: str, mode: str = 'major',
+                  time_sig: str = '4/4', style: str = 'root') -> List[stream.Measure]:
+    """
+    타임라인에서 베이스 라인을 만듭니다.
+
+    'root'는 박 묶음마다 근음을, 'walking'은 박마다 근음 -> 화음 구성음 ->
+    다음 근음으로 가는 음계 경과음 순서로 연주합니다.
+
+    Args:
+        timeline: 화음 타임라인
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        style: 베이스 스타일 ('root', 'walking')
+
+    Returns:
+        List[music21.stream.Measure]: 마디 목록 (번호는 1부터)
+    """
+    groups = get_meter(time_sig).beat_groups if style != 'walking' else _pulses(time_sig)
+    scale_names = [name[:-1] for name in key_table(tonic, mode).scale_names[:7]]
+    scale_pcs = [pitch_to_midi(f"{n}4") % 12 for n in scale_names]
+
+    measures = []
+    for i, e in enumerate(timeline):
+        check_deadline()
+        root, root_midi = _place(e.root_name, BASS_LOW_MIDI + 5)
+        if style != 'walking':
+            measures.append(fill_measure(i + 1, [(note.Note(root), ticks) for ticks in groups]))
+            continue
+
+        line = [(root, root_midi)]
+        tones = [n for n in (e.third_name, e.fifth_name) if n]
+        for j in range(1, len(groups)):
+            if j == len(groups) - 1 and i + 1 < len(timeline) and len(groups) > 2:
+                # 다음 근음으로 가는 음계 경과음 (위에서 또는 아래에서 접근)
+                target_name = timeline[i + 1].root_name
+                _, target = _place(target_name, BASS_LOW_MIDI + 5)
+                pc = pitch_to_midi(f"{target_name}4") % 12
+                index = scale_pcs.index(pc) if pc in scale_pcs else 0
+                step = 1 if target < line[-1][1] else -1
+                approach = _place(scale_names[(index + step) % 7], target + 2 * step)
+                if approach[1] == line[-1][1]:
+                    approach = _place(scale_names[(index - step) % 7], target - 2 * step)
+                line.append(approach)
+            else:
+                name = tones[(j - 1) % len(tones)] if tones else e.root_name
+                spelled, midi = _place(name, root_midi + 5)
+                if midi < root_midi:
+                    spelled, midi = spell(name, midi + 12), midi + 12
+                line.append((spelled, midi))
+        measures.append(fill_measure(i + 1, [(note.Note(n), t) for (n, _), t in zip(line, groups)]))
+    return measures
+
+
+def arpeggio_measures(timeline: Sequence[ChordEvent]) -> List[stream.Measure]:
+    """
+    타임라인의 보이싱을 한 옥타브 올려 8분음표 분산화음(상행 후 하행)으로 연주합니다.
+
+    Args:
+        timeline: 화음 타임라인
+
+    Returns:
+        List[music21.stream.Measure]: 마디 목록 (번호는 1부터)
+    """
+    measures = []
+    for i, e in enumerate(timeline):
+        check_deadline()
+        voices = sorted(zip(e.midi, e.names))
+        order = list(range(len(voices))) + list(range(len(voices) - 2, 0, -1))
+        count, rest = divmod(e.ticks, ARPEGGIO_TICKS)
+        events = []
+        for j in range(count):
+            midi, name = voices[order[j % len(order)]]
+            events.append((note.Note(spell(name, midi + UPPER_SHIFT)), ARPEGGIO_TICKS))
+        if rest:
+            events.append((note.Rest(), rest))
+        measures.append(fill_measure(i + 1, events))
+    return measures
+
+
+def pad_measures(timeline: Sequence[ChordEvent]) -> List[stream.Measure]:
+    """
+    타임라인의 보이싱을 한 옥타브 올려 마디 전체 길이로 지속합니다.
+
+    같은 보이싱이 이어지면 붙임줄로 연결합니다.
+
+    Args:
+        timeline: 화음 타임라인
+
+    Returns:
+        List[music21.stream.Measure]: 마디 목록 (번호는 1부터)
+    """
+    measures = []
+    previous = None
+    for i, e in enumerate(timeline):
+        check_deadline()
+        c = chord.Chord([spell(n, m + UPPER_SHIFT) for n, m in zip(e.names, e.midi)])
+        if previous is not None and previous[0] == e.midi:
+            previous[1].tie = tie.Tie('start' if previous[1].tie is None else 'continue')
+            c.tie = tie.Tie('stop')
+        previous = (e.midi, c)
+        measures.append(fill_measure(i + 1, [(c, e.ticks)]))
+    return measures
+
+
+# 파트별 (파트 이름, 악기, 음자리표)
+_PART_INFO: Dict[str, Tuple[str, type, type]] = {
+    'bass': ('Bass', instrument.ElectricBass, clef.BassClef),
+    'arpeggio': ('Arpeggio', instrument.Piano, clef.TrebleClef),
+    'pad': ('Pad', instrument.StringInstrument, clef.TrebleClef),
+}
+
+
+def accompaniment_measures(kind: str, timeline: Sequence[ChordEvent], tonic: str,
+                           mode: str = 'major', time_sig: str = '4/4',
+                           bass_style: str = 'root') -> List[stream.Measure]:
+    """
+    반주 파트 종류에 맞는 마디 목록을 만듭니다.
+
+    Args:
+        kind: 파트 종류 ('bass', 'arpeggio', 'pad')
+        timeline: 화음 타임라인
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        bass_style: 베이스 스타일
+
+    Returns:
+        List[music21.stream.Measure]: 마디 목록 (번호는 1부터)
+
+    Raises:
+        ValueError: 알 수 없는 파트 종류인 경우
+    """
+    if kind == 'bass':
+        return bass_measures(timeline, tonic, mode, time_sig, bass_style)
+    if kind == 'arpeggio':
+        return arpeggio_measures(timeline)
+    if kind == 'pad':
+        return pad_measures(timeline)
+    raise ValueError(f"Unknown accompaniment part: {kind}")
+
+
+def accompaniment_part(kind: str, tonic: str, mode: str = 'major',
+                       time_sig: str = '4/4') -> stream.Part:
+    """
+    반주 파트의 빈 파트(악기, 조표, 박자표, 음자리표)를 만듭니다.
+
+    Args:
+        kind: 파트 종류 ('bass', 'arpeggio', 'pad')
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+
+    Returns:
+        music21.stream.Part: 마디가 없는 파트
+    """
+    name, instrument_class, clef_class = _PART_INFO[kind]
+    p = stream.Part()
+    inst = instrument_class()
+    inst.partName = name
+    p.append(inst)
+    p.append(key.Key(tonic, mode))
+    p.append(meter.TimeSignature(time_sig))
+    p.append(clef_class())
+    p.id = name
+    return p
+
+
+def arrange_progression(prog: Sequence[str], tonic: str, mode: str = 'major',
+                        time_sig: str = '4/4', parts: Sequence[str] = ACCOMPANIMENT_PARTS,
+                        voicing: str = 'random', bass_style: str = 'root',
+                        rng: Optional[random.Random] = None) -> List[stream.Part]:
+    """
+    코드 진행을 한 번 해석하여 반주 파트들을 만듭니다.
+
+    Args:
+        prog: 로마숫자 코드 진행 리스트
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        parts: 만들 반주 파트 ('bass', 'arpeggio', 'pad')
+        voicing: 보이싱 방식 ('random', 'optimal')
+        bass_style: 베이스 스타일 ('root', 'walking')
+        rng: 난수 생성기
+
+    Returns:
+        List[music21.stream.Part]: 반주 파트 목록 (parts 순서)
+    """
+    timeline = chord_timeline(prog, tonic, mode, time_sig, voicing, rng)
+    result = []
+    for kind in parts:
+        p = accompaniment_part(kind, tonic, mode, time_sig)
+        measures = accompaniment_measures(kind, timeline, tonic, mode, time_sig, bass_style)
+        if measures:
+            measures[-1].rightBarline = 'final'
+        append_measures(p, measures, get_meter(time_sig).measure_ticks)
+        result.append(p)
+    return result
@@ -0,0 +1,107 @@
+"""
+일괄 화성 분석 모듈
+
+이 모듈은 사용자가 제출한 여러 코드 진행을 한 번에 분석하는 기능을
+제공합니다. 같은 진행은 한 번만 분석하고, 결과 캐시 크기를 제한하여
+매우 큰 배치도 일정한 메모리로 처리합니다.
+"""
+
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .chord_generator import analyze_harmony
+from .deadline import DeadlineExceeded, check_deadline
+
+# 진행 문자열 구분자 (공백, |, ,). '-'는 music21의 플랫 기호('-VII')라 구분자로 쓰지 않음
+_SEPARATORS = re.compile(r'[\s|,]+')
+
+# 중복 제거용 결과 캐시 크기
+DEFAULT_CACHE_SIZE = 4096
+
+
+def parse_progression(value: Any) -> List[str]:
+    """
+    코드 진행 입력을 로마숫자 리스트로 변환합니다.
+
+    Args:
+        value: 로마숫자 리스트 또는 'I IV V I', 'I | IV | V | I' 같은 문자열
+
+    Returns:
+        List[str]: 로마숫자 코드 진행 리스트
+
+    Raises:
+        ValueError: 진행이 비어 있거나 형식이 잘못된 경우
+    """
+    if isinstance(value, str):
+        prog = [fig for fig in _SEPARATORS.split(value.strip()) if fig]
+    elif isinstance(value, (list, tuple)) and all(isinstance(fig, str) for fig in value):
+        prog = [fig.strip() for fig in value]
+    else:
+        raise ValueError("progression must be a string or a list of strings")
+    if not prog:
+        raise ValueError("progression is empty")
+    return prog
+
+
+def analyze_batch(items: Iterable[Dict[str, Any]],
+                  cache_size: int = DEFAULT_CACHE_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    여러 코드 진행을 순서대로 분석합니다.
+
+    입력과 출력을 모두 순차적으로 처리하므로 배치 전체를 메모리에 올리지
+    않습니다. 같은 (진행, 조성, 조성 타입)은 최근 cache_size개까지 결과를
+    재사용합니다.
+
+    Args:
+        items: {'progression', 'tonic', 'mode', 'id'(선택)} 딕셔너리들
+            (입력 해석에 실패한 항목은 예외 객체로 전달하면 오류 결과로 출력)
+        cache_size: 중복 제거용 결과 캐시 크기
+
+    Yields:
+        Dict[str, Any]: {'index', 'id', 'tonic', 'mode', 'progression', 'analysis'}
+        또는 실패 시 {'index', 'id', 'error'}
+
+    Raises:
+        DeadlineExceeded: 마감 시각이 지난 경우 (이미 낸 결과는 그대로 유효)
+    """
+    cache: 'OrderedDict[tuple, Dict[str, Any]]' = OrderedDict()
+
+    for index, item in enumerate(items):
+        check_deadline()
+        item_id = item.get('id') if isinstance(item, dict) else None
+        try:
+            if isinstance(item, Exception):
+                # 입력 단계에서 해석에 실패한 항목
+                raise item
+            if not isinstance(item, dict):
+                raise ValueError("item must be an object")
+            prog = parse_progression(item.get('progression'))
+            tonic = item.get('tonic', 'C')
+            mode = item.get('mode', 'major')
+            if mode not in ('major', 'minor'):
+                raise ValueError(f"Unknown mode: {mode!r}")
+
+            cache_id = (tuple(prog), tonic, mode)
+            analysis = cache.get(cache_id)
+            if analysis is None:
+                analysis = analyze_harmony(prog, tonic, mode)
+                cache[cache_id] = analysis
+                if len(cache) > cache_size:
+                    cache.popitem(last=False)
+            else:
+                cache.move_to_end(cache_id)
+
+            yield {
+                'index': index,
+                'id': item_id,
+                'tonic': tonic,
+                'mode': mode,
+                'progression': prog,
+                'analysis': analysis,
+            }
+        except DeadlineExceeded:
+            # 남은 항목은 분석하지 않음 (호출한 쪽에서 마감 초과로 처리)
+            raise
+        except Exception as e:
+            yield {'index': index, 'id': item_id, 'error': str(e)}
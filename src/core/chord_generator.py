@@ -6,12 +6,22 @@
 """
 
 import random
-from music21 import stream, chord, key, metadata, note, meter, roman, scale, expressions, spanner, tie
-from typing import List, Dict, Any, Optional
+from music21 import stream, chord, key, metadata, note, meter, expressions, spanner, tie
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from music21 import pitch
 
+from .arrangement import block_measures, chord_timeline
+from .chord_tables import chord_entry, key_table, pitch_to_midi, voiced_figure
+from .deadline import check_deadline
+from .meters import get_meter
+from .progression_model import corpus_model
+from .streams import append_measures, fill_measure, insert_spanners
+from .ticks import rescale_ticks, to_quarter_length
 
-def roman_to_chord(roman: str, tonic: str, mode: str = 'major') -> chord.Chord:
+
+def roman_to_chord(roman: str, tonic: str, mode: str = 'major',
+                   rng: Optional[random.Random] = None) -> chord.Chord:
     """
     로마숫자 코드를 실제 화음으로 변환합니다.
     
@@ -19,37 +29,74 @@ def roman_to_chord(roman: str, tonic: str, mode: str = 'major') -> chord.Chord:
         roman: 로마숫자 코드 (예: 'I', 'IV', 'V7')
         tonic: 조성 (예: 'C', 'F#')
         mode: 조성 타입 ('major' 또는 'minor')
+        rng: 난수 생성기 (시드 고정 시 사용, 기본값은 random 모듈)
     
     Returns:
         music21.chord.Chord: 변환된 화음
     """
-    k = key.Key(tonic, mode)
-    rn_obj = k.romanNumeral(roman)
-    if roman.upper() == 'V':
-        rn_obj.figure += '7'
-    base_pitches = list(rn_obj.pitches)
+    # 구성음은 시작 시 계산된 조성별 코드 테이블에서 조회 ('V'는 속7화음)
+    base_names = list(chord_entry(voiced_figure(roman), tonic, mode).pitch_names)
     
     # 전위(1전위, 2전위) 랜덤 적용
-    inversion = random.choice([0, 1, 2]) if len(base_pitches) > 2 else 0
-    pitches = base_pitches[inversion:] + base_pitches[:inversion]
+    rng = rng or random
+    inversion = rng.choice([0, 1, 2]) if len(base_names) > 2 else 0
+    names = base_names[inversion:] + base_names[:inversion]
     
-    # 옥타브 분산 (C3~C5)
+    # 옥타브 배치 (C3 옥타브)
     chord_notes = []
-    base_octave = 3
-    for i, p in enumerate(pitches):
-        np = p.transpose(12 * (base_octave + i // len(pitches) - p.octave))
-        # 옥타브 범위 제한
-        while np.octave < 3:
-            np = np.transpose(12)
-        while np.octave > 5:
-            np = np.transpose(-12)
-        chord_notes.append(np)
+    for name in names:
+        p = pitch.Pitch(name)
+        p.octave = 3
+        chord_notes.append(p)
     
     rn = chord.Chord(chord_notes)
     return rn
 
 
-def generate_progression(tonic: str = 'C', mode: str = 'major', length: int = 8) -> List[str]:
+# 대한민국 교과서 스타일: I, IV, V, vi만 사용, 반복적이고 예측 가능한 패턴
+BASIC_PATTERNS = {
+    'major': [
+        ['I', 'IV', 'V', 'I'],
+        ['I', 'vi', 'IV', 'V'],
+        ['I', 'IV', 'I', 'V'],
+        ['I', 'IV', 'V', 'I'],
+    ],
+    'minor': [
+        ['i', 'iv', 'V', 'i'],
+        ['i', 'VI', 'iv', 'V'],
+        ['i', 'iv', 'i', 'V'],
+        ['i', 'iv', 'V', 'i'],
+    ],
+}
+
+# 종지 패턴 (진행의 마지막 마디들을 대체)
+CADENCES = {
+    'major': [
+        ['IV', 'ii', 'V7', 'I'],
+        ['vi', 'ii', 'V7', 'I'],
+        ['ii', 'V7', 'I'],
+        ['IV', 'V', 'I'],
+        ['IV', 'I'],
+        ['V', 'vi'],  # Deceptive
+    ],
+    'minor': [
+        ['iv', 'ii°', 'V7', 'i'],
+        ['VI', 'ii°', 'V7', 'i'],
+        ['ii°', 'V7', 'i'],
+        ['iv', 'V', 'i'],
+        ['iv', 'i'],
+        ['V', 'VI'],  # Deceptive
+    ],
+}
+
+
+# 코드 진행 스타일: 교과서 패턴, 코퍼스(바흐 코랄) 학습 모델
+PROGRESSION_STYLES = ('textbook', 'chorale')
+
+
+def generate_progression(tonic: str = 'C', mode: str = 'major', length: int = 8,
+                         rng: Optional[random.Random] = None,
+                         style: str = 'textbook') -> List[str]:
     """
     코드 진행을 생성합니다.
     
@@ -57,49 +104,32 @@ def generate_progression(tonic: str = 'C', mode: str = 'major', length: int = 8)
         tonic: 조성 (예: 'C', 'F#')
         mode: 조성 타입 ('major' 또는 'minor')
         length: 마디 수
+        rng: 난수 생성기 (시드 고정 시 사용, 기본값은 random 모듈)
+        style: 'textbook'(4마디 패턴 + 종지) 또는 'chorale'(코퍼스 학습 모델에서 샘플링)
     
     Returns:
         List[str]: 로마숫자 코드 진행 리스트
+
+    Raises:
+        ValueError: 알 수 없는 스타일이거나 학습 모델 파일이 없는 경우
     """
-    # 대한민국 교과서 스타일: I, IV, V, vi만 사용, 반복적이고 예측 가능한 패턴
-    if mode == 'major':
-        basic_patterns = [
-            ['I', 'IV', 'V', 'I'],
-            ['I', 'vi', 'IV', 'V'],
-            ['I', 'IV', 'I', 'V'],
-            ['I', 'IV', 'V', 'I'],
-        ]
-        cadences = [
-            ['IV', 'ii', 'V7', 'I'],
-            ['vi', 'ii', 'V7', 'I'],
-            ['ii', 'V7', 'I'],
-            ['IV', 'V', 'I'],
-            ['IV', 'I'],
-            ['V', 'vi'],  # Deceptive
-        ]
-    else:
-        basic_patterns = [
-            ['i', 'iv', 'V', 'i'],
-            ['i', 'VI', 'iv', 'V'],
-            ['i', 'iv', 'i', 'V'],
-            ['i', 'iv', 'V', 'i'],
-        ]
-        cadences = [
-            ['iv', 'ii°', 'V7', 'i'],
-            ['VI', 'ii°', 'V7', 'i'],
-            ['ii°', 'V7', 'i'],
-            ['iv', 'V', 'i'],
-            ['iv', 'i'],
-            ['V', 'VI'],  # Deceptive
-        ]
+    if style == 'chorale':
+        return corpus_model().table(mode).sample(length, rng)
+    if style != 'textbook':
+        raise ValueError(f"Unknown progression style: {style}")
+
+    basic_patterns = BASIC_PATTERNS['major' if mode == 'major' else 'minor']
+    cadences = CADENCES['major' if mode == 'major' else 'minor']
+    
+    rng = rng or random
     
     # 4마디 단위 반복
-    base = random.choice(basic_patterns)
+    base = rng.choice(basic_patterns)
     progression = (base * ((length // 4) + 1))[:length]
     
     # 종지 처리: 마지막 3~4마디를 종지 패턴으로 대체
     if length >= 3:
-        cadence = random.choice(cadences)
+        cadence = rng.choice(cadences)
         c_len = min(len(cadence), length)
         progression[-c_len:] = cadence[-c_len:]
     
@@ -107,7 +137,9 @@ def generate_progression(tonic: str = 'C', mode: str = 'major', length: int = 8)
 
 
 def progression_to_part(prog: List[str], tonic: str, mode: str = 'major', 
-                       time_sig: str = '4/4', analysis: Optional[Dict] = None) -> stream.Part:
+                       time_sig: str = '4/4', analysis: Optional[Dict] = None,
+                       voicing: str = 'random',
+                       rng: Optional[random.Random] = None) -> stream.Part:
     """
     코드 진행을 악보 파트로 변환합니다.
     
@@ -117,9 +149,14 @@ def progression_to_part(prog: List[str], tonic: str, mode: str = 'major',
         mode: 조성 타입
         time_sig: 박자
         analysis: 화성 분석 결과 (선택사항)
+        voicing: 보이싱 방식 ('random': 마디별 랜덤 전위, 'optimal': 최소 성부 이동)
+        rng: 난수 생성기 (시드 고정 시 사용, 기본값은 random 모듈)
     
     Returns:
         music21.stream.Part: 코드 파트
+    
+    Raises:
+        DeadlineExceeded: deadline() 구간의 마감 시각이 지난 경우 (마디마다 확인)
     """
     p = stream.Part()
     p.append(key.Key(tonic, mode))
@@ -127,60 +164,85 @@ def progression_to_part(prog: List[str], tonic: str, mode: str = 'major',
     from music21 import clef
     p.append(clef.BassClef())  # 낮은음자리표 추가
     
-    for i, rn in enumerate(prog):
-        m = stream.Measure(number=i+1)  # 마디 번호 명시적으로 지정
-        c = roman_to_chord(rn, tonic, mode)
-        c.quarterLength = 4 if time_sig == '4/4' else 3 if time_sig == '3/4' else 3
-        m.append(c)
-        if i == len(prog) - 1:
-            m.rightBarline = 'final'
-        p.append(m)
+    measures = chord_measures(prog, tonic, mode, time_sig, voicing, rng)
+    if measures:
+        measures[-1].rightBarline = 'final'
+    append_measures(p, measures, get_meter(time_sig).measure_ticks)
     
     p.id = 'Chords'
     return p
 
 
-def get_rhythm_pattern(style: str = 'basic') -> List[List[float]]:
+def chord_measures(prog: List[str], tonic: str, mode: str = 'major',
+                   time_sig: str = '4/4', voicing: str = 'random',
+                   rng: Optional[random.Random] = None) -> List[stream.Measure]:
+    """
+    코드 진행을 마디 목록으로 변환합니다 (마디 번호는 1부터, 마침 세로줄 없음).
+    
+    Args:
+        prog: 로마숫자 코드 진행 리스트
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        voicing: 보이싱 방식 ('random' 또는 'optimal')
+        rng: 난수 생성기
+    
+    Returns:
+        List[music21.stream.Measure]: 마디당 화음 하나
+    """
+    return block_measures(chord_timeline(prog, tonic, mode, time_sig, voicing, rng))
+
+
+# 4/4 박자 스타일별 리듬 패턴 (틱 단위, PPQ=480, 모듈 로드 시 한 번만 생성)
+_STYLE_PATTERNS = {
+    'basic': [
+        [1920],  # 온음표
+        [960, 960],  # 2분음표 2개
+        [480, 480, 480, 480],  # 4분음표 4개
+    ],
+    'syncopated': [
+        [720, 240, 720, 240],  # 당김음
+        [360, 120, 360, 120, 480, 480],  # 당김음 변형
+        [480, 240, 240, 480, 480],  # 셋잇단음표 느낌
+    ],
+    'swing': [
+        [320, 160, 320, 160, 480, 480],  # 스윙 (2:1 셋잇단 분할)
+        [800, 160, 480, 480],  # 스윙 변형
+    ],
+    'complex': [
+        [120, 120, 240, 240, 240, 480, 480],  # 16분음표 혼합
+        [240, 120, 120, 480, 480, 480],  # 부점 리듬
+        [480, 240, 120, 120, 480, 480],  # 혼합 리듬
+    ]
+}
+
+
+def get_rhythm_pattern(style: str = 'basic', time_sig: str = '4/4') -> List[List[int]]:
     """
     리듬 패턴 템플릿을 반환합니다.
     
     Args:
         style: 리듬 스타일 ('basic', 'syncopated', 'swing', 'complex')
+        time_sig: 박자 (4/4 이외의 박자는 해당 박자의 'random' 패턴 테이블 사용)
     
     Returns:
-        List[List[float]]: 리듬 패턴 리스트
+        List[List[int]]: 리듬 패턴 리스트 (틱 단위, PPQ=480)
     """
-    patterns = {
-        'basic': [
-            [4.0],  # 온음표
-            [2.0, 2.0],  # 2분음표 2개
-            [1.0, 1.0, 1.0, 1.0],  # 4분음표 4개
-        ],
-        'syncopated': [
-            [1.5, 0.5, 1.5, 0.5],  # 당김음
-            [0.75, 0.25, 0.75, 0.25, 1.0, 1.0],  # 당김음 변형
-            [1.0, 0.5, 0.5, 1.0, 1.0],  # 셋잇단음표 느낌
-        ],
-        'swing': [
-            [0.66, 0.34, 0.66, 0.34, 1.0, 1.0],  # 스윙
-            [1.66, 0.34, 1.0, 1.0],  # 스윙 변형
-        ],
-        'complex': [
-            [0.25, 0.25, 0.5, 0.5, 0.5, 1.0, 1.0],  # 16분음표 혼합
-            [0.5, 0.25, 0.25, 1.0, 1.0, 1.0],  # 부점 리듬
-            [1.0, 0.5, 0.25, 0.25, 1.0, 1.0],  # 혼합 리듬
-        ]
-    }
-    return patterns.get(style, patterns['basic'])
+    if time_sig != '4/4':
+        table = get_meter(time_sig).table('random')
+        return [list(table.pattern(i)) for i in range(len(table))]
+    return _STYLE_PATTERNS.get(style, _STYLE_PATTERNS['basic'])
 
 
-def apply_rhythm_pattern(notes: List[note.Note], pattern: List[float]) -> List[note.Note]:
+def apply_rhythm_pattern(notes: List[note.Note], pattern: List[int],
+                         time_sig: str = '4/4') -> List[note.Note]:
     """
     음표들에 리듬 패턴을 적용합니다.
     
     Args:
         notes: 음표 리스트
-        pattern: 리듬 패턴
+        pattern: 리듬 패턴 (틱 단위)
+        time_sig: 박자 (패턴 길이를 마디 길이에 맞춤)
     
     Returns:
         List[note.Note]: 리듬이 적용된 음표 리스트
@@ -188,11 +250,8 @@ def apply_rhythm_pattern(notes: List[note.Note], pattern: List[float]) -> List[n
     if not notes:
         return []
     
-    total_duration = sum(pattern)
-    if total_duration != 4.0:  # 4/4 박자 기준
-        # 패턴 길이 조정
-        scale_factor = 4.0 / total_duration
-        pattern = [d * scale_factor for d in pattern]
+    # 패턴 길이 조정 (정수 틱으로 정확히 한 마디)
+    pattern = rescale_ticks(pattern, get_meter(time_sig).measure_ticks)
     
     result = []
     pattern_idx = 0
@@ -202,7 +261,7 @@ def apply_rhythm_pattern(notes: List[note.Note], pattern: List[float]) -> List[n
         if pattern_idx >= len(pattern):
             pattern_idx = 0
         
-        notes[note_idx].quarterLength = pattern[pattern_idx]
+        notes[note_idx].quarterLength = to_quarter_length(pattern[pattern_idx])
         result.append(notes[note_idx])
         
         note_idx += 1
@@ -213,7 +272,8 @@ def apply_rhythm_pattern(notes: List[note.Note], pattern: List[float]) -> List[n
 
 def generate_melody_part(prog: List[str], tonic: str, mode: str = 'major', 
                         time_sig: str = '4/4', rhythm_option: str = 'random', 
-                        use_slurs: bool = True, use_ties: bool = True) -> stream.Part:
+                        use_slurs: bool = True, use_ties: bool = True,
+                        rng: Optional[random.Random] = None) -> stream.Part:
     """
     코드 진행에 맞는 멜로디 파트를 생성합니다.
     
@@ -225,117 +285,173 @@ def generate_melody_part(prog: List[str], tonic: str, mode: str = 'major',
         rhythm_option: 리듬 옵션
         use_slurs: 이음줄 사용 여부
         use_ties: 붙임줄 사용 여부
+        rng: 난수 생성기 (시드 고정 시 사용, 기본값은 random 모듈)
     
     Returns:
         music21.stream.Part: 멜로디 파트
+    
+    Raises:
+        DeadlineExceeded: deadline() 구간의 마감 시각이 지난 경우 (마디마다 확인)
     """
     melody = stream.Part()
     melody.append(meter.TimeSignature(time_sig))
-    k = key.Key(tonic, mode)
-    melody.append(k)
-    s = scale.MajorScale(tonic) if mode == 'major' else scale.MinorScale(tonic)
-    scale_degrees = s.getPitches()
-    tonic_pitch = pitch.Pitch(tonic)
-    prev_note = None
-    all_notes = []  # 모든 음 저장(이음줄/붙임줄용)
-    
-    # 박자별 리듬 패턴 설정
-    if time_sig == '4/4':
-        measure_length = 4.0
-        rhythm_patterns = {
-            'random': [
-                [4.0], [2.0, 2.0], [1.0, 1.0, 1.0, 1.0], [2.0, 1.0, 1.0],
-                [1.0, 2.0, 1.0], [0.5]*8, [1.0, 0.5, 0.5, 2.0],
-                [0.5, 0.5, 1.0, 2.0], [2.0, 0.5, 0.5, 1.0], [1.0, 1.0, 0.5, 0.5, 1.0],
-            ],
-            'whole': [[4.0]], 'half': [[2.0, 2.0]], 
-            'quarter': [[1.0, 1.0, 1.0, 1.0]], 'eighth': [[0.5]*8]
-        }
-    elif time_sig == '3/4':
-        measure_length = 3.0
-        rhythm_patterns = {
-            'random': [
-                [3.0], [1.5, 1.5], [1.0, 2.0], [2.0, 1.0], [1.0, 1.0, 1.0],
-                [0.5, 0.5, 2.0], [2.0, 0.5, 0.5], [0.5, 1.0, 1.5],
-                [0.5, 0.5, 1.0, 1.0], [0.5]*6
-            ],
-            'whole': [[3.0]], 'half': [[1.5, 1.5]], 
-            'quarter': [[1.0, 1.0, 1.0]], 'eighth': [[0.5]*6]
-        }
-    elif time_sig == '6/8':
-        measure_length = 3.0
-        rhythm_patterns = {
-            'random': [
-                [3.0], [1.5, 1.5], [1.0, 2.0], [2.0, 1.0], [1.0, 1.0, 1.0],
-                [0.5, 0.5, 2.0], [2.0, 0.5, 0.5], [0.5, 1.0, 1.5],
-                [0.5, 0.5, 1.0, 1.0], [0.5]*6
-            ],
-            'whole': [[3.0]], 'half': [[1.5, 1.5]], 
-            'quarter': [[1.0, 1.0, 1.0]], 'eighth': [[0.5]*6]
-        }
-    else:
-        measure_length = 4.0
-        rhythm_patterns = {
-            'random': [[4.0]], 'whole': [[4.0]], 'half': [[2.0, 2.0]], 
-            'quarter': [[1.0, 1.0, 1.0, 1.0]], 'eighth': [[0.5]*8]
-        }
-    
-    for i, rn in enumerate(prog):
-        c = roman_to_chord(rn, tonic, mode)
-        m = stream.Measure(number=i+1)  # 마디 번호 명시적으로 지정
-        pattern = random.choice(rhythm_patterns[rhythm_option]) if rhythm_option in rhythm_patterns else random.choice(rhythm_patterns['random'])
-        notes = []
+    melody.append(key.Key(tonic, mode))
+    
+    measures = melody_measures(prog, tonic, mode, time_sig, rhythm_option, rng)
+    if measures:
+        measures[-1].rightBarline = 'final'
+    append_measures(melody, measures, get_meter(time_sig).measure_ticks)
+    connect_melody(melody, use_slurs, use_ties)
+    
+    melody.id = 'Melody'
+    return melody
+
+
+def melody_measures(prog: List[str], tonic: str, mode: str = 'major',
+                    time_sig: str = '4/4', rhythm_option: str = 'random',
+                    rng: Optional[random.Random] = None,
+                    prev_note: Optional[note.Note] = None, first_index: int = 0,
+                    total: Optional[int] = None) -> List[stream.Measure]:
+    """
+    코드 진행에 맞는 멜로디 마디 목록을 생성합니다 (마디 번호는 1부터, 마침 세로줄 없음).
+    
+    곡 중간의 일부 마디만 다시 만들 때는 prog에 해당 구간의 코드만 주고,
+    prev_note, first_index, total로 앞 마디와 곡 전체 길이를 알려 줍니다.
+    
+    Args:
+        prog: 로마숫자 코드 진행 리스트
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        rhythm_option: 리듬 옵션
+        rng: 난수 생성기
+        prev_note: 구간 바로 앞의 음 (순차 진행 기준, 없으면 None)
+        first_index: 구간 첫 마디의 곡 전체 기준 위치 (0부터)
+        total: 곡 전체 마디 수 (기본값은 len(prog))
+    
+    Returns:
+        List[music21.stream.Measure]: 멜로디 마디 목록
+    """
+    events = melody_events(prog, tonic, mode, time_sig, rhythm_option, rng,
+                           prev_note.nameWithOctave if prev_note is not None else None,
+                           first_index, total)
+    return event_measures(events, first_index)
+
+
+def event_measures(events: Sequence[Sequence[Tuple[str, int]]],
+                   first_index: int = 0) -> List[stream.Measure]:
+    """
+    melody_events의 마디별 (음 이름, 틱 길이) 목록을 멜로디 마디로 만듭니다.
+
+    Args:
+        events: 마디별 (음 이름, 틱 길이) 목록
+        first_index: 첫 마디의 곡 전체 기준 위치 (0부터)
+
+    Returns:
+        List[music21.stream.Measure]: 멜로디 마디 목록
+    """
+    measures = []
+    for i, measure in enumerate(events, first_index):
+        check_deadline()
+        # 마디 번호 명시적으로 지정
+        measures.append(fill_measure(i + 1, [(note.Note(name), ticks) for name, ticks in measure]))
+    return measures
+
+
+def melody_events(prog: Sequence[str], tonic: str, mode: str = 'major',
+                  time_sig: str = '4/4', rhythm_option: str = 'random',
+                  rng: Optional[random.Random] = None,
+                  prev_name: Optional[str] = None, first_index: int = 0,
+                  total: Optional[int] = None) -> List[List[Tuple[str, int]]]:
+    """
+    코드 진행에 맞는 멜로디를 마디별 (음 이름, 틱 길이) 목록으로 생성합니다.
+
+    music21 객체를 만들지 않으며, melody_measures와 같은 난수 순서를 씁니다
+    (같은 시드면 같은 멜로디).
+
+    Args:
+        prog: 로마숫자 코드 진행 리스트
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        rhythm_option: 리듬 옵션
+        rng: 난수 생성기
+        prev_name: 구간 바로 앞의 음 이름 (옥타브 포함, 없으면 None)
+        first_index: 구간 첫 마디의 곡 전체 기준 위치 (0부터)
+        total: 곡 전체 마디 수 (기본값은 len(prog))
+
+    Returns:
+        List[List[Tuple[str, int]]]: 마디별 (옥타브 포함 음 이름, 틱 길이) 목록
+    """
+    table = key_table(tonic, mode)
+    scale_degrees = table.scale_names
+    tonic_name = scale_degrees[0]
+    total = len(prog) if total is None else total
+    
+    # 박자별 리듬 패턴 테이블 (시작 시 컴파일됨)
+    rhythm_table = get_meter(time_sig).table(rhythm_option)
+    rng = rng or random
+    
+    measures = []
+    for i, rn in enumerate(prog, first_index):
+        check_deadline()
+        # 화음 구성음 (4옥타브)
+        c = chord_entry(voiced_figure(rn), tonic, mode)
+        chord_tones = [f"{name}4" for name in (c.third_name, c.fifth_name) if name]
+        pattern = rhythm_table.sample(rng)
+        events = []
         
-        for j, dur in enumerate(pattern):
-            is_cadence_zone = (i >= len(prog) - 3)
+        for j, ticks in enumerate(pattern):
+            is_cadence_zone = (i >= total - 3)
             if j == 0:
                 if is_cadence_zone:
-                    n = note.Note(tonic_pitch)
+                    name = tonic_name
                 else:
-                    choices = [c.root(), c.third, c.fifth, tonic_pitch]
-                    n = note.Note(random.choice(choices))
-            elif i == len(prog) - 1 and j == len(pattern) - 1:
-                n = note.Note(tonic_pitch)
+                    choices = [f"{c.root_name}4"] + chord_tones + [tonic_name]
+                    name = rng.choice(choices)
+            elif i == total - 1 and j == len(pattern) - 1:
+                name = tonic_name
             elif is_cadence_zone:
-                choices = [c.third, c.fifth, tonic_pitch]
-                n = note.Note(random.choice(choices))
+                choices = chord_tones + [tonic_name]
+                name = rng.choice(choices)
             else:
-                if prev_note:
-                    candidates = [p for p in scale_degrees if abs(p.midi - prev_note.pitch.midi) <= 2]
-                    n = note.Note(random.choice(candidates)) if candidates else note.Note(random.choice(scale_degrees))
+                if prev_name:
+                    prev_midi = pitch_to_midi(prev_name)
+                    candidates = [n for n, midi in zip(scale_degrees, table.scale_midi)
+                                  if abs(midi - prev_midi) <= 2]
+                    name = rng.choice(candidates) if candidates else rng.choice(scale_degrees)
                 else:
-                    n = note.Note(random.choice(scale_degrees))
+                    name = rng.choice(scale_degrees)
             
-            n.quarterLength = dur
-            if n.pitch.octave is None:
-                n.pitch.octave = 4
-            while n.pitch.octave < 4:
-                n.pitch.octave += 1
-            while n.pitch.octave > 6:
-                n.pitch.octave -= 1
-            notes.append(n)
-            prev_note = n
-        
-        for n in notes:
-            m.append(n)
-            all_notes.append(n)
+            # 패턴은 컴파일 시 한 마디를 정확히 채우는지 검사됨
+            events.append((name, ticks))
+            prev_name = name
         
-        total_len = sum([n.quarterLength for n in m.notes])
-        if abs(total_len - measure_length) > 0.01:
-            print(f"[WARNING] Measure {i+1}: Total duration ({total_len}) does not match time signature ({measure_length}).")
-        
-        if i == len(prog) - 1:
-            m.rightBarline = 'final'
-        melody.append(m)
+        measures.append(events)
+    return measures
+
+
+def connect_melody(melody: stream.Part, use_slurs: bool = True, use_ties: bool = True) -> None:
+    """
+    멜로디 파트에 프레이즈 이음줄과 같은 음 붙임줄을 추가합니다.
+    
+    Args:
+        melody: 마디가 채워진 멜로디 파트
+        use_slurs: 이음줄 사용 여부
+        use_ties: 붙임줄 사용 여부
+    """
+    all_notes = list(melody.recurse().notes)  # 모든 음 (이음줄/붙임줄용)
     
     # 프레이즈 단위(4마디) 이음줄 추가
     if use_slurs:
+        slurs = []
         for i in range(0, len(all_notes), 4):
             if i+3 < len(all_notes):
                 slur = spanner.Slur()
                 for n in all_notes[i:i+4]:
                     slur.addSpannedElements(n)
-                melody.insert(0, slur)
+                slurs.append(slur)
+        insert_spanners(melody, slurs)
 
     # 붙임줄(마디 넘어가는 같은 음)
     if use_ties:
@@ -348,9 +464,31 @@ def generate_melody_part(prog: List[str], tonic: str, mode: str = 'major',
                 else:
                     n1.tie = tie.Tie('continue')
                 n2.tie = tie.Tie('stop')
-    
-    melody.id = 'Melody'
-    return melody
+
+
+# 조성별 5도권 진행 순서
+CIRCLE_PROGRESSIONS = {
+    'major': ['I', 'IV', 'vii°', 'iii', 'vi', 'ii', 'V', 'I'],
+    'minor': ['i', 'iv', 'VII', 'III', 'VI', 'ii°', 'V', 'i'],
+}
+
+
+def is_circle_motion(current: str, next_chord: str, mode: str = 'major') -> bool:
+    """두 코드가 5도권 순서상 바로 이어지는지 확인합니다."""
+    circle_prog = CIRCLE_PROGRESSIONS['major' if mode == 'major' else 'minor']
+    if current in circle_prog and next_chord in circle_prog:
+        return circle_prog.index(next_chord) == (circle_prog.index(current) + 1) % len(circle_prog)
+    return False
+
+
+@lru_cache(maxsize=4096)
+def voice_leading_table(current: str, next_chord: str, tonic: str, mode: str) -> Tuple[bool, int]:
+    """두 코드 사이의 (공통음 존재 여부, 반음 진행 쌍 수) 캐시"""
+    a = chord_entry(current, tonic, mode)
+    b = chord_entry(next_chord, tonic, mode)
+    common = bool(set(a.names) & set(b.names))
+    half_steps = sum(1 for m1 in a.midi for m2 in b.midi if abs(m1 - m2) == 1)
+    return common, half_steps
 
 
 def analyze_harmony(prog: List[str], tonic: str, mode: str = 'major') -> Dict[str, Any]:
@@ -364,10 +502,10 @@ def analyze_harmony(prog: List[str], tonic: str, mode: str = 'major') -> Dict[st
     
     Returns:
         Dict[str, Any]: 분석 결과
-    """
-    k = key.Key(tonic, mode)
-    s = scale.MajorScale(tonic) if mode == 'major' else scale.MinorScale(tonic)
     
+    Raises:
+        DeadlineExceeded: deadline() 구간의 마감 시각이 지난 경우 (마디마다 확인)
+    """
     analysis = {
         'key': f"{tonic} {mode}",
         'cadences': [],
@@ -399,29 +537,18 @@ def analyze_harmony(prog: List[str], tonic: str, mode: str = 'major') -> Dict[st
     
     # 화성 진행 분석 및 5도권 마디 위치 기록
     for i in range(len(prog) - 1):
+        check_deadline()
         current = prog[i]
         next_chord = prog[i + 1]
-        if mode == 'major':
-            circle_prog = ['I', 'IV', 'vii°', 'iii', 'vi', 'ii', 'V', 'I']
-            if current in circle_prog and next_chord in circle_prog:
-                if circle_prog.index(next_chord) == (circle_prog.index(current) + 1) % len(circle_prog):
-                    analysis['harmonic_progressions'].append(f"Circle of Fifths: {current} -> {next_chord}")
-                    analysis['circle_measures'].append({'measure': i, 'text': f'5도권 진행: {current}->{next_chord}'})
-        else:
-            circle_prog = ['i', 'iv', 'VII', 'III', 'VI', 'ii°', 'V', 'i']
-            if current in circle_prog and next_chord in circle_prog:
-                if circle_prog.index(next_chord) == (circle_prog.index(current) + 1) % len(circle_prog):
-                    analysis['harmonic_progressions'].append(f"Circle of Fifths: {current} -> {next_chord}")
-                    analysis['circle_measures'].append({'measure': i, 'text': f'5도권 진행: {current}->{next_chord}'})
-    
-    # 음계 사용 분석
-    scale_degrees = s.getPitches()
+        if is_circle_motion(current, next_chord, mode):
+            analysis['harmonic_progressions'].append(f"Circle of Fifths: {current} -> {next_chord}")
+            analysis['circle_measures'].append({'measure': i, 'text': f'5도권 진행: {current}->{next_chord}'})
+    
+    # 음계 사용 분석 (조성별 코드 구성음 테이블 사용)
     for chord in prog:
-        rn = roman.RomanNumeral(chord, k)
-        for p in rn.pitches:
-            if p in scale_degrees:
-                degree = scale_degrees.index(p) + 1
-                analysis['scale_usage'][f"Degree {degree}"] = analysis['scale_usage'].get(f"Degree {degree}", 0) + 1
+        check_deadline()
+        for degree in chord_entry(chord, tonic, mode).degrees:
+            analysis['scale_usage'][f"Degree {degree}"] = analysis['scale_usage'].get(f"Degree {degree}", 0) + 1
     
     # 텐션 분석
     for chord in prog:
@@ -430,19 +557,16 @@ def analyze_harmony(prog: List[str], tonic: str, mode: str = 'major') -> Dict[st
     
     # 음성진행 분석
     for i in range(len(prog) - 1):
-        current = roman.RomanNumeral(prog[i], k)
-        next_chord = roman.RomanNumeral(prog[i + 1], k)
+        check_deadline()
+        common_tones, half_steps = voice_leading_table(prog[i], prog[i + 1], tonic, mode)
         
         # 공통음 유지
-        common_tones = set(current.pitches) & set(next_chord.pitches)
         if common_tones:
             analysis['voice_leading'].append(f"Common tone between {prog[i]} and {prog[i+1]}")
         
         # 반음 진행
-        for p1 in current.pitches:
-            for p2 in next_chord.pitches:
-                if abs(p1.midi - p2.midi) == 1:
-                    analysis['voice_leading'].append(f"Half-step motion between {prog[i]} and {prog[i+1]}")
+        for _ in range(half_steps):
+            analysis['voice_leading'].append(f"Half-step motion between {prog[i]} and {prog[i+1]}")
     
     return analysis
 
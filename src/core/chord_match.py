@@ -0,0 +1,122 @@
+"""
+화음 인식 모듈
+
+이 모듈은 마디의 피치 클래스 분포를 조성의 3화음 어휘와 비교하여
+가장 잘 맞는 로마숫자 코드를 고르는 기능을 제공합니다. 구성음 판정에는
+chord_tables의 피치 클래스 마스크를 사용합니다.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .chord_tables import chord_entry
+
+# 조성별 인식 어휘 (generate_progression과 같은 3화음 어휘)
+DIATONIC_FIGURES: Dict[str, Tuple[str, ...]] = {
+    'major': ('I', 'ii', 'iii', 'IV', 'V', 'vi', 'vii°'),
+    'minor': ('i', 'ii°', 'III', 'iv', 'V', 'VI', 'VII'),
+}
+
+# 비화성음 가중치 벌점과 베이스 일치 가산점
+NON_CHORD_PENALTY = 0.5
+BASS_BONUS = 0.25
+
+# 장조/단조 키 프로파일 (Krumhansl-Kessler)
+_MAJOR_PROFILE = (6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88)
+_MINOR_PROFILE = (6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17)
+
+# 피치 클래스별 조성 이름 (웹 UI 표기)
+_TONIC_NAMES = ('C', 'C#', 'D', 'Eb', 'E', 'F', 'F#', 'G', 'Ab', 'A', 'Bb', 'B')
+
+
+def chord_masks(tonic: str, mode: str) -> List[Tuple[str, int, int]]:
+    """
+    조성의 인식 어휘를 (코드 기호, 피치 클래스 마스크, 근음) 목록으로 반환합니다.
+
+    Args:
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        List[Tuple[str, int, int]]: 인식 후보 목록
+    """
+    result = []
+    for figure in DIATONIC_FIGURES[mode]:
+        entry = chord_entry(figure, tonic, mode)
+        result.append((figure, entry.mask, entry.root))
+    return result
+
+
+def chord_fit(weights: Sequence[float], mask: int, root: int,
+              bass: Optional[int] = None) -> float:
+    """
+    피치 클래스 분포가 화음에 얼마나 잘 맞는지 점수를 계산합니다.
+
+    Args:
+        weights: 피치 클래스별 음길이 합 (길이 12)
+        mask: 화음의 피치 클래스 마스크
+        root: 화음의 근음 피치 클래스
+        bass: 마디의 최저음 피치 클래스 (없으면 None)
+
+    Returns:
+        float: 점수 (총 음길이로 정규화, 높을수록 잘 맞음)
+    """
+    total = sum(weights)
+    if total <= 0:
+        return 0.0
+    inside = sum(w for pc, w in enumerate(weights) if mask >> pc & 1)
+    score = (inside - NON_CHORD_PENALTY * (total - inside)) / total
+    if bass is not None and bass == root:
+        score += BASS_BONUS
+    return score
+
+
+def best_figure(weights: Sequence[float], tonic: str, mode: str,
+                bass: Optional[int] = None) -> Optional[str]:
+    """
+    마디에 가장 잘 맞는 로마숫자 코드를 고릅니다.
+
+    Args:
+        weights: 피치 클래스별 음길이 합 (길이 12)
+        tonic: 조성
+        mode: 조성 타입
+        bass: 마디의 최저음 피치 클래스
+
+    Returns:
+        Optional[str]: 코드 기호 (음이 없는 마디는 None)
+    """
+    if sum(weights) <= 0:
+        return None
+    best, best_score = None, float('-inf')
+    for figure, mask, root in chord_masks(tonic, mode):
+        score = chord_fit(weights, mask, root, bass)
+        if score > best_score:
+            best, best_score = figure, score
+    return best
+
+
+def estimate_key(weights: Sequence[float]) -> Tuple[str, str]:
+    """
+    피치 클래스 분포로 조성을 추정합니다 (Krumhansl-Schmuckler).
+
+    Args:
+        weights: 곡 전체의 피치 클래스별 음길이 합 (길이 12)
+
+    Returns:
+        Tuple[str, str]: (조성, 조성 타입)
+    """
+    def correlation(profile: Sequence[float], shift: int) -> float:
+        rotated = [profile[(pc - shift) % 12] for pc in range(12)]
+        mean_w = sum(weights) / 12
+        mean_p = sum(rotated) / 12
+        num = sum((w - mean_w) * (p - mean_p) for w, p in zip(weights, rotated))
+        den_w = sum((w - mean_w) ** 2 for w in weights) ** 0.5
+        den_p = sum((p - mean_p) ** 2 for p in rotated) ** 0.5
+        return num / (den_w * den_p) if den_w and den_p else 0.0
+
+    best = max(
+        ((correlation(profile, shift), shift, mode)
+         for mode, profile in (('major', _MAJOR_PROFILE), ('minor', _MINOR_PROFILE))
+         for shift in range(12)),
+        key=lambda item: item[0]
+    )
+    return _TONIC_NAMES[best[1]], best[2]
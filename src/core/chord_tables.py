@@ -0,0 +1,286 @@
+"""
+로마숫자 코드 테이블 모듈
+
+이 모듈은 24개 조성의 로마숫자 코드를 한 번 해석하여
+(조성, 코드 기호) -> 근음, 베이스, 피치 클래스 마스크, 구성음 MIDI, 음계 도수
+테이블로 저장합니다. 생성기와 분석기는 요청마다 music21의 RomanNumeral
+파서를 호출하지 않고 이 테이블을 조회합니다.
+
+테이블은 precompute_tables로 미리 만들거나 조회할 때 조성별로 만들어지며,
+export_tables/install_tables로 JSON 직렬화해 다른 프로세스와 공유할 수 있습니다.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from music21 import key, roman, scale
+
+# 미리 계산하는 조성 (웹 UI의 키 목록 × 장조/단조)
+TONICS = ('C', 'C#', 'D', 'Eb', 'E', 'F', 'F#', 'G', 'Ab', 'A', 'Bb', 'B')
+MODES = ('major', 'minor')
+
+# 미리 계산하는 코드 기호 (generate_progression과 5도권 분석에서 쓰는 어휘)
+FIGURES = (
+    'I', 'ii', 'iii', 'IV', 'V', 'vi', 'vii°', 'V7', 'ii7', 'IV7',
+    'i', 'ii°', 'III', 'iv', 'VI', 'VII', 'iv7', 'ii°7',
+)
+
+# export_tables 형식 버전 (형식이 바뀌면 올려서 공유 캐시의 이전 데이터를 쓰지 않도록)
+TABLE_FORMAT = 1
+
+# 미리 계산하지 않은 조성과 어휘에 없는 코드 기호의 캐시 크기
+# (사용자 입력이 늘어도 메모리가 일정하도록 최근에 쓴 것만 유지)
+EXTRA_KEY_CACHE_SIZE = 32
+USER_FIGURE_CACHE_SIZE = 2048
+
+_PITCH_RE = re.compile(r'^\s*([A-Ga-g])([#b\-]*)(-?\d+)?\s*$')
+_STEP_PC = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+PitchLike = Union[int, str, None]
+
+
+class ChordEntry(NamedTuple):
+    """
+    한 조성에서 해석된 로마숫자 코드
+
+    Attributes:
+        figure: 코드 기호 (예: 'V7')
+        root: 근음 피치 클래스 (0~11)
+        bass: 베이스 피치 클래스 (0~11)
+        mask: 구성음 피치 클래스 비트 마스크 (bit n = 피치 클래스 n)
+        names: 구성음 이름 (옥타브 포함, 예: ('G4', 'B4', 'D5', 'F5'))
+        pitch_names: 구성음 이름 (옥타브 없음)
+        midi: 구성음 MIDI 번호
+        degrees: 음계에 속한 구성음의 음계 도수 (1~8, analyze_harmony 기준)
+        root_name: 근음 이름 (옥타브 없음)
+        third_name: 3음 이름 (없으면 None)
+        fifth_name: 5음 이름 (없으면 None)
+    """
+    figure: str
+    root: int
+    bass: int
+    mask: int
+    names: Tuple[str, ...]
+    pitch_names: Tuple[str, ...]
+    midi: Tuple[int, ...]
+    degrees: Tuple[int, ...]
+    root_name: str
+    third_name: Optional[str]
+    fifth_name: Optional[str]
+
+
+class KeyTable(NamedTuple):
+    """
+    한 조성의 음계와 코드 테이블
+
+    Attributes:
+        scale_names: 음계 구성음 이름 (옥타브 포함, 으뜸음부터 한 옥타브 위까지)
+        scale_midi: 음계 구성음 MIDI 번호
+        chords: 코드 기호 -> ChordEntry
+    """
+    scale_names: Tuple[str, ...]
+    scale_midi: Tuple[int, ...]
+    chords: Dict[str, ChordEntry]
+
+
+# 미리 계산한 TONICS × MODES 테이블 (만든 뒤에는 바꾸지 않음)
+_TABLES: Dict[Tuple[str, str], KeyTable] = {}
+
+
+def _build_entry(figure: str, k: key.Key, scale_names: Tuple[str, ...]) -> ChordEntry:
+    """music21로 코드 기호 하나를 해석합니다 (테이블 생성 시에만 호출)."""
+    rn = roman.RomanNumeral(figure, k)
+    pitches = rn.pitches
+    names = tuple(p.nameWithOctave for p in pitches)
+    mask = 0
+    for p in pitches:
+        mask |= 1 << p.pitchClass
+    third = rn.third
+    fifth = rn.fifth
+    return ChordEntry(
+        figure=figure,
+        root=rn.root().pitchClass,
+        bass=rn.bass().pitchClass,
+        mask=mask,
+        names=names,
+        pitch_names=tuple(p.name for p in pitches),
+        midi=tuple(p.midi for p in pitches),
+        degrees=tuple(scale_names.index(n) + 1 for n in names if n in scale_names),
+        root_name=rn.root().name,
+        third_name=third.name if third is not None else None,
+        fifth_name=fifth.name if fifth is not None else None,
+    )
+
+
+def _build_key(tonic: str, mode: str) -> KeyTable:
+    """조성 하나의 테이블을 만듭니다."""
+    k = key.Key(tonic, mode)
+    s = scale.MajorScale(tonic) if mode == 'major' else scale.MinorScale(tonic)
+    scale_pitches = s.getPitches()
+    scale_names = tuple(p.nameWithOctave for p in scale_pitches)
+    chords = {figure: _build_entry(figure, k, scale_names) for figure in FIGURES}
+    return KeyTable(scale_names, tuple(p.midi for p in scale_pitches), chords)
+
+
+@lru_cache(maxsize=EXTRA_KEY_CACHE_SIZE)
+def _extra_key_table(tonic: str, mode: str) -> KeyTable:
+    """미리 계산하지 않은 조성의 테이블 (최근 EXTRA_KEY_CACHE_SIZE개만 유지)"""
+    return _build_key(tonic, mode)
+
+
+@lru_cache(maxsize=USER_FIGURE_CACHE_SIZE)
+def _user_entry(figure: str, tonic: str, mode: str) -> ChordEntry:
+    """어휘에 없는 코드 기호의 항목 (최근 USER_FIGURE_CACHE_SIZE개만 유지)"""
+    return _build_entry(figure, key.Key(tonic, mode), key_table(tonic, mode).scale_names)
+
+
+def key_table(tonic: str, mode: str = 'major') -> KeyTable:
+    """
+    조성 테이블을 반환합니다.
+
+    TONICS × MODES의 테이블은 처음 조회할 때 만들어 계속 유지하고, 그 밖의
+    조성(예: 'Db', 'G#')은 크기가 제한된 캐시에 둡니다.
+
+    Args:
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        KeyTable: 조성 테이블
+    """
+    table = _TABLES.get((tonic, mode))
+    if table is None:
+        if tonic not in TONICS or mode not in MODES:
+            return _extra_key_table(tonic, mode)
+        table = _build_key(tonic, mode)
+        _TABLES[(tonic, mode)] = table
+    return table
+
+
+def precompute_tables() -> None:
+    """TONICS × MODES의 24개 조성 테이블을 미리 만듭니다."""
+    for tonic in TONICS:
+        for mode in MODES:
+            key_table(tonic, mode)
+
+
+def export_tables() -> bytes:
+    """
+    미리 계산한 조성 테이블 전체를 직렬화합니다.
+
+    Returns:
+        bytes: install_tables로 복원할 수 있는 JSON 데이터 (UTF-8)
+    """
+    precompute_tables()
+    tables = [
+        [tonic, mode, list(table.scale_names), list(table.scale_midi),
+         [list(entry) for entry in table.chords.values()]]
+        for (tonic, mode), table in _TABLES.items()
+    ]
+    return json.dumps({'format': TABLE_FORMAT, 'tables': tables},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _load_entry(values: list) -> ChordEntry:
+    """JSON 배열 하나를 ChordEntry로 되돌립니다."""
+    if not isinstance(values, list) or len(values) != len(ChordEntry._fields):
+        raise ValueError("Malformed chord table entry")
+    figure, root, bass, mask, names, pitch_names, midi, degrees, root_name, third, fifth = values
+    return ChordEntry(str(figure), int(root), int(bass), int(mask), tuple(map(str, names)),
+                      tuple(map(str, pitch_names)), tuple(map(int, midi)), tuple(map(int, degrees)),
+                      str(root_name), None if third is None else str(third),
+                      None if fifth is None else str(fifth))
+
+
+def install_tables(data: bytes) -> None:
+    """
+    export_tables로 직렬화한 테이블을 설치합니다 (이미 있는 조성은 유지).
+
+    모두 확인한 뒤에 설치하므로 잘못된 데이터는 테이블을 바꾸지 않습니다.
+
+    Args:
+        data: export_tables의 결과
+
+    Raises:
+        ValueError: 형식 버전이 다르거나 데이터가 올바르지 않은 경우
+    """
+    try:
+        payload = json.loads(data)
+        if payload.get('format') != TABLE_FORMAT:
+            raise ValueError(f"Unsupported chord table format: {payload.get('format')!r}")
+        tables = {}
+        for tonic, mode, scale_names, scale_midi, entries in payload['tables']:
+            if tonic not in TONICS or mode not in MODES:
+                raise ValueError(f"Unexpected key in chord tables: {tonic} {mode}")
+            chords = {entry.figure: entry for entry in map(_load_entry, entries)}
+            if set(chords) != set(FIGURES):
+                raise ValueError(f"Chord table for {tonic} {mode} does not match FIGURES")
+            tables[(tonic, mode)] = KeyTable(tuple(map(str, scale_names)),
+                                             tuple(map(int, scale_midi)), chords)
+    except (AttributeError, KeyError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed chord tables: {e}") from e
+    for name, table in tables.items():
+        _TABLES.setdefault(name, table)
+
+
+def chord_entry(figure: str, tonic: str, mode: str = 'major') -> ChordEntry:
+    """
+    (조성, 코드 기호)의 테이블 항목을 반환합니다.
+
+    어휘에 없는 코드 기호는 조성 테이블에 넣지 않고 해석하여 크기가
+    제한된 캐시에 둡니다 (V/V/V 같은 부속화음 연쇄가 테이블을 키우지 않도록).
+
+    Args:
+        figure: 로마숫자 코드
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        ChordEntry: 코드 정보
+
+    Raises:
+        music21.roman.RomanNumeralException: 해석할 수 없는 코드 기호인 경우
+    """
+    entry = key_table(tonic, mode).chords.get(figure)
+    if entry is None:
+        entry = _user_entry(figure, tonic, mode)
+    return entry
+
+
+def voiced_figure(figure: str) -> str:
+    """
+    생성기가 실제로 연주하는 코드 기호를 반환합니다 ('V'는 속7화음으로 확장).
+
+    Args:
+        figure: 로마숫자 코드
+
+    Returns:
+        str: 연주용 코드 기호
+    """
+    return figure + '7' if figure.upper() == 'V' else figure
+
+
+def pitch_to_midi(value: PitchLike) -> Optional[int]:
+    """
+    음 이름 또는 MIDI 번호를 MIDI 번호로 변환합니다.
+
+    Args:
+        value: MIDI 번호, 음 이름(예: 'F#4', 'Bb3', 'E-5') 또는 쉼표(None)
+
+    Returns:
+        Optional[int]: MIDI 번호 (쉼표는 None)
+
+    Raises:
+        ValueError: 해석할 수 없는 음 이름인 경우
+    """
+    if value is None or isinstance(value, int):
+        return value
+    match = _PITCH_RE.match(str(value))
+    if not match:
+        raise ValueError(f"Invalid pitch: {value!r}")
+    step, accidentals, octave = match.groups()
+    alter = accidentals.count('#') - accidentals.count('b') - accidentals.count('-')
+    return (int(octave or 4) + 1) * 12 + _STEP_PC[step.upper()] + alter
+
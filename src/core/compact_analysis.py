@@ -0,0 +1,118 @@
+"""
+압축 화성 분석 모듈
+
+analyze_harmony는 사람이 읽는 문장 목록을 돌려주므로 결과 크기가 문장
+수에 비례하고, 음성진행은 반음 진행 쌍마다 같은 문장을 반복합니다. 이
+모듈은 같은 분석을 마디 번호(0부터), 열거 코드, 개수로 표현하고, 요청한
+항목만 계산합니다.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .chord_generator import is_circle_motion, voice_leading_table
+from .chord_tables import chord_entry, key_table
+from .tracing import traced
+
+# 계산할 수 있는 분석 항목 (응답 순서)
+COMPACT_FIELDS = ('key', 'cadences', 'circle', 'scale_usage', 'tensions', 'voice_leading')
+
+# 종지 코드 (마지막 두 화음 -> 종지 종류)
+_CADENCE_TYPES = {
+    'major': {('V', 'I'): 'authentic', ('IV', 'I'): 'plagal'},
+    'minor': {('V', 'i'): 'authentic', ('iv', 'i'): 'plagal'},
+}
+
+
+def select_fields(value: Any) -> Tuple[str, ...]:
+    """
+    분석 항목 선택 값을 정규화합니다.
+
+    Args:
+        value: 항목 리스트 또는 쉼표 구분 문자열 ('*', 'all'은 전체, 빈 항목은 무시)
+
+    Returns:
+        Tuple[str, ...]: COMPACT_FIELDS 순서의 항목
+
+    Raises:
+        ValueError: 리스트나 문자열이 아니거나 알 수 없는 항목이 있는 경우
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f"fields must be a list or a comma-separated string of: {', '.join(COMPACT_FIELDS)}")
+    names = {str(v).strip() for v in value} - {''}
+    if names & {'*', 'all'}:
+        return COMPACT_FIELDS
+    unknown = sorted(names.difference(COMPACT_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} "
+                         f"(fields must be among: {', '.join(COMPACT_FIELDS)}, or all)")
+    return tuple(field for field in COMPACT_FIELDS if field in names)
+
+
+def _voice_leading(prog: Sequence[str], tonic: str, mode: str) -> Dict[str, List]:
+    common: List[int] = []
+    half_steps: List[List[int]] = []
+    for i in range(len(prog) - 1):
+        has_common, count = voice_leading_table(prog[i], prog[i + 1], tonic, mode)
+        if has_common:
+            common.append(i)
+        if count:
+            half_steps.append([i, count])
+    return {'common': common, 'half_steps': half_steps}
+
+
+@traced()
+def analyze_compact(prog: Sequence[str], tonic: str, mode: str = 'major',
+                    fields: Iterable[str] = COMPACT_FIELDS) -> Dict[str, Any]:
+    """
+    화성 분석을 압축 형식으로 수행합니다 (요청한 항목만 계산).
+
+    항목 형식:
+        key: '조성 조성타입' 문자열
+        cadences: [[마디, 'authentic' | 'plagal']]
+        circle: 다음 마디로 5도권 진행하는 마디 번호 목록
+        scale_usage: 음계 도수별 사용 횟수 목록 (0번 = 1도)
+        tensions: 텐션 코드가 있는 마디 번호 목록
+        voice_leading: {'common': 공통음이 있는 마디 번호 목록,
+                        'half_steps': [[마디, 반음 진행 쌍 수]]}
+    마디 번호는 analyze_harmony와 같이 0부터 셉니다.
+
+    Args:
+        prog: 로마숫자 코드 진행 리스트
+        tonic: 조성
+        mode: 조성 타입
+        fields: 계산할 항목 (COMPACT_FIELDS 중)
+
+    Returns:
+        Dict[str, Any]: 압축 분석 결과
+    """
+    fields = set(fields)
+    analysis: Dict[str, Any] = {}
+
+    if 'key' in fields:
+        analysis['key'] = f"{tonic} {mode}"
+
+    if 'cadences' in fields:
+        cadence = _CADENCE_TYPES['major' if mode == 'major' else 'minor'].get(tuple(prog[-2:]))
+        analysis['cadences'] = [[len(prog) - 2, cadence]] if cadence and len(prog) >= 2 else []
+
+    if 'circle' in fields:
+        analysis['circle'] = [i for i in range(len(prog) - 1)
+                              if is_circle_motion(prog[i], prog[i + 1], mode)]
+
+    if 'scale_usage' in fields:
+        counts = [0] * len(key_table(tonic, mode).scale_names)
+        for figure in prog:
+            for degree in chord_entry(figure, tonic, mode).degrees:
+                counts[degree - 1] += 1
+        analysis['scale_usage'] = counts
+
+    if 'tensions' in fields:
+        analysis['tensions'] = [i for i, figure in enumerate(prog)
+                                if '7' in figure or '9' in figure or 'sus' in figure]
+
+    if 'voice_leading' in fields:
+        analysis['voice_leading'] = _voice_leading(prog, tonic, mode)
+
+    return analysis
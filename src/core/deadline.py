@@ -0,0 +1,76 @@
+"""
+요청 마감 시각 모듈
+
+deadline()으로 감싼 구간 안에서는 마디 단위 루프(멜로디, 화음, 화성 분석)가
+check_deadline()으로 마감 시각을 확인하고, 지났으면 DeadlineExceeded를
+던져 남은 작업을 멈춥니다. 마감 시각은 contextvars로 요청/작업마다 따로
+유지되며, 마감이 없는 곳(CLI, 스크립트)에서는 check_deadline()이 값 하나를
+읽고 끝나므로 핵심 모듈의 루프에 그대로 둘 수 있습니다.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar('chordgen_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """
+    마감 시각이 지나 작업을 멈춤
+
+    Attributes:
+        partial: 멈추기 전까지 만든 결과 (호출한 쪽에서 채움)
+    """
+
+    def __init__(self, message: str = 'Deadline exceeded'):
+        super().__init__(message)
+        self.partial: Dict[str, Any] = {}
+
+
+def deadline(seconds: Optional[float]):
+    """
+    구간에 마감 시각을 정합니다 (바깥 구간의 마감이 더 이르면 그대로 유지).
+
+    Args:
+        seconds: 지금부터 남은 시간(초), None이면 마감 없음
+    """
+    return deadline_at(None if seconds is None else time.monotonic() + seconds)
+
+
+@contextmanager
+def deadline_at(at: Optional[float]) -> Iterator[None]:
+    """
+    구간에 절대 마감 시각을 정합니다 (요청 도착 시각 기준 마감을 작업 스레드로 넘길 때).
+
+    Args:
+        at: time.monotonic() 기준 마감 시각, None이면 마감 없음
+    """
+    if at is None:
+        yield
+        return
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """현재 구간의 남은 시간(초, 지났으면 0), 마감이 없으면 None"""
+    at = _deadline.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+
+def check_deadline() -> None:
+    """
+    마감 시각이 지났으면 DeadlineExceeded를 던집니다 (마디 단위 루프에서 호출).
+
+    Raises:
+        DeadlineExceeded: 마감 시각이 지난 경우
+    """
+    at = _deadline.get()
+    if at is not None and time.monotonic() >= at:
+        raise DeadlineExceeded()
@@ -0,0 +1,387 @@
+"""
+곡 형식 모듈
+
+이 모듈은 A, AB, AABA 형식의 곡을 섹션 단위로 생성합니다. 서로 다른 섹션은
+한 번만 코드 진행 생성, 악보 렌더링, 화성 분석을 하고, 반복되는 섹션은
+렌더링된 마디를 복제하거나 (선택 시) MusicXML 도돌이표로 내보냅니다.
+"""
+
+import copy
+import random
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from music21 import bar, chord, clef, duration, key, meter, note, stream, tie
+
+from .arrangement import (
+    ChordEvent,
+    accompaniment_measures,
+    accompaniment_part,
+    block_measures,
+    chord_timeline
+)
+from .chord_generator import (
+    analyze_harmony,
+    connect_melody,
+    generate_progression,
+    event_measures,
+    melody_events
+)
+from .meters import get_meter
+from .streams import append_measures
+from .tracing import span, traced
+
+# 형식별 섹션 배치
+FORM_LAYOUTS: Dict[str, Tuple[str, ...]] = {
+    'A': ('A',),
+    'AB': ('A', 'B'),
+    'AABA': ('A', 'A', 'B', 'A'),
+}
+
+Section = Tuple[str, List[str]]
+
+# 렌더링 진행 콜백: (파트 종류, 섹션 이름, 마디 수)
+ProgressCallback = Callable[[str, str, int], None]
+
+
+def section_lengths(structure: str, length: int) -> Dict[str, int]:
+    """
+    형식의 섹션별 마디 수를 계산합니다.
+
+    Args:
+        structure: 곡 형식 ('A', 'AB', 'AABA')
+        length: 전체 마디 수
+
+    Returns:
+        Dict[str, int]: 섹션 이름 -> 마디 수
+    """
+    if structure == 'A':
+        return {'A': length}
+    if structure == 'AABA':
+        a_len = length // 4
+        return {'A': a_len, 'B': length - a_len * 3}
+    a_len = length // 2
+    return {'A': a_len, 'B': length - a_len}
+
+
+def plan_form(structure: str, tonic: str, mode: str = 'major', length: int = 8,
+              rng: Optional[random.Random] = None, style: str = 'textbook') -> List[Section]:
+    """
+    형식에 따라 섹션 순서와 섹션별 코드 진행을 만듭니다.
+
+    같은 이름의 섹션은 같은 코드 진행 리스트를 공유합니다 (섹션당 한 번 생성).
+
+    Args:
+        structure: 곡 형식 ('A', 'AB', 'AABA', 그 외는 'AB')
+        tonic: 조성
+        mode: 조성 타입
+        length: 전체 마디 수
+        rng: 난수 생성기
+        style: 코드 진행 스타일 (generate_progression 참고)
+
+    Returns:
+        List[Tuple[str, List[str]]]: (섹션 이름, 코드 진행) 목록 (빈 섹션 제외)
+    """
+    layout = FORM_LAYOUTS.get(structure, FORM_LAYOUTS['AB'])
+    lengths = section_lengths(structure if structure in FORM_LAYOUTS else 'AB', length)
+    progressions: Dict[str, List[str]] = {}
+    for label in layout:
+        if label not in progressions:
+            with span('generate_progression', section=label, measures=lengths[label]):
+                progressions[label] = generate_progression(tonic, mode, lengths[label], rng, style)
+    return [(label, progressions[label]) for label in layout if progressions[label]]
+
+
+def form_progression(sections: List[Section]) -> List[str]:
+    """섹션 목록을 전체 코드 진행으로 펼칩니다."""
+    return [rn for _, prog in sections for rn in prog]
+
+
+def _clone_measure(m: stream.Measure) -> stream.Measure:
+    """렌더링된 마디의 음표/화음만 새 객체로 복제합니다 (코드 해석, 난수 없음)."""
+    new = stream.Measure(number=m.number)
+    for e in m.notesAndRests:
+        d = duration.Duration(e.duration.quarterLength)
+        if isinstance(e, chord.Chord):
+            clone = chord.Chord([copy.deepcopy(p) for p in e.pitches], duration=d)
+        elif isinstance(e, note.Note):
+            clone = note.Note(copy.deepcopy(e.pitch), duration=d)
+        else:
+            clone = note.Rest(duration=d)
+        if e.tie is not None:
+            clone.tie = tie.Tie(e.tie.type)
+        new.coreInsert(e.offset, clone)
+    new.coreElementsChanged()
+    return new
+
+
+def section_runs(sections: List[Section], use_repeats: bool) -> List[Tuple[str, int]]:
+    """
+    악보에 적을 섹션 순서를 만듭니다.
+
+    Args:
+        sections: plan_form이 만든 (섹션 이름, 코드 진행) 목록
+        use_repeats: 연속으로 반복되는 섹션을 하나로 묶을지 여부
+
+    Returns:
+        List[Tuple[str, int]]: (섹션 이름, 반복 횟수) 목록 (2 이상이면 도돌이표)
+    """
+    runs: List[Tuple[str, int]] = []
+    for label, _ in sections:
+        if use_repeats and runs and runs[-1][0] == label:
+            runs[-1] = (label, runs[-1][1] + 1)
+        else:
+            runs.append((label, 1))
+    return runs
+
+
+def _assemble(part: stream.Part, sections: List[Section],
+              rendered: Dict[str, List[stream.Measure]], use_repeats: bool,
+              measure_ticks: int) -> None:
+    """
+    섹션 순서대로 마디를 파트에 붙입니다.
+
+    섹션의 첫 등장은 렌더링된 마디를 그대로 쓰고, 이후 등장은 복제합니다.
+    use_repeats이면 연속으로 반복되는 섹션을 한 번만 쓰고 도돌이표로 표시합니다.
+    """
+    runs = section_runs(sections, use_repeats)
+
+    used = set()
+    measures: List[stream.Measure] = []
+    for label, times in runs:
+        if label in used:
+            section = [_clone_measure(m) for m in rendered[label]]
+        else:
+            section = rendered[label]
+            used.add(label)
+        if times > 1:
+            section[0].leftBarline = bar.Repeat(direction='start')
+            section[-1].rightBarline = bar.Repeat(direction='end', times=times)
+        measures.extend(section)
+
+    for i, m in enumerate(measures):
+        m.number = i + 1
+    if measures and measures[-1].rightBarline is None:
+        measures[-1].rightBarline = 'final'
+    append_measures(part, measures, measure_ticks)
+
+
+def empty_part(kind: str, tonic: str, mode: str = 'major',
+               time_sig: str = '4/4') -> stream.Part:
+    """
+    마디가 없는 파트(조표, 박자표, 음자리표)를 만듭니다.
+
+    Args:
+        kind: 파트 종류 ('melody', 'chords' 또는 반주 파트)
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+
+    Returns:
+        music21.stream.Part: 빈 파트
+    """
+    if kind == 'melody':
+        p = stream.Part()
+        p.append(meter.TimeSignature(time_sig))
+        p.append(key.Key(tonic, mode))
+        p.id = 'Melody'
+    elif kind == 'chords':
+        p = stream.Part()
+        p.append(key.Key(tonic, mode))
+        p.append(meter.TimeSignature(time_sig))
+        p.append(clef.BassClef())  # 낮은음자리표 추가
+        p.id = 'Chords'
+    else:
+        p = accompaniment_part(kind, tonic, mode, time_sig)
+    return p
+
+
+def render_form(sections: List[Section], tonic: str, mode: str = 'major',
+                time_sig: str = '4/4', add_melody: bool = True, only_melody: bool = False,
+                rhythm_option: str = 'random', use_slurs: bool = False, use_ties: bool = False,
+                voicing: str = 'random', use_repeats: bool = False,
+                accompaniment: Sequence[str] = (), bass_style: str = 'root',
+                rng: Optional[random.Random] = None,
+                timelines: Optional[Dict[str, List[ChordEvent]]] = None,
+                progress: Optional[ProgressCallback] = None,
+                events: Optional[Dict[str, List[List[Tuple[str, int]]]]] = None) -> List[stream.Part]:
+    """
+    섹션 목록을 악보 파트로 렌더링합니다 (서로 다른 섹션마다 한 번).
+
+    Args:
+        sections: plan_form이 만든 (섹션 이름, 코드 진행) 목록
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        add_melody: 멜로디 파트 추가 여부
+        only_melody: 멜로디 파트만 출력 여부
+        rhythm_option: 멜로디 리듬 옵션
+        use_slurs: 이음줄 사용 여부
+        use_ties: 붙임줄 사용 여부
+        voicing: 코드 보이싱 방식 ('random', 'optimal')
+        use_repeats: 연속 반복 섹션을 도돌이표로 내보낼지 여부
+        accompaniment: 추가할 반주 파트 ('bass', 'arpeggio', 'pad')
+        bass_style: 베이스 스타일 ('root', 'walking')
+        rng: 난수 생성기
+        timelines: 섹션별 화음 타임라인을 받을 dict (주어지면 채워 줌, 부분 재생성용)
+        progress: 섹션 하나를 렌더링할 때마다 (파트 종류, 섹션 이름, 마디 수)로 호출할 콜백
+        events: 섹션별 멜로디 이벤트 (마디별 (음 이름, 틱) 목록)를 받을 dict (미리보기용)
+
+    Returns:
+        List[music21.stream.Part]: 파트 목록 (멜로디, 코드, 반주 순)
+    """
+    unique: Dict[str, List[str]] = {}
+    for label, prog in sections:
+        unique.setdefault(label, prog)
+
+    measure_ticks = get_meter(time_sig).measure_ticks
+    parts = []
+    if add_melody:
+        melody = empty_part('melody', tonic, mode, time_sig)
+        rendered = {}
+        for label, prog in unique.items():
+            with span('melody_measures', section=label, measures=len(prog)):
+                measure_events = melody_events(prog, tonic, mode, time_sig, rhythm_option, rng)
+                rendered[label] = event_measures(measure_events)
+            if events is not None:
+                events[label] = measure_events
+            if progress is not None:
+                progress('melody', label, len(prog))
+        with span('assemble', part='melody'):
+            _assemble(melody, sections, rendered, use_repeats, measure_ticks)
+            connect_melody(melody, use_slurs, use_ties)
+        parts.append(melody)
+
+    if add_melody and only_melody:
+        return parts
+
+    # 섹션별 화음 타임라인을 한 번 만들고 코드/반주 파트가 공유
+    if timelines is None:
+        timelines = {}
+    for label, prog in unique.items():
+        with span('chord_timeline', section=label, measures=len(prog)):
+            timelines[label] = chord_timeline(prog, tonic, mode, time_sig, voicing, rng)
+
+    for kind in ('chords',) + tuple(accompaniment):
+        part = empty_part(kind, tonic, mode, time_sig)
+        rendered = {}
+        for label, timeline in timelines.items():
+            with span(f"{kind}_measures", section=label, measures=len(timeline)):
+                if kind == 'chords':
+                    rendered[label] = block_measures(timeline)
+                else:
+                    rendered[label] = accompaniment_measures(kind, timeline, tonic, mode,
+                                                             time_sig, bass_style)
+            if progress is not None:
+                progress(kind, label, len(timeline))
+        with span('assemble', part=kind):
+            _assemble(part, sections, rendered, use_repeats, measure_ticks)
+        parts.append(part)
+
+    return parts
+
+
+def render_form_events(sections: List[Section], tonic: str, mode: str = 'major',
+                       time_sig: str = '4/4', add_melody: bool = True,
+                       only_melody: bool = False, rhythm_option: str = 'random',
+                       voicing: str = 'random', rng: Optional[random.Random] = None,
+                       progress: Optional[ProgressCallback] = None
+                       ) -> Tuple[Dict[str, List[List[Tuple[str, int]]]], Dict[str, List[ChordEvent]]]:
+    """
+    섹션 목록을 music21 스트림 없이 이벤트 데이터로 렌더링합니다.
+
+    render_form과 같은 순서로 난수를 쓰므로 같은 시드면 같은 멜로디와
+    보이싱이 나옵니다 (텍스트 악보 내보내기용).
+
+    Args:
+        sections: plan_form이 만든 (섹션 이름, 코드 진행) 목록
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        add_melody: 멜로디 생성 여부
+        only_melody: 멜로디만 생성 여부
+        rhythm_option: 멜로디 리듬 옵션
+        voicing: 코드 보이싱 방식 ('random', 'optimal')
+        rng: 난수 생성기
+        progress: 섹션 하나를 렌더링할 때마다 (파트 종류, 섹션 이름, 마디 수)로 호출할 콜백
+            (화음 타임라인은 'chords')
+
+    Returns:
+        Tuple[Dict, Dict]: 섹션별 멜로디 (마디별 (음 이름, 틱) 목록),
+        섹션별 화음 타임라인 (멜로디만 생성하면 비어 있음)
+    """
+    unique: Dict[str, List[str]] = {}
+    for label, prog in sections:
+        unique.setdefault(label, prog)
+
+    melody: Dict[str, List[List[Tuple[str, int]]]] = {}
+    if add_melody:
+        for label, prog in unique.items():
+            with span('melody_events', section=label, measures=len(prog)):
+                melody[label] = melody_events(prog, tonic, mode, time_sig, rhythm_option, rng)
+            if progress is not None:
+                progress('melody', label, len(prog))
+
+    timelines: Dict[str, List[ChordEvent]] = {}
+    if not (add_melody and only_melody):
+        for label, prog in unique.items():
+            with span('chord_timeline', section=label, measures=len(prog)):
+                timelines[label] = chord_timeline(prog, tonic, mode, time_sig, voicing, rng)
+            if progress is not None:
+                progress('chords', label, len(prog))
+    return melody, timelines
+
+
+def _shift(items: List[Dict[str, Any]], offset: int) -> List[Dict[str, Any]]:
+    """마디 위치 항목을 offset만큼 옮깁니다."""
+    return [{**item, 'measure': item['measure'] + offset} for item in items]
+
+
+@traced()
+def analyze_form(sections: List[Section], tonic: str, mode: str = 'major') -> Dict[str, Any]:
+    """
+    섹션 단위로 화성 분석을 수행하고 전체 곡의 분석 결과로 합칩니다.
+
+    서로 다른 섹션과 섹션 경계(앞 섹션 끝 화음 -> 다음 섹션 첫 화음)만 분석하므로
+    비용은 고유 섹션 분량에 비례하며, 결과는 전체 진행을 analyze_harmony로
+    분석한 것과 같습니다.
+
+    Args:
+        sections: (섹션 이름, 코드 진행) 목록
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        Dict[str, Any]: 분석 결과 (analyze_harmony와 같은 형식)
+    """
+    prog = form_progression(sections)
+    analysis = analyze_harmony(prog[-2:], tonic, mode)
+    analysis['cadence_measures'] = _shift(analysis['cadence_measures'], max(0, len(prog) - 2))
+    for field in ('harmonic_progressions', 'circle_measures', 'voice_leading', 'tensions'):
+        analysis[field] = []
+    analysis['scale_usage'] = {}
+
+    section_cache: Dict[str, Dict[str, Any]] = {}
+    boundary_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    offset = 0
+    for index, (label, section) in enumerate(sections):
+        if index > 0:
+            pair = (prog[offset - 1], section[0])
+            boundary = boundary_cache.get(pair)
+            if boundary is None:
+                boundary = boundary_cache[pair] = analyze_harmony(list(pair), tonic, mode)
+            analysis['harmonic_progressions'].extend(boundary['harmonic_progressions'])
+            analysis['circle_measures'].extend(_shift(boundary['circle_measures'], offset - 1))
+            analysis['voice_leading'].extend(boundary['voice_leading'])
+
+        part = section_cache.get(label)
+        if part is None:
+            part = section_cache[label] = analyze_harmony(section, tonic, mode)
+        analysis['harmonic_progressions'].extend(part['harmonic_progressions'])
+        analysis['circle_measures'].extend(_shift(part['circle_measures'], offset))
+        analysis['voice_leading'].extend(part['voice_leading'])
+        analysis['tensions'].extend(part['tensions'])
+        for degree, count in part['scale_usage'].items():
+            analysis['scale_usage'][degree] = analysis['scale_usage'].get(degree, 0) + count
+        offset += len(section)
+
+    return analysis
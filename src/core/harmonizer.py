@@ -0,0 +1,223 @@
+"""
+멜로디 화성 붙이기 모듈
+
+이 모듈은 주어진 멜로디의 각 마디에 어울리는 로마숫자 코드 진행을
+비터비 탐색으로 선택하는 기능을 제공합니다. 코드 어휘, 전이 확률, 종지
+규칙은 generate_progression의 패턴에서 가져오고, 마디와 화음의 적합도는
+chord_tables의 피치 클래스 마스크로 계산합니다.
+"""
+
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .chord_generator import BASIC_PATTERNS, CADENCES
+from .chord_match import chord_fit, estimate_key
+from .chord_tables import PitchLike, chord_entry, pitch_to_midi
+from .deadline import check_deadline
+from .meters import get_meter
+from .ticks import to_ticks
+
+# 적합도 점수 가중치 (전이 로그 확률 대비)
+EMISSION_WEIGHT = 4.0
+
+# 마디 첫 박에서 시작하는 음의 가중치 배수
+DOWNBEAT_WEIGHT = 2.0
+
+# 화성을 붙일 수 있는 멜로디의 최대 마디 수
+MAX_MEASURES = 1024
+
+
+class ProgressionModel:
+    """조성 타입별 코드 어휘와 전이 로그 확률"""
+
+    __slots__ = ('vocab', 'start', 'transition', 'finals')
+
+    def __init__(self, vocab: Tuple[str, ...], start: List[float],
+                 transition: List[List[float]], finals: Tuple[int, ...]):
+        self.vocab = vocab
+        self.start = start
+        self.transition = transition
+        self.finals = finals
+
+
+@lru_cache(maxsize=None)
+def progression_model(mode: str) -> ProgressionModel:
+    """generate_progression의 패턴으로 전이 모델을 만듭니다 (조성 타입별 한 번)."""
+    mode = 'major' if mode == 'major' else 'minor'
+    patterns = BASIC_PATTERNS[mode]
+    cadences = CADENCES[mode]
+
+    vocab: List[str] = []
+    for seq in patterns + cadences:
+        for figure in seq:
+            if figure not in vocab:
+                vocab.append(figure)
+    index = {figure: i for i, figure in enumerate(vocab)}
+    size = len(vocab)
+
+    counts = [[1.0] * size for _ in range(size)]
+    # 기본 패턴은 4마디 단위로 반복되므로 끝에서 처음으로 돌아가는 전이 포함
+    for seq in patterns:
+        for a, b in zip(seq, seq[1:] + seq[:1]):
+            counts[index[a]][index[b]] += 1
+    for seq in cadences:
+        for a, b in zip(seq, seq[1:]):
+            counts[index[a]][index[b]] += 1
+    transition = [[math.log(c / sum(row)) for c in row] for row in counts]
+
+    start_counts = [1.0] * size
+    for seq in patterns:
+        start_counts[index[seq[0]]] += len(patterns)
+    start = [math.log(c / sum(start_counts)) for c in start_counts]
+
+    finals = tuple(sorted({index[seq[-1]] for seq in cadences}))
+    return ProgressionModel(tuple(vocab), start, transition, finals)
+
+
+def melody_measure_count(notes: Sequence[Tuple[PitchLike, float]], time_sig: str = '4/4') -> int:
+    """
+    멜로디가 차지하는 마디 수를 계산합니다 (마지막 마디가 덜 찼어도 한 마디).
+
+    Args:
+        notes: (음, 사분음표 단위 길이) 목록
+        time_sig: 박자
+
+    Returns:
+        int: 마디 수
+
+    Raises:
+        ValueError: 틱으로 정확히 나타낼 수 없는 길이가 있는 경우
+    """
+    total = sum(to_ticks(duration) for _, duration in notes)
+    return -(-total // get_meter(time_sig).measure_ticks)
+
+
+def melody_weights(notes: Sequence[Tuple[PitchLike, float]],
+                   time_sig: str = '4/4',
+                   max_measures: int = MAX_MEASURES) -> List[List[float]]:
+    """
+    멜로디를 마디별 피치 클래스 가중치로 나눕니다.
+
+    마디선을 넘는 음은 각 마디에 걸친 길이만큼 나누어 더하고, 마디 첫 박에서
+    시작하는 음에는 DOWNBEAT_WEIGHT 배의 가중치를 줍니다.
+
+    Args:
+        notes: (음, 사분음표 단위 길이) 목록 (음이 None이면 쉼표)
+        time_sig: 박자
+        max_measures: 최대 마디 수
+
+    Returns:
+        List[List[float]]: 마디별 길이 12의 가중치
+
+    Raises:
+        ValueError: 멜로디가 max_measures 마디보다 길거나 길이를 틱으로
+            정확히 나타낼 수 없는 경우
+        DeadlineExceeded: 현재 요청의 마감 시각이 지난 경우
+    """
+    measure = get_meter(time_sig).measure_ticks
+    weights: List[List[float]] = []
+    position = 0
+
+    for value, duration in notes:
+        midi = pitch_to_midi(value)
+        remaining = to_ticks(duration)
+        if -(-(position + remaining) // measure) > max_measures:
+            raise ValueError(f"Melody is longer than {max_measures} measures")
+        while remaining > 0:
+            bar, offset = divmod(position, measure)
+            while len(weights) <= bar:
+                check_deadline()
+                weights.append([0.0] * 12)
+            span = min(remaining, measure - offset)
+            if midi is not None:
+                factor = DOWNBEAT_WEIGHT if offset == 0 else 1.0
+                weights[bar][midi % 12] += factor * span / measure
+            position += span
+            remaining -= span
+
+    return weights
+
+
+def harmonize_weights(weights: Sequence[Sequence[float]], tonic: str,
+                      mode: str = 'major') -> List[str]:
+    """
+    마디별 피치 클래스 가중치에 가장 잘 맞는 코드 진행을 찾습니다.
+
+    점수는 마디 적합도(EMISSION_WEIGHT 배)와 generate_progression 패턴에서 얻은
+    전이 로그 확률의 합이며, 마지막 마디는 종지 패턴의 끝 화음으로 제한합니다.
+    비터비 탐색이므로 마디 수에 선형으로 동작합니다.
+
+    Args:
+        weights: 마디별 길이 12의 가중치
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        List[str]: 로마숫자 코드 진행 리스트
+    """
+    if not weights:
+        return []
+
+    model = progression_model(mode)
+    size = len(model.vocab)
+    entries = [chord_entry(figure, tonic, mode) for figure in model.vocab]
+
+    def emission(measure: Sequence[float]) -> List[float]:
+        return [EMISSION_WEIGHT * chord_fit(measure, e.mask, e.root) for e in entries]
+
+    scores = [s + e for s, e in zip(model.start, emission(weights[0]))]
+    back: List[List[int]] = []
+
+    for measure in weights[1:]:
+        check_deadline()
+        emit = emission(measure)
+        new_scores = [0.0] * size
+        pointers = [0] * size
+        for b in range(size):
+            best_a = max(range(size), key=lambda a: scores[a] + model.transition[a][b])
+            new_scores[b] = scores[best_a] + model.transition[best_a][b] + emit[b]
+            pointers[b] = best_a
+        scores = new_scores
+        back.append(pointers)
+
+    # 종지 규칙: 두 마디 이상이면 마지막 화음은 종지 패턴의 끝 화음
+    candidates = model.finals if len(weights) > 1 else range(size)
+    best = max(candidates, key=lambda b: scores[b])
+    path = [best]
+    for pointers in reversed(back):
+        best = pointers[best]
+        path.append(best)
+    path.reverse()
+    return [model.vocab[i] for i in path]
+
+
+def harmonize_melody(notes: Sequence[Tuple[PitchLike, float]], time_sig: str = '4/4',
+                     tonic: Optional[str] = None,
+                     mode: Optional[str] = None) -> Dict[str, object]:
+    """
+    멜로디에 코드 진행을 붙입니다.
+
+    Args:
+        notes: (음, 사분음표 단위 길이) 목록 (음이 None이면 쉼표)
+        time_sig: 박자
+        tonic: 조성 (없으면 멜로디로 추정)
+        mode: 조성 타입 (없으면 멜로디로 추정)
+
+    Returns:
+        Dict[str, object]: {'tonic', 'mode', 'progression'}
+
+    Raises:
+        ValueError: 멜로디가 MAX_MEASURES 마디보다 길거나 길이가 잘못된 경우
+    """
+    weights = melody_weights(notes, time_sig)
+    if tonic is None or mode is None:
+        totals = [sum(measure[pc] for measure in weights) for pc in range(12)]
+        estimated_tonic, estimated_mode = estimate_key(totals)
+        tonic = tonic or estimated_tonic
+        mode = mode or estimated_mode
+    return {
+        'tonic': tonic,
+        'mode': mode,
+        'progression': harmonize_weights(weights, tonic, mode),
+    }
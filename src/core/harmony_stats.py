@@ -0,0 +1,144 @@
+"""
+화성 통계 모듈
+
+여러 코드 진행의 analyze_compact 결과를 종지 종류, 5도권 진행 쌍, 음계
+도수별 히스토그램으로 합칩니다. 진행 하나의 통계와 합친 통계가 같은 JSON
+형식이라, 작업 프로세스가 부분 합을 만들어 보내고 부모 프로세스가 순서와
+상관없이 더할 수 있습니다 (중단된 실행의 부분 결과를 다시 읽어 이어 가기).
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .compact_analysis import analyze_compact
+
+# 통계에 쓰는 압축 분석 항목
+STAT_FIELDS = ('cadences', 'circle', 'scale_usage', 'tensions')
+
+# 종지가 없는 진행의 종지 히스토그램 키
+NO_CADENCE = 'none'
+
+# 통계 딕셔너리 (progression_statistics, HarmonyHistogram.to_dict)
+HarmonyStats = Dict[str, Any]
+
+
+def progression_statistics(prog: Sequence[str], tonic: str, mode: str = 'major') -> HarmonyStats:
+    """
+    코드 진행 하나의 화성 통계를 구합니다.
+
+    Args:
+        prog: 로마숫자 코드 진행 리스트
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        HarmonyStats: {'progressions', 'measures', 'transitions', 'cadences',
+        'circle', 'scale_degrees', 'tensions'} (HarmonyHistogram.add로 합침)
+    """
+    analysis = analyze_compact(prog, tonic, mode, STAT_FIELDS)
+    cadences = Counter(kind for _, kind in analysis['cadences']) or Counter({NO_CADENCE: 1})
+    circle = Counter(f"{prog[i]}-{prog[i + 1]}" for i in analysis['circle'])
+    return {
+        'progressions': 1,
+        'measures': len(prog),
+        'transitions': max(len(prog) - 1, 0),
+        'cadences': dict(cadences),
+        'circle': dict(circle),
+        'scale_degrees': analysis['scale_usage'],
+        'tensions': len(analysis['tensions']),
+    }
+
+
+class HarmonyHistogram:
+    """
+    화성 통계 합계
+
+    Attributes:
+        progressions: 진행 수
+        measures: 마디 수
+        transitions: 마디 사이 진행 수 (5도권 비율의 분모)
+        cadences: 종지 종류별 진행 수 ('authentic', 'plagal', 'none')
+        circle: 5도권 진행 쌍('ii-V')별 횟수
+        scale_degrees: 음계 도수별 코드 구성음 수 (0번 = 1도)
+        tensions: 텐션 코드 마디 수
+    """
+
+    def __init__(self):
+        self.progressions = 0
+        self.measures = 0
+        self.transitions = 0
+        self.cadences: Counter = Counter()
+        self.circle: Counter = Counter()
+        self.scale_degrees: List[int] = []
+        self.tensions = 0
+
+    def add(self, stats: HarmonyStats) -> None:
+        """
+        통계(진행 하나 또는 다른 합계의 to_dict)를 더합니다.
+
+        Args:
+            stats: 통계 딕셔너리
+        """
+        self.progressions += stats['progressions']
+        self.measures += stats['measures']
+        self.transitions += stats['transitions']
+        self.cadences.update(stats['cadences'])
+        self.circle.update(stats['circle'])
+        degrees = stats['scale_degrees']
+        if len(degrees) > len(self.scale_degrees):
+            self.scale_degrees.extend([0] * (len(degrees) - len(self.scale_degrees)))
+        for i, count in enumerate(degrees):
+            self.scale_degrees[i] += count
+        self.tensions += stats['tensions']
+
+    def to_dict(self) -> HarmonyStats:
+        """JSON으로 쓸 수 있는 통계 딕셔너리 (빈도 내림차순)"""
+        return {
+            'progressions': self.progressions,
+            'measures': self.measures,
+            'transitions': self.transitions,
+            'cadences': dict(self.cadences.most_common()),
+            'circle': dict(self.circle.most_common()),
+            'scale_degrees': list(self.scale_degrees),
+            'tensions': self.tensions,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        비교용 비율을 구합니다.
+
+        Returns:
+            Dict[str, Any]: {'cadences': 종지 종류별 진행 비율,
+            'circle_rate': 5도권 진행 비율, 'scale_degrees': 도수별 비율,
+            'tension_rate': 텐션 코드 마디 비율}
+        """
+        degree_total = sum(self.scale_degrees)
+        return {
+            'cadences': {kind: count / self.progressions for kind, count in self.cadences.most_common()}
+            if self.progressions else {},
+            'circle_rate': self.circle_total / self.transitions if self.transitions else 0.0,
+            'scale_degrees': [count / degree_total for count in self.scale_degrees]
+            if degree_total else [],
+            'tension_rate': self.tensions / self.measures if self.measures else 0.0,
+        }
+
+    @property
+    def circle_total(self) -> int:
+        """5도권 진행 횟수"""
+        return sum(self.circle.values())
+
+
+def batch_statistics(items: Iterable[Tuple[Sequence[str], str, str]]) -> Dict[str, HarmonyStats]:
+    """
+    여러 코드 진행의 통계를 조성 타입별로 합칩니다 (작업 프로세스 한 묶음 분량).
+
+    Args:
+        items: (로마숫자 코드 진행, 조성, 조성 타입) 목록
+
+    Returns:
+        Dict[str, HarmonyStats]: 조성 타입 -> 합친 통계
+    """
+    totals: Dict[str, HarmonyHistogram] = {}
+    for prog, tonic, mode in items:
+        totals.setdefault(mode, HarmonyHistogram()).add(progression_statistics(prog, tonic, mode))
+    return {mode: histogram.to_dict() for mode, histogram in totals.items()}
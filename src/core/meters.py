@@ -0,0 +1,272 @@
+"""
+박자 및 리듬 패턴 테이블 모듈
+
+이 모듈은 박자표별 리듬 패턴 테이블을 시작 시 한 번 컴파일하여
+요청마다 패턴 목록을 다시 만들지 않고 인덱스로 샘플링할 수 있게 합니다.
+"""
+
+import random
+from array import array
+from functools import lru_cache
+from itertools import product
+from math import prod
+from typing import Dict, List, Sequence, Tuple
+
+from .ticks import PPQ, measure_ticks, to_ticks
+
+# 시작 시 미리 컴파일하는 박자표
+SUPPORTED_TIME_SIGNATURES = ('2/4', '3/4', '4/4', '5/4', '6/8', '7/8', '9/8', '12/8')
+
+# 리듬 옵션 (generate_melody_part의 rhythm_option)
+RHYTHM_OPTIONS = ('random', 'whole', 'half', 'quarter', 'eighth')
+
+# 'random' 테이블의 최대 패턴 수
+MAX_RANDOM_PATTERNS = 64
+
+# 허용하는 박자표 분자/분모의 최댓값 (요청으로 들어오는 박자표의 크기 제한)
+MAX_NUMERATOR = 16
+MAX_DENOMINATOR = 16
+
+# 컴파일된 박자 캐시 크기 (기본 박자표 외에 요청으로 들어오는 박자표 포함)
+METER_CACHE_SIZE = 64
+
+# 기존 4/4, 3/4, 6/8 패턴 (사분음표 단위, 컴파일 시 틱으로 변환)
+_LEGACY_PATTERNS: Dict[str, Dict[str, List[List[float]]]] = {
+    '4/4': {
+        'random': [
+            [4.0], [2.0, 2.0], [1.0, 1.0, 1.0, 1.0], [2.0, 1.0, 1.0],
+            [1.0, 2.0, 1.0], [0.5]*8, [1.0, 0.5, 0.5, 2.0],
+            [0.5, 0.5, 1.0, 2.0], [2.0, 0.5, 0.5, 1.0], [1.0, 1.0, 0.5, 0.5, 1.0],
+        ],
+        'whole': [[4.0]], 'half': [[2.0, 2.0]],
+        'quarter': [[1.0, 1.0, 1.0, 1.0]], 'eighth': [[0.5]*8]
+    },
+    '3/4': {
+        'random': [
+            [3.0], [1.5, 1.5], [1.0, 2.0], [2.0, 1.0], [1.0, 1.0, 1.0],
+            [0.5, 0.5, 2.0], [2.0, 0.5, 0.5], [0.5, 1.0, 1.5],
+            [0.5, 0.5, 1.0, 1.0], [0.5]*6
+        ],
+        'whole': [[3.0]], 'half': [[1.5, 1.5]],
+        'quarter': [[1.0, 1.0, 1.0]], 'eighth': [[0.5]*6]
+    },
+    '6/8': {
+        'random': [
+            [3.0], [1.5, 1.5], [1.0, 2.0], [2.0, 1.0], [1.0, 1.0, 1.0],
+            [0.5, 0.5, 2.0], [2.0, 0.5, 0.5], [0.5, 1.0, 1.5],
+            [0.5, 0.5, 1.0, 1.0], [0.5]*6
+        ],
+        'whole': [[3.0]], 'half': [[1.5, 1.5]],
+        'quarter': [[1.0, 1.0, 1.0]], 'eighth': [[0.5]*6]
+    },
+}
+
+
+class RhythmTable:
+    """
+    한 리듬 옵션의 패턴 묶음
+
+    모든 패턴의 음길이(틱)를 하나의 배열에 이어 붙이고, 패턴 i는
+    durations[offsets[i]:offsets[i+1]] 구간에 저장됩니다.
+    """
+
+    __slots__ = ('durations', 'offsets')
+
+    def __init__(self, patterns: Sequence[Sequence[int]]):
+        self.durations = array('I')
+        self.offsets = array('H', [0])
+        for pattern in patterns:
+            self.durations.extend(pattern)
+            self.offsets.append(len(self.durations))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def pattern(self, index: int) -> Sequence[int]:
+        """index번째 패턴(틱)을 반환합니다."""
+        return self.durations[self.offsets[index]:self.offsets[index + 1]]
+
+    def sample(self, rng: random.Random = random) -> Sequence[int]:
+        """패턴 하나를 무작위로 선택합니다."""
+        return self.pattern(rng.randrange(len(self)))
+
+
+class MeterSpec:
+    """
+    컴파일된 박자 정보
+
+    Attributes:
+        time_sig: 박자표 문자열 (예: '7/8')
+        measure_ticks: 한 마디 길이 (틱)
+        measure_length: 한 마디 길이 (사분음표 단위, 악보 출력용)
+        beat_groups: 박 묶음 길이 목록 (틱, 예: 7/8 -> [480, 480, 720])
+        tables: 리듬 옵션별 RhythmTable
+    """
+
+    __slots__ = ('time_sig', 'measure_ticks', 'measure_length', 'beat_groups', 'tables')
+
+    def __init__(self, time_sig: str, measure_ticks: int,
+                 beat_groups: List[int], tables: Dict[str, RhythmTable]):
+        self.time_sig = time_sig
+        self.measure_ticks = measure_ticks
+        self.measure_length = measure_ticks / PPQ
+        self.beat_groups = beat_groups
+        self.tables = tables
+
+    def table(self, rhythm_option: str) -> RhythmTable:
+        """리듬 옵션의 테이블을 반환합니다 (알 수 없는 옵션은 'random')."""
+        return self.tables.get(rhythm_option, self.tables['random'])
+
+
+def parse_time_signature(time_sig: str) -> Tuple[int, int]:
+    """
+    박자표 문자열을 (분자, 분모)로 해석합니다.
+
+    Args:
+        time_sig: 박자표 (예: '4/4', '12/8')
+
+    Returns:
+        Tuple[int, int]: (분자, 분모)
+
+    Raises:
+        ValueError: 형식이 잘못되었거나, 분모가 2의 거듭제곱이 아니거나,
+            분자/분모가 MAX_NUMERATOR/MAX_DENOMINATOR보다 큰 경우
+    """
+    try:
+        num_text, den_text = time_sig.split('/')
+        numerator, denominator = int(num_text), int(den_text)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid time signature: {time_sig!r}")
+    if numerator <= 0 or denominator <= 0 or denominator & (denominator - 1):
+        raise ValueError(f"Invalid time signature: {time_sig!r}")
+    if numerator > MAX_NUMERATOR or denominator > MAX_DENOMINATOR:
+        raise ValueError(
+            f"Unsupported time signature: {time_sig!r} "
+            f"(at most {MAX_NUMERATOR} beats of 1/{MAX_DENOMINATOR} or longer)"
+        )
+    return numerator, denominator
+
+
+def _beat_groups(numerator: int, denominator: int) -> List[int]:
+    """박 묶음 길이(틱)를 계산합니다 (복합 박자는 3단위, 홀수 박자는 2+...+3)."""
+    unit = measure_ticks(1, denominator)
+    if denominator >= 8 and numerator % 3 == 0 and numerator > 3:
+        counts = [3] * (numerator // 3)
+    elif numerator <= 3:
+        counts = [numerator]
+    elif numerator % 2 == 0:
+        counts = [2] * (numerator // 2)
+    else:
+        counts = [2] * ((numerator - 3) // 2) + [3]
+    return [c * unit for c in counts]
+
+
+def _split(total: int, unit: int) -> List[int]:
+    """total을 unit 길이로 나누고 남는 부분을 마지막에 붙입니다."""
+    count, rest = divmod(total, unit)
+    return [unit] * count + ([rest] if rest else [])
+
+
+def _group_options(group: int) -> List[Tuple[int, ...]]:
+    """한 박 묶음을 채우는 세분 리듬 후보를 만듭니다."""
+    eighth = PPQ // 2
+    options = [(group,), tuple(_split(group, PPQ)), tuple(_split(group, eighth))]
+    if group >= PPQ + eighth:
+        options.append((eighth, eighth) + tuple(_split(group - PPQ, PPQ)))
+        options.append((group - eighth, eighth))
+    unique = []
+    for option in options:
+        if option not in unique:
+            unique.append(option)
+    return unique
+
+
+def _combination(options: List[List[Tuple[int, ...]]], index: int) -> List[int]:
+    """product(*options)의 index번째 조합을 만듭니다 (마지막 묶음이 가장 빠르게 바뀜)."""
+    parts = []
+    for group_options in reversed(options):
+        index, choice = divmod(index, len(group_options))
+        parts.append(group_options[choice])
+    return [d for part in reversed(parts) for d in part]
+
+
+def _generated_patterns(total: int, groups: List[int]) -> Dict[str, List[List[int]]]:
+    """
+    박 묶음으로부터 리듬 옵션별 패턴(틱)을 생성합니다.
+
+    조합 수가 MAX_RANDOM_PATTERNS보다 많으면 전체 조합을 만들지 않고
+    일정한 간격의 조합 번호만 골라 만듭니다.
+    """
+    options = [_group_options(g) for g in groups]
+    count = prod(len(group_options) for group_options in options)
+    if count > MAX_RANDOM_PATTERNS:
+        step = count / MAX_RANDOM_PATTERNS
+        combos = [_combination(options, int(i * step)) for i in range(MAX_RANDOM_PATTERNS)]
+    else:
+        combos = [list(sum(parts, ())) for parts in product(*options)]
+    return {
+        'random': combos,
+        'whole': [[total]],
+        'half': [list(groups)] if len(groups) > 1 else [_split(total, total // 2)],
+        'quarter': [[d for g in groups for d in _split(g, PPQ)]],
+        'eighth': [_split(total, PPQ // 2)],
+    }
+
+
+@lru_cache(maxsize=METER_CACHE_SIZE)
+def compile_meter(time_sig: str) -> MeterSpec:
+    """
+    박자표의 리듬 패턴 테이블을 컴파일합니다.
+
+    모든 패턴이 정확히 한 마디를 채우는지 컴파일 시점에 검사합니다.
+    결과는 크기가 제한된 캐시에 저장되므로 같은 박자표는 보통 한 번만
+    컴파일됩니다.
+
+    Args:
+        time_sig: 박자표 (예: '5/4')
+
+    Returns:
+        MeterSpec: 컴파일된 박자 정보
+
+    Raises:
+        ValueError: 박자표가 잘못되었거나 패턴이 마디를 채우지 못하는 경우
+    """
+    numerator, denominator = parse_time_signature(time_sig)
+    total = measure_ticks(numerator, denominator)
+    groups = _beat_groups(numerator, denominator)
+    if time_sig in _LEGACY_PATTERNS:
+        patterns = {
+            option: [[to_ticks(d) for d in pattern] for pattern in legacy]
+            for option, legacy in _LEGACY_PATTERNS[time_sig].items()
+        }
+    else:
+        patterns = _generated_patterns(total, groups)
+
+    tables = {}
+    for option in RHYTHM_OPTIONS:
+        for pattern in patterns[option]:
+            if sum(pattern) != total:
+                raise ValueError(
+                    f"Rhythm pattern {pattern} ({option}) does not fill a {time_sig} measure"
+                )
+        tables[option] = RhythmTable(patterns[option])
+
+    return MeterSpec(time_sig, total, groups, tables)
+
+
+def get_meter(time_sig: str) -> MeterSpec:
+    """
+    컴파일된 박자 정보를 반환합니다.
+
+    Args:
+        time_sig: 박자표
+
+    Returns:
+        MeterSpec: 박자 정보
+    """
+    return compile_meter(time_sig)
+
+
+# 시작 시 기본 박자표를 미리 컴파일 (패턴 오류는 import 시점에 드러남)
+for _time_sig in SUPPORTED_TIME_SIGNATURES:
+    compile_meter(_time_sig)
@@ -0,0 +1,300 @@
+"""
+코퍼스 학습 코드 진행 모델 모듈
+
+코드 진행 목록(예: 바흐 코랄에서 박 단위로 인식한 로마숫자)에서 조성
+타입별 첫 코드, 전이, 마지막 코드 빈도를 세고, 이를 로그 확률로 바꿔 작은
+이진 파일에 저장합니다. 파일은 mmap으로 열어 필요한 행만 읽으므로 여러
+워커 프로세스가 같은 페이지를 공유하고, 시작 시 파싱 비용이 없습니다.
+
+파일 형식 (리틀 엔디언):
+    헤더        '<4sHH'   매직 b'CGPM', 형식 버전, 조성 타입 수
+    조성 항목   '<8sHHII' 조성 타입 이름, 어휘 크기 n, 예약, 학습 곡 수, 데이터 오프셋
+    데이터      어휘 n × 8바이트 (UTF-8), float32 start[n], final[n], transition[n×n]
+"""
+
+import math
+import mmap
+import os
+import random
+import struct
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+MAGIC = b'CGPM'
+FORMAT_VERSION = 1
+
+# 모델 파일 기본 위치 (CHORDGEN_PROGRESSION_MODEL로 변경)
+DEFAULT_MODEL_PATH = str(Path(__file__).resolve().parents[2] / 'instance' / 'progression_model.bin')
+
+_HEADER = struct.Struct('<4sHH')
+_ENTRY = struct.Struct('<8sHHII')
+_NAME_BYTES = 8
+
+# 한 번도 나오지 않은 전이에 더하는 빈도 (가산 평활)
+SMOOTHING = 0.5
+
+
+class TransitionCounts:
+    """
+    조성 타입 하나의 코드 진행 빈도
+
+    Attributes:
+        starts: 첫 코드별 빈도
+        finals: 마지막 코드별 빈도
+        transitions: (앞 코드, 뒤 코드)별 빈도
+        pieces: 센 곡 수
+    """
+
+    def __init__(self):
+        self.starts: Counter = Counter()
+        self.finals: Counter = Counter()
+        self.transitions: Counter = Counter()
+        self.pieces = 0
+
+    def add(self, figures: Sequence[str]) -> None:
+        """
+        곡 하나의 코드 진행을 셉니다 (연속으로 같은 코드는 호출 전에 합쳐 둠).
+
+        Args:
+            figures: 로마숫자 코드 진행
+        """
+        if not figures:
+            return
+        self.starts[figures[0]] += 1
+        self.finals[figures[-1]] += 1
+        self.transitions.update(zip(figures, figures[1:]))
+        self.pieces += 1
+
+
+def count_progressions(pieces: Iterable[Tuple[str, Sequence[str]]]) -> Dict[str, TransitionCounts]:
+    """
+    (조성 타입, 코드 진행) 목록을 조성 타입별로 셉니다.
+
+    Args:
+        pieces: (조성 타입, 로마숫자 코드 진행) 목록
+
+    Returns:
+        Dict[str, TransitionCounts]: 조성 타입별 빈도
+    """
+    counts: Dict[str, TransitionCounts] = {}
+    for mode, figures in pieces:
+        counts.setdefault(mode, TransitionCounts()).add(figures)
+    return counts
+
+
+def _log_probabilities(values: Sequence[float]) -> List[float]:
+    total = sum(values)
+    return [math.log(v / total) for v in values]
+
+
+def write_model(path: str, counts: Dict[str, TransitionCounts],
+                vocabularies: Dict[str, Sequence[str]]) -> None:
+    """
+    빈도를 로그 확률로 바꿔 모델 파일에 씁니다 (임시 파일에 쓴 뒤 교체).
+
+    Args:
+        path: 모델 파일 경로
+        counts: 조성 타입별 빈도
+        vocabularies: 조성 타입별 코드 어휘 (파일의 행/열 순서)
+
+    Raises:
+        ValueError: 코드 이름이 8바이트를 넘는 경우
+    """
+    modes = sorted(counts)
+    offset = _HEADER.size + _ENTRY.size * len(modes)
+    entries, blocks = [], []
+    for mode in modes:
+        vocab = list(vocabularies[mode])
+        n = len(vocab)
+        mode_counts = counts[mode]
+        names = b''
+        for figure in vocab:
+            encoded = figure.encode('utf-8')
+            if len(encoded) > _NAME_BYTES:
+                raise ValueError(f"Chord figure too long for the model file: {figure!r}")
+            names += encoded.ljust(_NAME_BYTES, b'\0')
+        start = _log_probabilities([mode_counts.starts[f] + SMOOTHING for f in vocab])
+        final = _log_probabilities([mode_counts.finals[f] + SMOOTHING for f in vocab])
+        transition = []
+        for a in vocab:
+            transition.extend(_log_probabilities(
+                [mode_counts.transitions[(a, b)] + SMOOTHING for b in vocab]))
+        block = names + struct.pack(f'<{2 * n + n * n}f', *start, *final, *transition)
+        entries.append(_ENTRY.pack(mode.encode('ascii'), n, 0, mode_counts.pieces, offset))
+        blocks.append(block)
+        offset += len(block)  # 이름 블록이 8의 배수라 float32 정렬 유지
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(modes)))
+        f.write(b''.join(entries))
+        f.write(b''.join(blocks))
+    os.replace(tmp_path, path)
+
+
+class ModeTable:
+    """
+    조성 타입 하나의 전이 로그 확률 (mmap 위의 float32 배열을 그대로 참조)
+
+    Attributes:
+        vocab: 코드 어휘
+        start: 첫 코드 로그 확률
+        final: 마지막 코드 로그 확률
+        pieces: 학습 곡 수
+    """
+
+    def __init__(self, vocab: Tuple[str, ...], start: memoryview, final: memoryview,
+                 transition: memoryview, pieces: int):
+        self.vocab = vocab
+        self.start = start
+        self.final = final
+        self._transition = transition
+        self.pieces = pieces
+
+    def row(self, index: int) -> memoryview:
+        """코드 index 다음에 올 코드의 로그 확률"""
+        n = len(self.vocab)
+        return self._transition[index * n:(index + 1) * n]
+
+    def sample(self, length: int, rng: Optional[random.Random] = None) -> List[str]:
+        """
+        코드 진행을 뽑습니다 (마지막 코드는 곡 끝 확률을 곱해 종지로 유도).
+
+        Args:
+            length: 마디 수
+            rng: 난수 생성기
+
+        Returns:
+            List[str]: 로마숫자 코드 진행
+        """
+        rng = rng or random
+        indices = range(len(self.vocab))
+        progression, previous = [], None
+        for position in range(length):
+            weights = list(self.start if previous is None else self.row(previous))
+            if position == length - 1 and length > 1:
+                weights = [w + f for w, f in zip(weights, self.final)]
+            top = max(weights)
+            previous = rng.choices(indices, weights=[math.exp(w - top) for w in weights])[0]
+            progression.append(self.vocab[previous])
+        return progression
+
+
+class ProgressionModelFile:
+    """
+    mmap으로 연 모델 파일
+
+    Attributes:
+        path: 파일 경로
+        version: 형식 버전
+        tables: 조성 타입별 ModeTable
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 모델 파일 경로
+
+        Raises:
+            OSError: 파일을 열 수 없는 경우
+            ValueError: 형식이나 버전이 맞지 않거나 파일이 잘린 경우
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        try:
+            self.tables = self._read_tables(view)
+        except ValueError:
+            # 잘리거나 다른 형식인 파일: 매핑을 남기지 않음
+            view.release()
+            self._mmap.close()
+            raise
+
+    def _read_tables(self, view: memoryview) -> Dict[str, ModeTable]:
+        """
+        헤더와 조성 항목을 검사한 뒤 조성 타입별 전이 표를 만듭니다.
+
+        항목을 모두 검사한 다음에 mmap 위의 배열을 만들므로, 실패하면
+        매핑을 참조하는 객체가 남지 않습니다.
+
+        Raises:
+            ValueError: 형식이나 버전이 맞지 않거나 파일이 잘린 경우
+        """
+        if len(view) < _HEADER.size:
+            raise ValueError(f"Not a progression model file: {self.path}")
+        magic, self.version, mode_count = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a progression model file: {self.path}")
+        if self.version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported progression model version {self.version} "
+                             f"(expected {FORMAT_VERSION}), retrain the model")
+        if _HEADER.size + mode_count * _ENTRY.size > len(view):
+            raise ValueError(f"Truncated progression model file: {self.path}")
+
+        entries = []
+        for i in range(mode_count):
+            name, n, _, pieces, offset = _ENTRY.unpack_from(view, _HEADER.size + i * _ENTRY.size)
+            floats_at = offset + n * _NAME_BYTES
+            end = floats_at + (2 * n + n * n) * 4
+            if end > len(view):
+                raise ValueError(f"Truncated progression model file: {self.path}")
+            names = bytes(view[offset:floats_at])
+            vocab = tuple(names[j * _NAME_BYTES:(j + 1) * _NAME_BYTES].rstrip(b'\0').decode('utf-8')
+                          for j in range(n))
+            entries.append((name.rstrip(b'\0').decode('ascii'), vocab, pieces, floats_at, end))
+
+        tables: Dict[str, ModeTable] = {}
+        for name, vocab, pieces, floats_at, end in entries:
+            n = len(vocab)
+            floats = view[floats_at:end].cast('f')
+            tables[name] = ModeTable(vocab, floats[:n], floats[n:2 * n], floats[2 * n:], pieces)
+        return tables
+
+    def table(self, mode: str) -> ModeTable:
+        """
+        조성 타입의 전이 표를 반환합니다.
+
+        Raises:
+            ValueError: 모델에 해당 조성 타입이 없는 경우
+        """
+        table = self.tables.get('major' if mode == 'major' else 'minor')
+        if table is None:
+            raise ValueError(f"Progression model has no {mode} table")
+        return table
+
+
+_loaded: Dict[str, ProgressionModelFile] = {}
+_load_lock = threading.Lock()
+
+
+def corpus_model(path: Optional[str] = None) -> ProgressionModelFile:
+    """
+    모델 파일을 처음 쓸 때 열고 이후에는 같은 객체를 반환합니다.
+
+    Args:
+        path: 모델 파일 경로 (기본값은 CHORDGEN_PROGRESSION_MODEL 또는 DEFAULT_MODEL_PATH)
+
+    Returns:
+        ProgressionModelFile: 열린 모델
+
+    Raises:
+        ValueError: 모델 파일이 없거나 형식이 맞지 않는 경우
+    """
+    path = path or os.environ.get('CHORDGEN_PROGRESSION_MODEL') or DEFAULT_MODEL_PATH
+    model = _loaded.get(path)
+    if model is not None:
+        return model
+    with _load_lock:
+        model = _loaded.get(path)
+        if model is None:
+            try:
+                model = ProgressionModelFile(path)
+            except FileNotFoundError:
+                raise ValueError(f"Progression model not found: {path} "
+                                 f"(run tools/train_progressions.py)") from None
+            _loaded[path] = model
+    return model
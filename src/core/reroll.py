@@ -0,0 +1,175 @@
+"""
+부분 재생성 모듈
+
+이 모듈은 이미 만들어진 코드 진행의 일부 마디만 다시 뽑는 기능과, 바뀐
+마디 주변만 다시 계산하는 증분 화성 분석 상태를 제공합니다. 새 코드는
+harmonizer의 전이 모델(generate_progression 패턴에서 얻은 확률)로 앞뒤
+마디와 이어지도록 샘플링합니다.
+"""
+
+import math
+import random
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from .chord_generator import analyze_harmony
+from .harmonizer import progression_model
+
+# 기존과 같은 진행이 나오면 다시 뽑는 최대 횟수
+MAX_REROLL_ATTEMPTS = 8
+
+
+def _sample(weights: Sequence[float], rng) -> int:
+    """로그 가중치 목록에서 인덱스 하나를 뽑습니다."""
+    top = max(weights)
+    probabilities = [math.exp(w - top) for w in weights]
+    return rng.choices(range(len(weights)), weights=probabilities)[0]
+
+
+def reroll_progression(prog: Sequence[str], start: int, end: int, mode: str = 'major',
+                       rng: Optional[random.Random] = None) -> List[str]:
+    """
+    코드 진행의 [start, end) 구간을 새로 뽑습니다.
+
+    구간의 첫 코드는 앞 마디 코드에서의 전이 확률로, 마지막 코드는 뒤 마디
+    코드로의 전이 확률까지 곱해 뽑으며, 곡의 마지막 마디는 종지 화음으로
+    제한합니다. 작업량은 구간 길이에 비례합니다.
+
+    Args:
+        prog: 현재 로마숫자 코드 진행 리스트
+        start: 구간 시작 (0부터, 포함)
+        end: 구간 끝 (제외)
+        mode: 조성 타입
+        rng: 난수 생성기 (기본값은 random 모듈)
+
+    Returns:
+        List[str]: 구간의 새 코드 리스트 (길이 end - start)
+
+    Raises:
+        ValueError: 구간이 잘못된 경우
+    """
+    if not 0 <= start < end <= len(prog):
+        raise ValueError(f"Invalid measure range: {start + 1}-{end}")
+
+    model = progression_model(mode)
+    index = {figure: i for i, figure in enumerate(model.vocab)}
+    rng = rng or random
+    before = index.get(prog[start - 1]) if start > 0 else None
+    after = index.get(prog[end]) if end < len(prog) else None
+    old = list(prog[start:end])
+
+    for _ in range(MAX_REROLL_ATTEMPTS):
+        figures = []
+        previous = before
+        for position in range(start, end):
+            weights = list(model.start) if previous is None else list(model.transition[previous])
+            if position == end - 1:
+                if after is not None:
+                    weights = [w + model.transition[b][after] for b, w in enumerate(weights)]
+                elif len(prog) > 1:
+                    weights = [w if b in model.finals else float('-inf')
+                               for b, w in enumerate(weights)]
+            previous = _sample(weights, rng)
+            figures.append(model.vocab[previous])
+        if figures != old:
+            break
+    return figures
+
+
+@lru_cache(maxsize=4096)
+def _chord_analysis(figure: str, tonic: str, mode: str) -> Dict[str, Any]:
+    """코드 하나의 분석 결과 캐시 (음계 사용, 텐션)"""
+    return analyze_harmony([figure], tonic, mode)
+
+
+@lru_cache(maxsize=4096)
+def _pair_analysis(current: str, next_chord: str, tonic: str, mode: str) -> Dict[str, Any]:
+    """코드 쌍의 분석 결과 캐시 (5도권 진행, 음성진행)"""
+    return analyze_harmony([current, next_chord], tonic, mode)
+
+
+class HarmonyState:
+    """
+    증분 화성 분석 상태
+
+    코드별, 코드 쌍별 분석 조각을 보관하고, 코드가 바뀌면 바뀐 코드와
+    그 양옆 쌍만 다시 계산합니다. analysis()는 전체 진행을 analyze_harmony로
+    분석한 것과 같은 결과를 조각을 이어 붙여 만듭니다.
+    """
+
+    def __init__(self, prog: Sequence[str], tonic: str, mode: str = 'major'):
+        """
+        Args:
+            prog: 로마숫자 코드 진행 리스트
+            tonic: 조성
+            mode: 조성 타입
+        """
+        self.prog = list(prog)
+        self.tonic = tonic
+        self.mode = mode
+        self._chords = [_chord_analysis(c, tonic, mode) for c in self.prog]
+        self._pairs = [_pair_analysis(a, b, tonic, mode) for a, b in zip(self.prog, self.prog[1:])]
+
+    def copy(self) -> 'HarmonyState':
+        """
+        같은 진행의 독립된 상태를 만듭니다 (분석 조각은 바뀌지 않으므로 목록만 복사).
+
+        Returns:
+            HarmonyState: 복사본
+        """
+        state = HarmonyState.__new__(HarmonyState)
+        state.prog = list(self.prog)
+        state.tonic = self.tonic
+        state.mode = self.mode
+        state._chords = list(self._chords)
+        state._pairs = list(self._pairs)
+        return state
+
+    def replace(self, start: int, figures: Sequence[str]) -> None:
+        """
+        [start, start + len(figures)) 구간의 코드를 바꿉니다.
+
+        Args:
+            start: 구간 시작 (0부터)
+            figures: 새 코드 리스트
+        """
+        end = start + len(figures)
+        self.prog[start:end] = figures
+        self._chords[start:end] = [_chord_analysis(c, self.tonic, self.mode) for c in figures]
+        low, high = max(0, start - 1), min(len(self.prog) - 1, end)
+        self._pairs[low:high] = [
+            _pair_analysis(self.prog[i], self.prog[i + 1], self.tonic, self.mode)
+            for i in range(low, high)
+        ]
+
+    def analysis(self) -> Dict[str, Any]:
+        """
+        현재 진행의 분석 결과를 조각으로부터 만듭니다.
+
+        Returns:
+            Dict[str, Any]: 분석 결과 (analyze_harmony와 같은 형식)
+        """
+        prog = self.prog
+        tail = analyze_harmony(prog[-2:], self.tonic, self.mode)
+        offset = max(0, len(prog) - 2)
+        analysis = {
+            'key': tail['key'],
+            'cadences': tail['cadences'],
+            'harmonic_progressions': [],
+            'scale_usage': {},
+            'tensions': [],
+            'voice_leading': [],
+            'cadence_measures': [{**item, 'measure': item['measure'] + offset}
+                                 for item in tail['cadence_measures']],
+            'circle_measures': []
+        }
+        for i, pair in enumerate(self._pairs):
+            analysis['harmonic_progressions'].extend(pair['harmonic_progressions'])
+            analysis['circle_measures'].extend({**item, 'measure': item['measure'] + i}
+                                               for item in pair['circle_measures'])
+            analysis['voice_leading'].extend(pair['voice_leading'])
+        for part in self._chords:
+            analysis['tensions'].extend(part['tensions'])
+            for degree, count in part['scale_usage'].items():
+                analysis['scale_usage'][degree] = analysis['scale_usage'].get(degree, 0) + count
+        return analysis
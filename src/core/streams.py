@@ -0,0 +1,70 @@
+"""
+악보 스트림 일괄 구성 모듈
+
+음표와 마디를 append/insert로 하나씩 넣으면 호출마다 오프셋 계산, 사이트
+등록, 정렬 상태 갱신 같은 부가 작업이 따릅니다. music21 10에서는 이 비용이
+요소 수에 비례(선형)하므로 점근적인 차이는 없고, 이 모듈은 호출당 부가
+작업만 줄입니다. 틱 단위 이벤트 데이터로 오프셋을 미리 계산해 coreInsert로
+넣고 coreElementsChanged를 스트림마다 마지막에 한 번만 호출합니다.
+(benchmarks/stream_construction.py 기준 요소 단위 append보다 1.0~1.5배 빠름)
+"""
+
+from typing import Iterable, Sequence, Tuple
+
+from music21 import base, stream
+
+from .ticks import to_quarter_length
+
+
+def fill_measure(number: int, events: Iterable[Tuple[base.Music21Object, int]]) -> stream.Measure:
+    """
+    (음표/화음/쉼표, 틱 길이) 목록으로 마디를 한 번에 채웁니다.
+
+    Args:
+        number: 마디 번호
+        events: 순서대로 놓일 (요소, 틱 길이) 목록
+
+    Returns:
+        music21.stream.Measure: 채워진 마디
+    """
+    m = stream.Measure(number=number)
+    offset = 0
+    for element, ticks in events:
+        element.quarterLength = to_quarter_length(ticks)
+        m.coreInsert(to_quarter_length(offset), element, ignoreSort=True)
+        offset += ticks
+    m.coreElementsChanged()
+    return m
+
+
+def append_measures(part: stream.Stream, measures: Sequence[stream.Measure],
+                    measure_ticks: int) -> None:
+    """
+    길이가 같은 마디들을 파트 끝에 한 번에 붙입니다.
+
+    Args:
+        part: 마디를 붙일 파트 (머리 요소나 앞선 마디가 있어도 됨)
+        measures: 붙일 마디 목록
+        measure_ticks: 한 마디의 틱 수
+    """
+    if not measures:
+        return
+    start = part.highestTime
+    for i, m in enumerate(measures):
+        part.coreInsert(start + to_quarter_length(i * measure_ticks), m, ignoreSort=True)
+    part.coreElementsChanged()
+
+
+def insert_spanners(part: stream.Stream, spanners: Sequence[base.Music21Object]) -> None:
+    """
+    이음줄 같은 스패너들을 파트 맨 앞(오프셋 0)에 한 번에 넣습니다.
+
+    Args:
+        part: 스패너를 넣을 파트
+        spanners: 스패너 목록
+    """
+    if not spanners:
+        return
+    for sp in spanners:
+        part.coreInsert(0, sp, ignoreSort=True)
+    part.coreElementsChanged()
@@ -0,0 +1,231 @@
+"""
+SVG 미리보기 모듈
+
+생성된 이벤트 데이터(코드 진행, 마디별 멜로디, 화음 타임라인)에서 코드표와
+피아노 롤을 SVG 문자열로 바로 그립니다. 악보 엔진(music21, LilyPond) 없이
+문자열만 이어 붙이므로 빠르고, 결과가 작아 느린 기기에서도 바로 표시됩니다.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from .arrangement import ChordEvent
+from .chord_tables import pitch_to_midi
+from .form import Section
+from .meters import get_meter
+from .text_export import chord_name, chord_symbol
+
+# 미리보기 종류 (코드표, 피아노 롤)
+PREVIEW_KINDS = ('chart', 'roll')
+
+# 코드표 배치 (px)
+CHART_WIDTH = 720
+CHART_COLUMNS = 4
+CHART_HEADER = 52
+CHART_ROW = 56
+MARGIN = 16
+
+# 피아노 롤 배치 (px)
+ROLL_MEASURE = 48
+ROLL_KEY = 5
+ROLL_LABELS = 28
+
+_BLACK_KEYS = {1, 3, 6, 8, 10}
+_OCTAVE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+
+def _n(value: float) -> str:
+    """좌표를 짧게 적습니다 (소수 첫째 자리까지)."""
+    text = f"{value:.1f}"
+    return text[:-2] if text.endswith('.0') else text
+
+
+def _svg(width: float, height: float, body: List[str]) -> str:
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{_n(width)}" height="{_n(height)}" '
+            f'viewBox="0 0 {_n(width)} {_n(height)}" font-family="sans-serif">'
+            f'<rect width="100%" height="100%" fill="#fff"/>{"".join(body)}</svg>')
+
+
+def _box(x: float, y: float, width: float, height: float) -> str:
+    """사각형 하나를 path 명령으로 적습니다 (rect 요소보다 짧음)."""
+    return f"M{_n(x)} {_n(y)}h{_n(width)}v{_n(height)}h{_n(-width)}z"
+
+
+def _accidentals(name: str) -> str:
+    """음 이름의 변화표를 기호로 바꿉니다 (예: 'E-' -> 'E♭', 'f#' -> 'F♯')."""
+    return name[:1].upper() + name[1:].replace('#', '♯').replace('-', '♭').replace('b', '♭')
+
+
+def _display_name(figure: str, tonic: str, mode: str) -> str:
+    """코드 이름을 ♯/♭ 기호로 적습니다 (예: 'Bbmaj7' -> 'B♭maj7')."""
+    symbol = chord_symbol(figure, tonic, mode)
+    step, alter, _ = symbol
+    accidental = '♯' * alter if alter > 0 else '♭' * -alter
+    return step + accidental + chord_name(symbol)[1 + abs(alter):]
+
+
+def section_marks(sections: List[Section]) -> Dict[int, str]:
+    """
+    섹션이 시작하는 마디 위치와 섹션 이름을 구합니다 (코드표 리허설 마크).
+
+    Args:
+        sections: plan_form이 만든 (섹션 이름, 코드 진행) 목록
+
+    Returns:
+        Dict[int, str]: 마디 위치 (0부터) -> 섹션 이름 (섹션이 하나면 비어 있음)
+    """
+    if len(sections) < 2:
+        return {}
+    marks, position = {}, 0
+    for label, prog in sections:
+        marks[position] = label
+        position += len(prog)
+    return marks
+
+
+def chord_chart_svg(progression: Sequence[str], tonic: str, mode: str = 'major',
+                    time_sig: str = '4/4', title: str = '',
+                    marks: Optional[Dict[int, str]] = None) -> str:
+    """
+    코드 진행을 한 줄에 네 마디씩 적은 리드시트 코드표를 그립니다.
+
+    Args:
+        progression: 로마숫자 코드 진행 (마디당 하나)
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        title: 곡 제목
+        marks: 마디 위치 -> 섹션 이름 (section_marks)
+
+    Returns:
+        str: SVG 문서
+    """
+    marks = marks or {}
+    cell = (CHART_WIDTH - 2 * MARGIN) / CHART_COLUMNS
+    rows = max(1, -(-len(progression) // CHART_COLUMNS))
+    height = CHART_HEADER + rows * CHART_ROW + MARGIN
+
+    body = [
+        f'<text x="{MARGIN}" y="24" font-size="18" font-weight="bold">{escape(title)}</text>',
+        f'<text x="{MARGIN}" y="42" font-size="12" fill="#666">'
+        f'{escape(_accidentals(tonic))} {escape(mode)} · {escape(time_sig)}</text>',
+    ]
+    bars, names, numerals, labels = [], [], [], []
+    for i, figure in enumerate(progression):
+        row, column = divmod(i, CHART_COLUMNS)
+        x = MARGIN + column * cell
+        y = CHART_HEADER + row * CHART_ROW
+        bars.append(f"M{_n(x)} {_n(y + 6)}v{CHART_ROW - 12}")
+        names.append(f'<text x="{_n(x + 8)}" y="{_n(y + 28)}">{escape(_display_name(figure, tonic, mode))}</text>')
+        numerals.append(f'<text x="{_n(x + 8)}" y="{_n(y + 44)}">{escape(figure)}</text>')
+        if i in marks:
+            labels.append(f'<text x="{_n(x + cell - 6)}" y="{_n(y + 18)}">{escape(marks[i])}</text>')
+        if column == CHART_COLUMNS - 1 or i == len(progression) - 1:
+            bars.append(f"M{_n(x + cell)} {_n(y + 6)}v{CHART_ROW - 12}")
+
+    body.append(f'<path d="{"".join(bars)}" stroke="#333" stroke-width="1.5"/>')
+    if progression:
+        # 마침 세로줄 (가는 줄 + 굵은 줄)
+        row, column = divmod(len(progression) - 1, CHART_COLUMNS)
+        x = MARGIN + (column + 1) * cell
+        y = CHART_HEADER + row * CHART_ROW
+        body.append(f'<path d="{_box(x - 4, y + 6, 4, CHART_ROW - 12)}" fill="#333"/>')
+    body.append(f'<g font-size="18" font-weight="bold">{"".join(names)}</g>')
+    body.append(f'<g font-size="11" fill="#777">{"".join(numerals)}</g>')
+    if labels:
+        body.append(f'<g font-size="12" font-weight="bold" fill="#b0413e" '
+                    f'text-anchor="end">{"".join(labels)}</g>')
+    return _svg(CHART_WIDTH, height, body)
+
+
+def piano_roll_svg(melody: Sequence[Sequence[Tuple[str, int]]],
+                   timeline: Sequence[ChordEvent], time_sig: str = '4/4') -> str:
+    """
+    멜로디와 코드 보이싱을 피아노 롤로 그립니다 (가로: 시간, 세로: 음높이).
+
+    Args:
+        melody: 마디별 (음 이름, 틱 길이) 목록 (멜로디가 없으면 빈 목록)
+        timeline: 마디별 화음 (코드 파트가 없으면 빈 목록)
+        time_sig: 박자
+
+    Returns:
+        str: SVG 문서
+    """
+    measure_ticks = get_meter(time_sig).measure_ticks
+    scale = ROLL_MEASURE / measure_ticks
+    measures = max(len(melody), len(timeline), 1)
+
+    notes: List[Tuple[int, int, int]] = []  # (MIDI, 시작 틱, 길이)
+    for i, measure in enumerate(melody):
+        position = i * measure_ticks
+        for name, ticks in measure:
+            midi = pitch_to_midi(name)
+            if midi is not None:
+                notes.append((midi, position, ticks))
+            position += ticks
+    pitches = [midi for midi, _, _ in notes] + [m for event in timeline for m in event.midi]
+    low, high = (min(pitches) - 1, max(pitches) + 1) if pitches else (59, 73)
+
+    top = MARGIN / 2
+    width = ROLL_LABELS + measures * ROLL_MEASURE + MARGIN / 2
+    height = top * 2 + (high - low + 1) * ROLL_KEY
+    right = measures * ROLL_MEASURE
+
+    def y(midi: int) -> float:
+        return top + (high - midi) * ROLL_KEY
+
+    stripes = ''.join(_box(ROLL_LABELS, y(m), right, ROLL_KEY)
+                      for m in range(low, high + 1) if m % 12 in _BLACK_KEYS)
+    labels = ''.join(
+        f'<text x="{ROLL_LABELS - 3}" y="{_n(y(m) + ROLL_KEY)}">{_OCTAVE_NAMES[m % 12]}{m // 12 - 1}</text>'
+        for m in range(low, high + 1) if m % 12 == 0
+    )
+    bottom = _n(height - top)
+    measure_lines = ''.join(f"M{_n(ROLL_LABELS + i * ROLL_MEASURE)} {_n(top)}V{bottom}"
+                            for i in range(measures + 1) if i % 4)
+    phrase_lines = ''.join(f"M{_n(ROLL_LABELS + i * ROLL_MEASURE)} {_n(top)}V{bottom}"
+                           for i in range(0, measures + 1, 4))
+    chords = ''.join(
+        _box(ROLL_LABELS + i * ROLL_MEASURE, y(m), event.ticks * scale - 1, ROLL_KEY)
+        for i, event in enumerate(timeline) for m in event.midi
+    )
+    melody_path = ''.join(
+        _box(ROLL_LABELS + start * scale, y(midi), max(ticks * scale - 1, 1), ROLL_KEY)
+        for midi, start, ticks in notes
+    )
+
+    body = [
+        f'<path d="{stripes}" fill="#f1f1f4"/>' if stripes else '',
+        f'<path d="{measure_lines}" stroke="#ddd"/>' if measure_lines else '',
+        f'<path d="{phrase_lines}" stroke="#999"/>',
+        f'<path d="{chords}" fill="#4a7bd0" fill-opacity=".35"/>' if chords else '',
+        f'<path d="{melody_path}" fill="#e8703a"/>' if melody_path else '',
+        f'<g font-size="8" fill="#666" text-anchor="end">{labels}</g>' if labels else '',
+    ]
+    return _svg(width, height, body)
+
+
+def render_previews(progression: Sequence[str], melody: Sequence[Sequence[Tuple[str, int]]],
+                    timeline: Sequence[ChordEvent], tonic: str, mode: str = 'major',
+                    time_sig: str = '4/4', title: str = '',
+                    marks: Optional[Dict[int, str]] = None) -> Dict[str, str]:
+    """
+    코드표와 피아노 롤을 함께 그립니다.
+
+    Args:
+        progression: 로마숫자 코드 진행
+        melody: 마디별 멜로디 이벤트
+        timeline: 마디별 화음
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        title: 곡 제목
+        marks: 마디 위치 -> 섹션 이름
+
+    Returns:
+        Dict[str, str]: 미리보기 종류 -> SVG 문서 (그릴 음이 없으면 피아노 롤 제외)
+    """
+    previews = {'chart': chord_chart_svg(progression, tonic, mode, time_sig, title, marks)}
+    if melody or timeline:
+        previews['roll'] = piano_roll_svg(melody, timeline, time_sig)
+    return previews
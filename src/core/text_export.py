@@ -0,0 +1,451 @@
+"""
+텍스트 악보 내보내기 모듈
+
+render_form_events가 만든 이벤트 데이터(섹션별 멜로디, 화음 타임라인)를
+music21 스트림 없이 ABC 표기법이나 LilyPond 소스로 바로 씁니다. 조표,
+박자, 붙임줄, 이음줄, 도돌이표와 코드 이름을 MusicXML 경로와 같은 규칙
+(connect_melody, _assemble)으로 표기하며, 결과는 MusicXML보다 훨씬 작습니다.
+반주 파트(베이스, 분산화음, 패드)는 MusicXML에만 들어갑니다.
+"""
+
+import re
+from fractions import Fraction
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .arrangement import ChordEvent, spell
+from .chord_tables import chord_entry, key_table, voiced_figure
+from .form import Section, section_runs
+from .meters import get_meter
+from .ticks import PPQ
+
+# 지원하는 텍스트 형식
+TEXT_FORMATS = ('abc', 'ly')
+
+# 한 줄에 적는 마디 수
+MEASURES_PER_LINE = 4
+
+# 한 음표로 적을 수 있는 길이 (틱, 긴 것부터): ABC 길이 배수 (L:1/8), LilyPond 길이
+_DURATIONS: Tuple[Tuple[int, str, str], ...] = (
+    (PPQ * 6, '12', '1.'),
+    (PPQ * 4, '8', '1'),
+    (PPQ * 3, '6', '2.'),
+    (PPQ * 2, '4', '2'),
+    (PPQ * 3 // 2, '3', '4.'),
+    (PPQ, '2', '4'),
+    (PPQ * 3 // 4, '3/2', '8.'),
+    (PPQ // 2, '', '8'),
+    (PPQ * 3 // 8, '3/4', '16.'),
+    (PPQ // 4, '/2', '16'),
+    (PPQ // 8, '/4', '32'),
+)
+
+# 근음 기준 음정 집합 -> (ABC 코드 이름 접미사, LilyPond chordmode 접미사)
+_QUALITIES: Dict[Tuple[int, ...], Tuple[str, str]] = {
+    (0, 4, 7): ('', ''),
+    (0, 3, 7): ('m', 'm'),
+    (0, 3, 6): ('dim', 'dim'),
+    (0, 4, 8): ('+', 'aug'),
+    (0, 2, 7): ('sus2', 'sus2'),
+    (0, 5, 7): ('sus4', 'sus4'),
+    (0, 4, 7, 10): ('7', '7'),
+    (0, 4, 7, 11): ('maj7', 'maj7'),
+    (0, 3, 7, 10): ('m7', 'm7'),
+    (0, 3, 6, 10): ('m7b5', 'm7.5-'),
+    (0, 3, 6, 9): ('dim7', 'dim7'),
+    (0, 2, 4, 7, 10): ('9', '9'),
+}
+
+_NAME_RE = re.compile(r'^([A-Ga-g])([#\-b]*)(-?\d+)?$')
+
+# (근음 음이름, 근음 변화표 수, 근음 기준 음정 집합)
+ChordSymbol = Tuple[str, int, Tuple[int, ...]]
+
+
+class _Note(NamedTuple):
+    """적을 음표 하나 (화음이면 여러 음)"""
+    pitches: Tuple[str, ...]
+    ticks: int
+    tie: bool = False
+    slur_start: bool = False
+    slur_end: bool = False
+
+
+class _Measure(NamedTuple):
+    """적을 마디 하나"""
+    notes: List[_Note]
+    chord: Optional[ChordSymbol]
+    repeat_start: bool
+    repeat_times: int  # 도돌이표 끝이면 반복 횟수, 아니면 0
+
+
+def _parse(name: str) -> Tuple[str, int, int]:
+    """'B-4' -> ('B', -1, 4)"""
+    match = _NAME_RE.match(name)
+    if not match:
+        raise ValueError(f"Invalid pitch name: {name!r}")
+    step, accidentals, octave = match.groups()
+    alter = accidentals.count('#') - accidentals.count('-') - accidentals.count('b')
+    return step.upper(), alter, int(octave) if octave else 4
+
+
+def split_ticks(ticks: int) -> List[int]:
+    """
+    길이를 한 음표로 적을 수 있는 길이들로 나눕니다 (붙임줄로 연결할 조각).
+
+    Args:
+        ticks: 길이 (틱)
+
+    Returns:
+        List[int]: 조각 길이 목록 (긴 것부터, 나머지가 있으면 마지막 조각)
+    """
+    pieces = []
+    for value, _, _ in _DURATIONS:
+        while ticks >= value:
+            pieces.append(value)
+            ticks -= value
+    if ticks:
+        pieces.append(ticks)  # 셋잇단 등: 배수 표기로 적음
+    return pieces
+
+
+def chord_symbol(figure: str, tonic: str, mode: str = 'major') -> ChordSymbol:
+    """
+    로마숫자 코드의 근음 이름과 근음 기준 음정 집합을 구합니다.
+
+    Args:
+        figure: 로마숫자 코드
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        ChordSymbol: (근음 음이름, 근음 변화표 수, 음정 집합)
+    """
+    entry = chord_entry(voiced_figure(figure), tonic, mode)
+    intervals = tuple(sorted({(pc - entry.root) % 12 for pc in range(12) if entry.mask >> pc & 1}))
+    step, alter, _ = _parse(f"{entry.root_name}4")
+    return step, alter, intervals
+
+
+def _key_signature(tonic: str, mode: str) -> Dict[str, int]:
+    """조표의 음이름별 변화표 수 (자연단음계 = 조표)"""
+    signature = {}
+    for name in key_table(tonic, mode).scale_names[:7]:
+        step, alter, _ = _parse(name)
+        signature[step] = alter
+    return signature
+
+
+def _layout(sections: List[Section], use_repeats: bool, by_label: Dict[str, list],
+            chords: Dict[str, List[ChordSymbol]]) -> List[Tuple[object, Optional[ChordSymbol], bool, int]]:
+    """섹션 순서대로 (마디 데이터, 코드 이름, 도돌이 시작, 반복 횟수) 목록을 만듭니다."""
+    measures = []
+    for label, times in section_runs(sections, use_repeats):
+        section = by_label[label]
+        names = chords.get(label, [])
+        for i, data in enumerate(section):
+            measures.append((data, names[i] if i < len(names) else None,
+                             times > 1 and i == 0,
+                             times if times > 1 and i == len(section) - 1 else 0))
+    return measures
+
+
+def _melody_measures(layout, use_slurs: bool, use_ties: bool) -> List[_Measure]:
+    """멜로디 마디 목록 (이음줄/붙임줄은 connect_melody와 같은 규칙)."""
+    flat = [name for data, _, _, _ in layout for name, _ in data]
+    slur_start = set()
+    slur_end = set()
+    if use_slurs:
+        for i in range(0, len(flat) - 3, 4):
+            slur_start.add(i)
+            slur_end.add(i + 3)
+
+    measures = []
+    index = 0
+    for data, chord, repeat_start, repeat_times in layout:
+        notes = []
+        for name, ticks in data:
+            tied = use_ties and index + 1 < len(flat) and flat[index + 1] == name
+            notes.append(_Note((name,), ticks, tied, index in slur_start, index in slur_end))
+            index += 1
+        measures.append(_Measure(notes, chord, repeat_start, repeat_times))
+    return measures
+
+
+def _chord_measures(layout) -> List[_Measure]:
+    """블록 코드 마디 목록 (마디마다 보이싱된 화음 하나)."""
+    return [
+        _Measure([_Note(tuple(spell(n, m) for n, m in zip(e.names, e.midi)), e.ticks)],
+                 chord, repeat_start, repeat_times)
+        for e, chord, repeat_start, repeat_times in layout
+    ]
+
+
+def _voices(sections, melody, timelines, tonic, mode, use_slurs, use_ties, use_repeats):
+    """(파트 이름, 높은음자리표 여부, 마디 목록) 목록과 섹션별 코드 (근음, 변화표, 음정) 목록."""
+    unique: Dict[str, List[str]] = {}
+    for label, prog in sections:
+        unique.setdefault(label, prog)
+    symbols = {label: [chord_symbol(figure, tonic, mode) for figure in prog]
+               for label, prog in unique.items()}
+
+    voices = []
+    if melody:
+        # 코드 이름은 멜로디 위에 (멜로디가 없으면 코드 파트 위에) 적음
+        layout = _layout(sections, use_repeats, melody, symbols)
+        voices.append(('Melody', True, _melody_measures(layout, use_slurs, use_ties)))
+    if timelines:
+        layout = _layout(sections, use_repeats, timelines, {} if melody else symbols)
+        voices.append(('Chords', False, _chord_measures(layout)))
+    return voices, symbols
+
+
+# ABC
+
+def _abc_pitch(name: str, signature: Dict[str, int], bar_alters: Dict[str, int]) -> str:
+    step, alter, octave = _parse(name)
+    # 조표와 다르거나 같은 마디에서 바뀐 음만 임시표를 적음
+    accidental = ''
+    if alter != bar_alters.get(step, signature.get(step, 0)) or step in bar_alters:
+        accidental = '^' * alter if alter > 0 else '_' * -alter if alter < 0 else '='
+    if accidental:
+        bar_alters[step] = alter
+    if octave >= 5:
+        return accidental + step.lower() + "'" * (octave - 5)
+    return accidental + step + ',' * (4 - octave)
+
+
+def _abc_length(ticks: int) -> str:
+    for value, length, _ in _DURATIONS:
+        if value == ticks:
+            return length
+    fraction = Fraction(ticks, PPQ // 2)
+    return f"{fraction.numerator}/{fraction.denominator}"
+
+
+def chord_name(symbol: ChordSymbol) -> str:
+    """
+    코드 이름을 문자열로 적습니다 (ABC 코드 기호, 미리보기 코드표).
+
+    Args:
+        symbol: chord_symbol의 결과
+
+    Returns:
+        str: 코드 이름 (예: 'F#m7', 'Bbmaj7')
+    """
+    step, alter, intervals = symbol
+    accidental = '#' * alter if alter > 0 else 'b' * -alter
+    return f"{step}{accidental}{_QUALITIES.get(intervals, ('', ''))[0]}"
+
+
+def _abc_measure(measure: _Measure, signature: Dict[str, int]) -> str:
+    bar_alters: Dict[str, int] = {}
+    tokens = []
+    for i, n in enumerate(measure.notes):
+        pieces = split_ticks(n.ticks)
+        for j, ticks in enumerate(pieces):
+            pitches = [_abc_pitch(p, signature, bar_alters) for p in n.pitches]
+            body = pitches[0] if len(pitches) == 1 else f"[{''.join(pitches)}]"
+            token = body + _abc_length(ticks)
+            if j < len(pieces) - 1 or n.tie:
+                token += '-'
+            if j == 0 and n.slur_start:
+                token = '(' + token
+            if j == len(pieces) - 1 and n.slur_end:
+                token += ')'
+            if i == 0 and j == 0:
+                if measure.chord is not None:
+                    token = f'"{chord_name(measure.chord)}"' + token
+                if measure.repeat_times > 2:
+                    token = f'"^x{measure.repeat_times}"' + token
+            tokens.append(token)
+    return ' '.join(tokens)
+
+
+def _abc_voice(measures: List[_Measure], signature: Dict[str, int], start: int, end: int) -> str:
+    """start~end 마디를 마디줄과 도돌이표를 포함해 한 줄로 적습니다."""
+    line = '|: ' if measures[start].repeat_start else ''
+    for i in range(start, end):
+        m = measures[i]
+        line += _abc_measure(m, signature)
+        following = measures[i + 1] if i + 1 < len(measures) else None
+        if m.repeat_times:
+            bar_line = '::' if following is not None and following.repeat_start else ':|'
+        elif following is None:
+            bar_line = '|]'
+        elif following.repeat_start:
+            bar_line = '|:'
+        else:
+            bar_line = '|'
+        if bar_line in ('::', '|:') and i == end - 1:
+            # 줄 끝에서 시작하는 도돌이표는 다음 줄 머리에 적음
+            bar_line = ':|' if bar_line == '::' else '|'
+        line += f" {bar_line} "
+    return line.rstrip()
+
+
+def form_to_abc(sections: List[Section], melody: Dict[str, List[List[Tuple[str, int]]]],
+                timelines: Dict[str, List[ChordEvent]], tonic: str, mode: str = 'major',
+                time_sig: str = '4/4', title: str = '', use_slurs: bool = False,
+                use_ties: bool = False, use_repeats: bool = False) -> str:
+    """
+    이벤트 데이터를 ABC 표기법(2.1)으로 씁니다.
+
+    Args:
+        sections: plan_form이 만든 (섹션 이름, 코드 진행) 목록
+        melody: render_form_events의 섹션별 멜로디 (없으면 빈 dict)
+        timelines: render_form_events의 섹션별 화음 타임라인 (없으면 빈 dict)
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        title: 곡 제목
+        use_slurs: 이음줄 사용 여부
+        use_ties: 붙임줄 사용 여부
+        use_repeats: 연속 반복 섹션을 도돌이표로 적을지 여부
+
+    Returns:
+        str: ABC 문서
+    """
+    get_meter(time_sig)  # 지원하지 않는 박자는 여기서 오류
+    voices, _ = _voices(sections, melody, timelines, tonic, mode, use_slurs, use_ties, use_repeats)
+    signature = _key_signature(tonic, mode)
+    step, alter, _ = _parse(key_table(tonic, mode).scale_names[0])
+    key_name = step + ('#' * alter if alter > 0 else 'b' * -alter) + ('m' if mode == 'minor' else '')
+
+    lines = ['X:1', f"T:{title}", f"M:{time_sig}", 'L:1/8', f"K:{key_name}"]
+    for number, (name, treble, measures) in enumerate(voices, 1):
+        lines.append(f'V:{number} clef={"treble" if treble else "bass"} name="{name}"')
+        for start in range(0, len(measures), MEASURES_PER_LINE):
+            end = min(start + MEASURES_PER_LINE, len(measures))
+            lines.append(_abc_voice(measures, signature, start, end))
+    return '\n'.join(lines) + '\n'
+
+
+# LilyPond
+
+def _ly_name(step: str, alter: int) -> str:
+    return step.lower() + ('is' * alter if alter > 0 else 'es' * -alter)
+
+
+def _ly_pitch(name: str) -> str:
+    step, alter, octave = _parse(name)
+    marks = octave - 3
+    return _ly_name(step, alter) + ("'" * marks if marks > 0 else ',' * -marks)
+
+
+def _ly_length(ticks: int) -> str:
+    for value, _, length in _DURATIONS:
+        if value == ticks:
+            return length
+    fraction = Fraction(ticks, PPQ)
+    return f"4*{fraction.numerator}/{fraction.denominator}"
+
+
+def _ly_measure(measure: _Measure) -> str:
+    tokens = []
+    for n in measure.notes:
+        pieces = split_ticks(n.ticks)
+        pitches = [_ly_pitch(p) for p in n.pitches]
+        body = pitches[0] if len(pitches) == 1 else f"<{' '.join(pitches)}>"
+        for j, ticks in enumerate(pieces):
+            token = body + _ly_length(ticks)
+            if j < len(pieces) - 1 or n.tie:
+                token += '~'
+            if j == 0 and n.slur_start:
+                token += '('
+            if j == len(pieces) - 1 and n.slur_end:
+                token += ')'
+            tokens.append(token)
+    return ' '.join(tokens)
+
+
+def _ly_music(measures: Sequence, write) -> List[str]:
+    """마디마다 한 줄, 반복 구간은 \\repeat volta로 감쌉니다."""
+    lines = []
+    indent = ''
+    for i, m in enumerate(measures):
+        if m.repeat_start:
+            end = next(j for j in range(i, len(measures)) if measures[j].repeat_times)
+            lines.append(f"\\repeat volta {measures[end].repeat_times} {{")
+            indent = '  '
+        lines.append(f"{indent}{write(m)} |")
+        if m.repeat_times:
+            lines.append('}')
+            indent = ''
+    return lines
+
+
+def form_to_lilypond(sections: List[Section], melody: Dict[str, List[List[Tuple[str, int]]]],
+                     timelines: Dict[str, List[ChordEvent]], tonic: str, mode: str = 'major',
+                     time_sig: str = '4/4', title: str = '', use_slurs: bool = False,
+                     use_ties: bool = False, use_repeats: bool = False) -> str:
+    """
+    이벤트 데이터를 LilyPond 소스(2.24)로 씁니다.
+
+    Args:
+        sections: plan_form이 만든 (섹션 이름, 코드 진행) 목록
+        melody: render_form_events의 섹션별 멜로디 (없으면 빈 dict)
+        timelines: render_form_events의 섹션별 화음 타임라인 (없으면 빈 dict)
+        tonic: 조성
+        mode: 조성 타입
+        time_sig: 박자
+        title: 곡 제목
+        use_slurs: 이음줄 사용 여부
+        use_ties: 붙임줄 사용 여부
+        use_repeats: 연속 반복 섹션을 도돌이표로 적을지 여부
+
+    Returns:
+        str: LilyPond 문서
+    """
+    measure_ticks = get_meter(time_sig).measure_ticks
+    voices, symbols = _voices(sections, melody, timelines, tonic, mode,
+                              use_slurs, use_ties, use_repeats)
+    step, alter, _ = _parse(key_table(tonic, mode).scale_names[0])
+    key_line = f"\\key {_ly_name(step, alter)} \\{mode if mode == 'minor' else 'major'}"
+
+    # 코드 이름 (마디 전체 길이, 4/4가 아니면 온음표 배수)
+    measure_length = Fraction(measure_ticks, PPQ * 4)
+    chord_length = '1' if measure_length == 1 else f"1*{measure_length.numerator}/{measure_length.denominator}"
+    layout = _layout(sections, use_repeats, symbols, symbols)
+    chord_measures = [_Measure([], symbol, start, times) for _, symbol, start, times in layout]
+
+    def chord_name(m: _Measure) -> str:
+        root, root_alter, intervals = m.chord
+        suffix = _QUALITIES.get(intervals, ('', ''))[1]
+        return _ly_name(root, root_alter) + chord_length + (f":{suffix}" if suffix else '')
+
+    final = '' if chord_measures and chord_measures[-1].repeat_times else '\\bar "|."'
+    out = ['\\version "2.24.0"', '', f'\\header {{ title = "{title}" tagline = ##f }}', '']
+    out.append('harmonies = \\chordmode {')
+    out += ['  ' + line for line in _ly_music(chord_measures, chord_name)]
+    out.append('}')
+    for name, treble, measures in voices:
+        out += ['', f"{name.lower()}Part = {{",
+                f"  \\clef {'treble' if treble else 'bass'} {key_line} \\time {time_sig}"]
+        out += ['  ' + line for line in _ly_music(measures, _ly_measure)]
+        if final:
+            out.append(f"  {final}")
+        out.append('}')
+
+    out += ['', '\\score {', '  <<', '    \\new ChordNames \\harmonies']
+    for name, _, _ in voices:
+        out.append(f'    \\new Staff \\with {{ instrumentName = "{name}" }} \\{name.lower()}Part')
+    out += ['  >>', '  \\layout { }', '}']
+    return '\n'.join(out) + '\n'
+
+
+def render_text(fmt: str, *args, **kwargs) -> str:
+    """
+    형식 이름으로 form_to_abc 또는 form_to_lilypond를 호출합니다.
+
+    Args:
+        fmt: 'abc' 또는 'ly'
+        *args, **kwargs: form_to_abc/form_to_lilypond 인자
+
+    Returns:
+        str: 텍스트 악보
+    """
+    if fmt == 'abc':
+        return form_to_abc(*args, **kwargs)
+    if fmt == 'ly':
+        return form_to_lilypond(*args, **kwargs)
+    raise ValueError(f"Unsupported text format: {fmt}")
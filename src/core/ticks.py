@@ -0,0 +1,91 @@
+"""
+정수 틱 음길이 모듈
+
+이 모듈은 음길이를 사분음표당 PPQ 틱의 정수로 다루고, 악보로 내보낼 때만
+정확한 music21 quarterLength로 변환하는 기능을 제공합니다.
+"""
+
+from fractions import Fraction
+from functools import lru_cache
+from typing import List, Sequence, Union
+
+from music21 import common
+
+# 사분음표당 틱 수 (2, 3, 5로 나누어 떨어져 셋잇단/16분/32분음표를 정확히 표현)
+PPQ = 480
+
+
+def to_ticks(quarter_length: Union[int, float, Fraction]) -> int:
+    """
+    사분음표 단위 길이를 틱으로 변환합니다.
+
+    Args:
+        quarter_length: 사분음표 단위 길이 (예: 1.5, Fraction(2, 3))
+
+    Returns:
+        int: 틱 수
+
+    Raises:
+        ValueError: 틱으로 정확히 나타낼 수 없는 길이인 경우
+    """
+    ticks = Fraction(quarter_length) * PPQ
+    if ticks.denominator != 1:
+        raise ValueError(f"Duration {quarter_length!r} is not a whole number of ticks (PPQ={PPQ})")
+    return int(ticks)
+
+
+@lru_cache(maxsize=4096)
+def to_quarter_length(ticks: int) -> Union[float, Fraction]:
+    """
+    틱을 music21 quarterLength로 정확히 변환합니다.
+
+    음길이와 마디 오프셋의 종류는 적으므로 결과를 캐시합니다.
+
+    Args:
+        ticks: 틱 수
+
+    Returns:
+        Union[float, Fraction]: 2의 거듭제곱 분모는 float, 그 외(셋잇단 등)는 Fraction
+    """
+    return common.opFrac(Fraction(ticks, PPQ))
+
+
+def measure_ticks(numerator: int, denominator: int) -> int:
+    """
+    박자표 한 마디의 틱 수를 계산합니다.
+
+    Args:
+        numerator: 박자표 분자
+        denominator: 박자표 분모
+
+    Returns:
+        int: 한 마디의 틱 수
+
+    Raises:
+        ValueError: 분모가 너무 작은 음표 단위라 틱으로 나타낼 수 없는 경우
+    """
+    return to_ticks(Fraction(4 * numerator, denominator))
+
+
+def rescale_ticks(pattern: Sequence[int], total: int) -> List[int]:
+    """
+    틱 패턴을 합이 정확히 total이 되도록 비례 조정합니다.
+
+    반올림 오차는 큰 나머지 순으로 분배하므로 결과의 합은 항상 total입니다.
+
+    Args:
+        pattern: 틱 패턴
+        total: 목표 합계 틱
+
+    Returns:
+        List[int]: 조정된 틱 패턴
+    """
+    current = sum(pattern)
+    if current == total:
+        return list(pattern)
+    scaled = [d * total // current for d in pattern]
+    remainders = sorted(range(len(pattern)),
+                        key=lambda i: pattern[i] * total % current, reverse=True)
+    for i in remainders[:total - sum(scaled)]:
+        scaled[i] += 1
+    return scaled
@@ -0,0 +1,301 @@
+"""
+요청 단위 구간 추적 모듈
+
+span()으로 감싼 구간은 현재 추적(contextvars로 요청/작업마다 따로 유지)에
+시작 시각과 길이가 기록됩니다. 추적이 시작되지 않은 곳(CLI, 스크립트)에서는
+span()이 공유 객체 하나를 돌려줄 뿐 아무것도 기록하지 않으므로 핵심 모듈에
+그대로 둘 수 있습니다.
+
+끝난 추적은 전체 길이가 임계값 이상일 때만 기록하고(tail-based sampling)
+나머지는 버리므로, 운영 중에도 켜 둘 수 있습니다. 기록 형식은 Chrome
+trace-event JSON이며 chrome://tracing, Perfetto, speedscope에서 열 수 있습니다.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# perf_counter_ns -> 에포크 기준 ns (여러 프로세스의 파일을 한 화면에 맞춰 볼 수 있게)
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+
+class Trace:
+    """
+    요청 하나의 구간 기록
+
+    Attributes:
+        name: 추적 이름 (예: 'POST /api/generate')
+        args: 추적 전체에 붙는 정보
+        start: 시작 시각 (perf_counter_ns)
+        spans: (이름, 시작 ns, 길이 ns, 정보) 목록 (끝난 순서)
+        tid: 추적을 시작한 스레드 ID
+    """
+
+    __slots__ = ('name', 'args', 'start', 'spans', 'tid')
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name = name
+        self.args = args
+        self.start = time.perf_counter_ns()
+        self.spans: List[Tuple[str, int, int, Dict[str, Any]]] = []
+        self.tid = threading.get_native_id()
+
+    def events(self, duration_ns: int) -> List[Dict[str, Any]]:
+        """
+        Chrome trace-event 형식의 완료('X') 이벤트 목록을 만듭니다.
+
+        Args:
+            duration_ns: 추적 전체 길이
+
+        Returns:
+            List[Dict[str, Any]]: 추적 전체 이벤트와 구간 이벤트 (시간 단위는 μs)
+        """
+        pid = os.getpid()
+        events = [{
+            'name': self.name, 'cat': 'request', 'ph': 'X', 'pid': pid, 'tid': self.tid,
+            'ts': (self.start + _EPOCH_OFFSET_NS) / 1000, 'dur': duration_ns / 1000,
+            'args': self.args,
+        }]
+        for name, start, duration, args in self.spans:
+            events.append({
+                'name': name, 'cat': 'span', 'ph': 'X', 'pid': pid, 'tid': self.tid,
+                'ts': (start + _EPOCH_OFFSET_NS) / 1000, 'dur': duration / 1000,
+                'args': args,
+            })
+        return events
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar('chordgen_trace', default=None)
+
+
+class Span:
+    """진행 중인 구간 (with 문으로 사용)"""
+
+    __slots__ = ('trace', 'name', 'args', 'start')
+
+    def __init__(self, trace: Trace, name: str, args: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def set(self, **args: Any) -> None:
+        """구간 정보를 추가합니다 (예: 결과 크기)."""
+        self.args.update(args)
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.trace.spans.append((self.name, self.start, time.perf_counter_ns() - self.start, self.args))
+        return False
+
+
+class _NullSpan:
+    """추적 중이 아닐 때 쓰는 빈 구간"""
+
+    __slots__ = ()
+
+    def set(self, **args: Any) -> None:
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **args: Any):
+    """
+    현재 추적에 구간을 기록하는 컨텍스트 매니저를 반환합니다.
+
+    Args:
+        name: 구간 이름
+        **args: 구간 정보 (JSON으로 직렬화할 수 있는 값)
+
+    Returns:
+        Span: with 문에 쓸 구간 (추적 중이 아니면 아무것도 기록하지 않음)
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NULL_SPAN
+    return Span(trace, name, args)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    함수 호출 전체를 구간으로 기록하는 데코레이터를 만듭니다.
+
+    Args:
+        name: 구간 이름 (없으면 함수 이름)
+    """
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with Span(trace, label, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+class TraceWriter:
+    """
+    Chrome trace-event JSON 배열을 파일에 이어 쓰고 크기 제한에서 교체합니다.
+
+    파일은 '['로 시작하고 이벤트를 쉼표로 구분해 이어 붙입니다. 닫는 ']'가
+    없어도 Chrome/Perfetto는 읽을 수 있습니다. 파일이 max_bytes를 넘으면
+    trace.json -> trace.1.json -> ... -> trace.<backups>.json 순으로 밀어냅니다.
+    여러 프로세스가 같은 파일을 쓰지 않도록 경로의 '{pid}'는 프로세스 ID로 바뀝니다.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 16 * 1024 * 1024, backups: int = 4):
+        """
+        Args:
+            path: 기록할 파일 경로 ('{pid}' 포함 가능)
+            max_bytes: 파일 하나의 최대 크기
+            backups: 보관할 이전 파일 수
+        """
+        self.path = path.replace('{pid}', str(os.getpid()))
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def _backup_path(self, index: int) -> str:
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{index}{ext}"
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(self._backup_path(index)):
+                os.replace(self._backup_path(index), self._backup_path(index + 1))
+        if self.backups > 0:
+            os.replace(self.path, self._backup_path(1))
+        else:
+            os.remove(self.path)
+        self._size = None
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        """
+        이벤트들을 파일 끝에 추가합니다.
+
+        Args:
+            events: Chrome trace-event 목록
+        """
+        chunk = ',\n'.join(json.dumps(e, ensure_ascii=False, separators=(',', ':')) for e in events)
+        with self._lock:
+            if self._size is None:
+                self._size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if self._size > 1 and self._size + len(chunk) > self.max_bytes:
+                self._rotate()
+                self._size = 0
+            data = ('[\n' if self._size == 0 else ',\n') + chunk
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+            self._size += len(data.encode('utf-8'))
+
+
+class Tracer:
+    """
+    추적을 시작/종료하고 느린 추적만 기록합니다.
+
+    Attributes:
+        writer: 기록 대상 (None이면 추적하지 않음)
+        threshold_ms: 이 시간(ms) 이상 걸린 추적만 기록
+        kept: 기록한 추적 수
+        dropped: 임계값 미만이라 버린 추적 수
+    """
+
+    def __init__(self, writer: Optional[TraceWriter], threshold_ms: float = 500.0):
+        self.writer = writer
+        self.threshold_ms = threshold_ms
+        self.kept = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.writer is not None
+
+    def begin(self, name: str, **args: Any) -> Optional[Tuple[Trace, Token]]:
+        """
+        현재 컨텍스트에서 추적을 시작합니다.
+
+        Args:
+            name: 추적 이름
+            **args: 추적 정보
+
+        Returns:
+            Optional[Tuple[Trace, Token]]: end에 넘길 핸들 (비활성이면 None)
+        """
+        if self.writer is None:
+            return None
+        trace = Trace(name, args)
+        return trace, _current.set(trace)
+
+    def end(self, handle: Optional[Tuple[Trace, Token]], **args: Any) -> bool:
+        """
+        추적을 끝내고 임계값 이상이면 기록합니다.
+
+        Args:
+            handle: begin의 결과
+            **args: 추적 정보 (예: 응답 코드)
+
+        Returns:
+            bool: 기록했는지 여부
+        """
+        if handle is None:
+            return False
+        trace, token = handle
+        duration = time.perf_counter_ns() - trace.start
+        try:
+            _current.reset(token)
+        except ValueError:  # 다른 컨텍스트에서 끝난 경우
+            _current.set(None)
+        if duration < self.threshold_ms * 1_000_000:
+            self.dropped += 1
+            return False
+        trace.args.update(args)
+        try:
+            self.writer.write(trace.events(duration))
+        except OSError as e:
+            print(f"[ERROR] Trace write failed: {e}")
+            return False
+        self.kept += 1
+        return True
+
+    @contextmanager
+    def trace(self, name: str, **args: Any) -> Iterator[None]:
+        """begin/end를 with 문으로 감쌉니다 (백그라운드 작업용)."""
+        handle = self.begin(name, **args)
+        try:
+            yield
+        finally:
+            self.end(handle)
+
+    def stats(self) -> Dict[str, Any]:
+        """기록/버린 추적 수를 반환합니다."""
+        return {
+            'enabled': self.enabled,
+            'threshold_ms': self.threshold_ms,
+            'kept': self.kept,
+            'dropped': self.dropped,
+        }
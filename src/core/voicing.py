@@ -0,0 +1,216 @@
+"""
+보이스 리딩 모듈
+
+이 모듈은 코드 진행 전체에 대해 성부 이동이 최소가 되는 화음 보이싱을
+동적 계획법(비터비)으로 선택하는 기능을 제공합니다.
+"""
+
+from functools import lru_cache
+from itertools import product
+from typing import List, Sequence, Tuple
+
+from music21 import chord, pitch
+
+from .chord_tables import chord_entry, voiced_figure
+
+# 보이싱 음역 (C3~C5, MIDI)
+LOW_MIDI = 48
+HIGH_MIDI = 72
+
+# 한 보이싱의 최대 음폭 (밀집 배치)
+MAX_SPAN = 12
+
+# 병행 5도/8도 벌점 (반음 단위 이동 거리와 같은 척도)
+PARALLEL_PENALTY = 24
+
+# 첫 화음의 중심 음높이 (중앙 C 부근)
+CENTER_MIDI = 60
+
+# 보이싱 격자 캐시 크기 (사용자 코드 기호가 늘어도 메모리가 일정하도록)
+LATTICE_CACHE_SIZE = 2048
+
+Voicing = Tuple[int, ...]
+
+
+def chord_spelling(roman: str, tonic: str, mode: str = 'major') -> Tuple[str, ...]:
+    """
+    로마숫자 코드의 구성음 이름을 기본형 순서로 반환합니다.
+
+    roman_to_chord와 같이 'V'는 속7화음으로 확장합니다.
+
+    Args:
+        roman: 로마숫자 코드
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        Tuple[str, ...]: 옥타브 없는 음 이름 (예: ('G', 'B', 'D', 'F'))
+    """
+    return chord_entry(voiced_figure(roman), tonic, mode).pitch_names
+
+
+def _root_position(pcs: Sequence[int]) -> Voicing:
+    """구성음을 C3 옥타브의 근음부터 차례로 쌓은 기본형 보이싱"""
+    midi = [LOW_MIDI + pcs[0] % 12]
+    for pc in pcs[1:]:
+        midi.append(midi[-1] + ((pc - midi[-1]) % 12 or 12))
+    return tuple(midi)
+
+
+@lru_cache(maxsize=LATTICE_CACHE_SIZE)
+def voicing_lattice(roman: str, tonic: str, mode: str = 'major') -> Tuple[Voicing, ...]:
+    """
+    로마숫자 코드가 가질 수 있는 모든 보이싱을 반환합니다.
+
+    각 구성음을 C3~C5 범위에서 한 번씩 배치하고, 음폭이 MAX_SPAN 이하인
+    배치만 남깁니다. 그런 배치가 없는 코드(음폭이 넓은 확장 화음 등)는
+    기본형 보이싱 하나를 반환합니다. 결과는 크기가 제한된 캐시에 저장됩니다.
+
+    Args:
+        roman: 로마숫자 코드
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        Tuple[Voicing, ...]: 오름차순 MIDI 음높이 튜플의 목록
+    """
+    pcs = [midi % 12 for midi in chord_entry(voiced_figure(roman), tonic, mode).midi]
+    if not pcs:
+        raise ValueError(f"Chord {roman!r} in {tonic} {mode} has no pitches to voice")
+    candidates = [
+        [m for m in range(LOW_MIDI, HIGH_MIDI + 1) if m % 12 == pc]
+        for pc in pcs
+    ]
+    voicings = set()
+    for combo in product(*candidates):
+        v = tuple(sorted(combo))
+        if len(set(v)) == len(v) and v[-1] - v[0] <= MAX_SPAN:
+            voicings.add(v)
+
+    if not voicings:
+        return (_root_position(pcs),)
+    return tuple(sorted(voicings))
+
+
+def _pair_voices(a: Voicing, b: Voicing) -> List[Tuple[int, int]]:
+    """두 보이싱의 성부를 짝짓습니다 (성부 수가 다르면 가장 가까운 음과 연결)"""
+    if len(a) == len(b):
+        return list(zip(a, b))
+    longer, shorter = (a, b) if len(a) > len(b) else (b, a)
+    pairs = []
+    for x in longer:
+        y = min(shorter, key=lambda s: abs(s - x))
+        pairs.append((x, y) if longer is a else (y, x))
+    return pairs
+
+
+def transition_cost(a: Voicing, b: Voicing) -> int:
+    """
+    두 보이싱 사이의 성부 이동 비용을 계산합니다.
+
+    Args:
+        a: 이전 보이싱
+        b: 다음 보이싱
+
+    Returns:
+        int: 총 이동 반음 수 + 병행 5도/8도 벌점
+    """
+    pairs = _pair_voices(a, b)
+    cost = sum(abs(x - y) for x, y in pairs)
+
+    # 병행 5도/8도: 두 성부가 같은 방향으로 움직이며 완전음정을 유지
+    for i in range(len(pairs)):
+        for j in range(i + 1, len(pairs)):
+            (a1, b1), (a2, b2) = pairs[i], pairs[j]
+            if a1 == b1 or a2 == b2:
+                continue
+            if (b1 - a1 > 0) != (b2 - a2 > 0):
+                continue
+            before = abs(a2 - a1) % 12
+            after = abs(b2 - b1) % 12
+            if before == after and before in (0, 7):
+                cost += PARALLEL_PENALTY
+    return cost
+
+
+@lru_cache(maxsize=4096)
+def _transition_matrix(prev_roman: str, next_roman: str,
+                       tonic: str, mode: str) -> Tuple[Tuple[int, ...], ...]:
+    """코드 쌍별 전이 비용 행렬 캐시 (행: 이전 보이싱, 열: 다음 보이싱)"""
+    prev_lattice = voicing_lattice(prev_roman, tonic, mode)
+    next_lattice = voicing_lattice(next_roman, tonic, mode)
+    return tuple(
+        tuple(transition_cost(a, b) for b in next_lattice)
+        for a in prev_lattice
+    )
+
+
+def voice_progression(prog: Sequence[str], tonic: str, mode: str = 'major') -> List[Voicing]:
+    """
+    코드 진행 전체의 성부 이동이 최소가 되도록 보이싱을 선택합니다.
+
+    코드 쌍별 전이 비용 행렬을 캐시하므로 비터비 탐색은 진행 길이에
+    선형으로 동작합니다.
+
+    Args:
+        prog: 로마숫자 코드 진행 리스트
+        tonic: 조성
+        mode: 조성 타입
+
+    Returns:
+        List[Voicing]: 마디별 보이싱 (MIDI 음높이 튜플)
+    """
+    if not prog:
+        return []
+
+    first = voicing_lattice(prog[0], tonic, mode)
+    costs = [abs(sum(v) / len(v) - CENTER_MIDI) for v in first]
+    back: List[List[int]] = []
+
+    for i in range(1, len(prog)):
+        matrix = _transition_matrix(prog[i - 1], prog[i], tonic, mode)
+        size = len(matrix[0])
+        new_costs = [float('inf')] * size
+        pointers = [0] * size
+        for a, row in enumerate(matrix):
+            base = costs[a]
+            for b in range(size):
+                c = base + row[b]
+                if c < new_costs[b]:
+                    new_costs[b] = c
+                    pointers[b] = a
+        costs = new_costs
+        back.append(pointers)
+
+    # 역추적
+    best = min(range(len(costs)), key=costs.__getitem__)
+    path = [best]
+    for pointers in reversed(back):
+        best = pointers[best]
+        path.append(best)
+    path.reverse()
+
+    return [voicing_lattice(rn, tonic, mode)[idx] for rn, idx in zip(prog, path)]
+
+
+def voicing_to_chord(roman: str, tonic: str, mode: str, voicing: Voicing) -> chord.Chord:
+    """
+    보이싱을 철자가 유지된 music21 화음으로 변환합니다.
+
+    Args:
+        roman: 로마숫자 코드
+        tonic: 조성
+        mode: 조성 타입
+        voicing: MIDI 음높이 튜플
+
+    Returns:
+        music21.chord.Chord: 변환된 화음
+    """
+    names = {pitch.Pitch(n).pitchClass: n for n in chord_spelling(roman, tonic, mode)}
+    chord_notes = []
+    for midi in voicing:
+        p = pitch.Pitch(names[midi % 12])
+        p.octave = 4
+        p.octave += (midi - p.midi) // 12
+        chord_notes.append(p)
+    return chord.Chord(chord_notes)
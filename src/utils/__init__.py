@@ -8,11 +8,36 @@
 from .file_utils import (
     get_documents_dir,
     get_unique_filename,
-    create_musicxml_download
+    create_musicxml_download,
+    download_html,
+    score_to_musicxml,
+    musicxml_download_html
 )
+from .musicxml_import import open_musicxml, read_musicxml, scan_musicxml
+from .corpus import corpus_paths, file_statistics, map_files, map_parallel, piece_figures
+from .musicxml_patch import ScoreDocument
+from .score_cache import ScoreCache, cache_key, open_default_cache
+from .shared_cache import SharedMemoryCache, open_shared_cache
 
 __all__ = [
     'get_documents_dir',
     'get_unique_filename', 
-    'create_musicxml_download'
+    'create_musicxml_download',
+    'download_html',
+    'score_to_musicxml',
+    'musicxml_download_html',
+    'open_musicxml',
+    'read_musicxml',
+    'scan_musicxml',
+    'corpus_paths',
+    'file_statistics',
+    'map_files',
+    'map_parallel',
+    'piece_figures',
+    'ScoreDocument',
+    'ScoreCache',
+    'cache_key',
+    'open_default_cache',
+    'SharedMemoryCache',
+    'open_shared_cache'
 ] 
\ No newline at end of file
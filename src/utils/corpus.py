@@ -0,0 +1,278 @@
+"""
+Corpus processing module
+
+This module finds scores in music21's bundled corpus or in local folders
+and maps a per-file function over them in a process pool. Results are
+JSON-serializable dicts cached in a ScoreCache under the file's path,
+size and modification time, so re-running over a grown or edited corpus
+only parses the files that changed.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from src.core.chord_match import best_figure
+from src.core.deadline import deadline
+from src.core.harmony_stats import batch_statistics
+from .musicxml_import import open_musicxml, read_musicxml, scan_musicxml
+from .score_cache import ScoreCache, cache_key
+
+# Score files the streaming parser reads
+MUSICXML_SUFFIXES = ('.mxl', '.musicxml', '.xml')
+
+# Bump when piece_figures output changes so cached results are re-parsed
+FIGURES_VERSION = 1
+
+# Seconds past its deadline after which a worker that has not stopped is killed
+KILL_GRACE = 2.0
+
+# Per-file result: JSON-serializable dict ({'error': message} on failure)
+FileResult = Dict[str, Any]
+
+Item = TypeVar('Item')
+
+
+def corpus_paths(composer: Optional[str] = 'bach', folders: Sequence[str] = ()) -> List[str]:
+    """
+    Lists MusicXML scores from music21's corpus and local folders.
+
+    Args:
+        composer: music21 corpus composer (e.g. 'bach'), or None to skip the corpus
+        folders: Directories searched recursively for MusicXML files
+
+    Returns:
+        List[str]: Sorted file paths
+    """
+    paths = set()
+    if composer:
+        from music21 import corpus
+        paths.update(str(p) for p in corpus.getComposer(composer)
+                     if str(p).lower().endswith(MUSICXML_SUFFIXES))
+    for folder in folders:
+        for directory, _, names in os.walk(folder):
+            paths.update(os.path.join(directory, name) for name in names
+                         if name.lower().endswith(MUSICXML_SUFFIXES))
+    return sorted(paths)
+
+
+def piece_figures(path: str) -> FileResult:
+    """
+    Labels each beat of a score with a roman numeral in its home key.
+
+    Consecutive beats with the same chord are merged, so the result is the
+    sequence of chord changes (the harmonic grammar, independent of
+    harmonic rhythm).
+
+    Args:
+        path: MusicXML file path
+
+    Returns:
+        FileResult: {'tonic', 'mode', 'time_sig', 'beats', 'figures'}
+    """
+    with open(path, 'rb') as f:
+        scan = scan_musicxml(open_musicxml(f), per_beat=True)
+    tonic, mode = scan['tonic'], scan['mode']
+    figures: List[str] = []
+    beats = 0
+    for measure, basses in zip(scan['beat_weights'], scan['beat_basses']):
+        for weights, bass in zip(measure, basses):
+            beats += 1
+            figure = best_figure(weights, tonic, mode, None if bass is None else bass % 12)
+            if figure is not None and (not figures or figures[-1] != figure):
+                figures.append(figure)
+    return {'tonic': tonic, 'mode': mode, 'time_sig': scan['time_sig'],
+            'beats': beats, 'figures': figures}
+
+
+def file_statistics(path: str) -> FileResult:
+    """
+    Computes the harmonic statistics of a score's per-measure progression.
+
+    The progression is the one POST /api/upload analyzes (read_musicxml),
+    so repertoire and generated exercises are measured the same way.
+
+    Args:
+        path: MusicXML file path
+
+    Returns:
+        FileResult: {'tonic', 'mode', 'stats': {mode: HarmonyStats}}
+    """
+    with open(path, 'rb') as f:
+        imported = read_musicxml(open_musicxml(f))
+    tonic, mode = imported['tonic'], imported['mode']
+    return {'tonic': tonic, 'mode': mode,
+            'stats': batch_statistics([(imported['progression'], tonic, mode)])}
+
+
+def _guarded(func: Callable[[Item], FileResult], timeout: Optional[float], item: Item) -> FileResult:
+    """Runs func in a worker under a deadline, turning exceptions into error results."""
+    try:
+        with deadline(timeout):
+            return func(item)
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+
+def _kill_pool(pool: ProcessPoolExecutor) -> None:
+    """Kills a pool's worker processes instead of waiting for their current task."""
+    # The executor has no public API for this; _processes maps pid -> Process
+    processes = getattr(pool, '_processes', None) or {}
+    for process in list(processes.values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _map_killable(work: Callable[[Item], FileResult], items: List[Item], workers: int,
+                  limit: float) -> Iterator[Tuple[Item, FileResult]]:
+    """
+    map_parallel with a hard time limit per item.
+
+    Items are submitted one at a time, at most one per worker, so each
+    item's start time is known. When an item runs past the limit the
+    whole pool is killed (a single worker cannot be stopped through the
+    executor), the item yields an error, and the other items that were
+    running start again in a fresh pool.
+    """
+    results: Dict[int, FileResult] = {}
+    queue = deque(range(len(items)))
+    running: Dict[Any, Tuple[int, float]] = {}
+    pool = ProcessPoolExecutor(max_workers=workers)
+    next_index = 0
+    try:
+        while queue or running:
+            while queue and len(running) < workers:
+                index = queue.popleft()
+                running[pool.submit(work, items[index])] = (index, time.monotonic())
+            expiry = min(started for _, started in running.values()) + limit
+            done, _ = wait(running, timeout=max(0.0, expiry - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                index, _ = running.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:  # BrokenProcessPool: a worker died
+                    results[index] = {'error': f"{type(e).__name__}: {e}"}
+                    broken = True
+
+            now = time.monotonic()
+            expired = [future for future, (_, started) in running.items() if now - started >= limit]
+            for future in expired:
+                index, _ = running.pop(future)
+                results[index] = {'error': f"DeadlineExceeded: worker killed after {limit:g}s"}
+            if expired or broken:
+                # Restart the innocent in-flight items first, in input order
+                queue.extendleft(sorted((index for index, _ in running.values()), reverse=True))
+                running.clear()
+                _kill_pool(pool)
+                pool = ProcessPoolExecutor(max_workers=workers)
+
+            while next_index in results:
+                yield items[next_index], results.pop(next_index)
+                next_index += 1
+    finally:
+        if running:
+            _kill_pool(pool)
+        else:
+            pool.shutdown(cancel_futures=True)
+
+
+def map_parallel(func: Callable[[Item], FileResult], items: Iterable[Item],
+                 jobs: Optional[int] = None, chunksize: int = 8,
+                 timeout: Optional[float] = None) -> Iterator[Tuple[Item, FileResult]]:
+    """
+    Applies func to every item in a process pool, yielding results in input order.
+
+    Exceptions raised by func become {'error': ...} results. Closing the
+    iterator early cancels the work that has not started yet.
+
+    With a timeout, func runs under a cooperative deadline (the core
+    generation and analysis loops check it every measure) and a worker
+    still busy KILL_GRACE seconds after its deadline is killed; items are
+    then sent one at a time and chunksize is ignored. In-process runs
+    (jobs=1) only get the cooperative deadline.
+
+    Args:
+        func: Module-level function of an item (it and the items must be picklable)
+        items: Work items
+        jobs: Worker processes (None = CPU count, 1 = in this process)
+        chunksize: Items sent to a worker at a time
+        timeout: Seconds each item may run (None = no limit)
+
+    Returns:
+        Iterator[Tuple[Item, FileResult]]: (item, result)
+    """
+    items = list(items)
+    if not items:
+        return
+    work = partial(_guarded, func, timeout)
+    if timeout is not None and jobs != 1:
+        yield from _map_killable(work, items, jobs or os.cpu_count() or 1, timeout + KILL_GRACE)
+        return
+    if jobs == 1:
+        results = map(work, items)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(work, items, chunksize=chunksize)
+    try:
+        yield from zip(items, results)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def file_key(path: str, task: str, version: int) -> str:
+    """Cache key of a file's result (changes when the file or the task version does)."""
+    stat = os.stat(path)
+    return cache_key({'corpus': task, 'version': version, 'path': os.path.abspath(path),
+                      'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+
+
+def map_files(func: Callable[[str], FileResult], paths: Sequence[str],
+              cache: Optional[ScoreCache] = None, task: str = '', version: int = 1,
+              jobs: Optional[int] = None, chunksize: int = 8,
+              timeout: Optional[float] = None) -> Iterator[Tuple[str, FileResult, bool]]:
+    """
+    Applies func to every file, in parallel, reusing cached results.
+
+    Cached results are yielded first, then fresh ones in input order as
+    the pool finishes them. Failed files yield {'error': ...} and are not
+    cached, so they are retried on the next run.
+
+    Args:
+        func: Module-level function of a path (it must be picklable)
+        paths: Files to process
+        cache: Result cache (None recomputes everything)
+        task: Name separating this function's results from others in the cache
+        version: Result format version of func
+        jobs: Worker processes (None = CPU count, 1 = in this process)
+        chunksize: Files sent to a worker at a time
+        timeout: Seconds each file may take (see map_parallel)
+
+    Returns:
+        Iterator[Tuple[str, FileResult, bool]]: (path, result, served from cache)
+    """
+    pending: List[Tuple[str, Optional[str]]] = []
+    for path in paths:
+        try:
+            key = file_key(path, task, version) if cache is not None else None
+        except OSError as e:
+            yield path, {'error': f"{type(e).__name__}: {e}"}, False
+            continue
+        entry = cache.get(key) if key is not None else None
+        if entry is not None:
+            yield path, json.loads(entry['result']), True
+        else:
+            pending.append((path, key))
+    keys = dict(pending)
+    for path, result in map_parallel(func, [path for path, _ in pending], jobs, chunksize, timeout):
+        key = keys[path]
+        if key is not None and 'error' not in result:
+            cache.put(key, {'result': json.dumps(result, ensure_ascii=False).encode('utf-8')})
+        yield path, result, False
@@ -8,8 +8,6 @@ and other file-related utility functions.
 import os
 import sys
 from datetime import datetime
-from typing import Optional
-import io
 import base64
 from music21 import stream
 
@@ -63,6 +61,50 @@ def get_unique_filename(base_name: str, ext: str, save_dir: str) -> str:
         n += 1
 
 
+def score_to_musicxml(score: stream.Score) -> bytes:
+    """
+    Renders a Music21 Score object to MusicXML bytes in memory.
+    
+    Args:
+        score: music21 Score object
+    
+    Returns:
+        bytes: MusicXML document
+    """
+    from music21.musicxml.m21ToXml import GeneralObjectExporter
+    return GeneralObjectExporter(score).parse()
+
+
+def download_html(file_data: bytes, filename: str, mimetype: str) -> str:
+    """
+    Wraps a document in a base64 data-URI download link.
+    
+    Args:
+        file_data: Document bytes
+        filename: Filename
+        mimetype: Media type of the document
+    
+    Returns:
+        str: HTML download link
+    """
+    b64 = base64.b64encode(file_data).decode('utf-8')
+    return f'<a href="data:{mimetype};base64,{b64}" download="{filename}">Download {filename}</a>'
+
+
+def musicxml_download_html(file_data: bytes, filename: str) -> str:
+    """
+    Wraps MusicXML bytes in a base64 data-URI download link.
+    
+    Args:
+        file_data: MusicXML document
+        filename: Filename
+    
+    Returns:
+        str: HTML download link
+    """
+    return download_html(file_data, filename, 'application/vnd.recordare.musicxml+xml')
+
+
 def create_musicxml_download(score: stream.Score, filename: str) -> str:
     """
     Converts a Music21 Score object to a downloadable MusicXML format.
@@ -75,36 +117,7 @@ def create_musicxml_download(score: stream.Score, filename: str) -> str:
         str: base64 encoded download link
     """
     try:
-        # Create MusicXML using a temporary file
-        import tempfile
-        import os
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.musicxml', delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        try:
-            # Save as MusicXML file
-            score.write('musicxml', fp=temp_path)
-            
-            # Read file
-            with open(temp_path, 'rb') as f:
-                file_data = f.read()
-            
-            # base64 encoding
-            b64 = base64.b64encode(file_data).decode('utf-8')
-            
-            # Create download link
-            href = f'<a href="data:application/vnd.recordare.musicxml+xml;base64,{b64}" download="{filename}">Download {filename}</a>'
-            
-            return href
-            
-        finally:
-            # Delete temporary file
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
-                
+        return musicxml_download_html(score_to_musicxml(score), filename)
     except Exception as e:
         print(f"[ERROR] Failed to create MusicXML download: {e}")
-        return f"<p>Download generation failed: {e}</p>"
\ No newline at end of file
+        return f"<p>Download generation failed: {e}</p>"
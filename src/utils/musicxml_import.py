@@ -0,0 +1,290 @@
+"""
+MusicXML import module
+
+This module reads uploaded MusicXML scores (plain or compressed .mxl)
+with a streaming ElementTree parser. It extracts the key, meter and the
+notes of each measure, clearing elements as soon as they are processed,
+so memory does not grow with the number of notes. Each measure is then
+labelled with a roman numeral against the detected key.
+
+Malformed documents raise ValueError, and scanning checks the request
+deadline (src.core.deadline) once per measure.
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, List, Optional
+
+from src.core.chord_match import best_figure, estimate_key
+from src.core.deadline import check_deadline
+
+# Largest score document unpacked from a compressed .mxl file (bytes)
+MAX_SCORE_BYTES = 64 * 1024 * 1024
+
+_STEP_PC = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+# Tonic names indexed by key signature fifths + 7
+_MAJOR_BY_FIFTHS = ('Cb', 'Gb', 'Db', 'Ab', 'Eb', 'Bb', 'F', 'C', 'G', 'D', 'A', 'E', 'B', 'F#', 'C#')
+_MINOR_BY_FIFTHS = ('Ab', 'Eb', 'Bb', 'F', 'C', 'G', 'D', 'A', 'E', 'B', 'F#', 'C#', 'G#', 'D#', 'A#')
+
+
+def _local(tag: str) -> str:
+    """Strips an XML namespace from a tag name."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(elem: ET.Element, name: str) -> Optional[str]:
+    for child in elem:
+        if _local(child.tag) == name:
+            return child.text
+    return None
+
+
+def _child(elem: ET.Element, name: str) -> Optional[ET.Element]:
+    for child in elem:
+        if _local(child.tag) == name:
+            return child
+    return None
+
+
+def _note_midi(pitch_elem: ET.Element) -> int:
+    """Converts a <pitch> element to a MIDI number."""
+    step = (_child_text(pitch_elem, 'step') or '').strip()
+    if step not in _STEP_PC:
+        raise ValueError(f"Invalid <pitch>: step {step!r}")
+    alter = float(_child_text(pitch_elem, 'alter') or 0)
+    octave = int(_child_text(pitch_elem, 'octave') or 4)
+    return (octave + 1) * 12 + _STEP_PC[step] + int(round(alter))
+
+
+def open_musicxml(fileobj: IO[bytes], max_bytes: int = MAX_SCORE_BYTES) -> IO[bytes]:
+    """
+    Returns a stream of the MusicXML document, unpacking .mxl containers.
+
+    Args:
+        fileobj: Seekable binary file object (.musicxml, .xml or .mxl)
+        max_bytes: Largest uncompressed score document accepted from a .mxl
+
+    Returns:
+        IO[bytes]: Stream of the score document
+
+    Raises:
+        ValueError: If a compressed file has no score document or its
+            document is larger than max_bytes
+    """
+    if not zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        return fileobj
+
+    fileobj.seek(0)
+    archive = zipfile.ZipFile(fileobj)
+    names = archive.namelist()
+    target = None
+    if 'META-INF/container.xml' in names:
+        container = ET.fromstring(archive.read('META-INF/container.xml'))
+        for elem in container.iter():
+            if _local(elem.tag) == 'rootfile' and elem.get('full-path'):
+                target = elem.get('full-path')
+                break
+    if target is None:
+        candidates = [n for n in names if not n.startswith('META-INF/')
+                      and n.lower().endswith(('.xml', '.musicxml'))]
+        if not candidates:
+            raise ValueError("Compressed MusicXML file contains no score")
+        target = candidates[0]
+    try:
+        size = archive.getinfo(target).file_size
+    except KeyError:
+        raise ValueError(f"Compressed MusicXML file has no {target!r}")
+    # ZipExtFile stops at the declared size, so checking it bounds decompression
+    if size > max_bytes:
+        raise ValueError(f"Score document is too large ({size} bytes, limit {max_bytes})")
+    return archive.open(target)
+
+
+def _add_beats(beats: List[List[float]], basses: List[Optional[int]],
+               start: float, length: float, midi: int, divisions: int) -> None:
+    """Spreads a note over the quarter-note slices of its measure."""
+    end = start + length
+    while start < end:
+        index = int(start // divisions)
+        while len(beats) <= index:
+            beats.append([0.0] * 12)
+            basses.append(None)
+        stop = min(end, (index + 1) * divisions)
+        beats[index][midi % 12] += (stop - start) / divisions
+        if basses[index] is None or midi < basses[index]:
+            basses[index] = midi
+        start = stop
+
+
+def scan_musicxml(fileobj: IO[bytes], per_beat: bool = False) -> Dict[str, Any]:
+    """
+    Streams a partwise MusicXML score into per-measure pitch-class weights.
+
+    Measures with the same index in different parts are merged, so only a
+    12-value pitch-class weight vector is kept per measure regardless of
+    how many notes or parts the score has.
+
+    Args:
+        fileobj: Binary stream of a MusicXML document
+        per_beat: Also split each measure into quarter-note slices
+            (follows <backup>, <forward> and <chord/> to place notes in time)
+
+    Returns:
+        Dict[str, Any]: {'tonic', 'mode', 'key_source', 'time_sig', 'parts',
+        'weights', 'basses'} where 'basses' holds the lowest MIDI note of
+        each measure (None for empty measures). With per_beat, also
+        'beat_weights' and 'beat_basses': the same per slice, as one list
+        of slices per measure
+
+    Raises:
+        ValueError: If the document is not a partwise MusicXML score or is malformed
+        DeadlineExceeded: If the current request's deadline passes
+    """
+    weights: List[List[float]] = []
+    basses: List[Optional[int]] = []
+    beat_weights: List[List[List[float]]] = []
+    beat_basses: List[List[Optional[int]]] = []
+    position = onset = 0.0
+    key_fifths = None
+    key_mode = None
+    time_sig = None
+    parts = 0
+
+    root = None
+    current_part = None
+    measure_index = -1
+    divisions = 1
+
+    for event, elem in ET.iterparse(fileobj, events=('start', 'end')):
+        tag = _local(elem.tag)
+
+        if event == 'start':
+            if root is None:
+                root = elem
+                if tag != 'score-partwise':
+                    raise ValueError(f"Unsupported MusicXML root element: {tag}")
+            elif tag == 'part':
+                current_part = elem
+                parts += 1
+                measure_index = -1
+                divisions = 1
+            elif tag == 'measure':
+                check_deadline()
+                measure_index += 1
+                if measure_index == len(weights):
+                    weights.append([0.0] * 12)
+                    basses.append(None)
+                    beat_weights.append([])
+                    beat_basses.append([])
+                position = onset = 0.0
+            continue
+
+        if tag == 'divisions':
+            divisions = max(1, int(float(elem.text or 1)))
+        elif tag == 'key' and key_fifths is None:
+            fifths = _child_text(elem, 'fifths')
+            if fifths is not None:
+                key_fifths = max(-7, min(7, int(fifths)))
+                key_mode = (_child_text(elem, 'mode') or 'major').strip()
+        elif tag == 'time' and time_sig is None:
+            beats = _child_text(elem, 'beats')
+            beat_type = _child_text(elem, 'beat-type')
+            if beats and beat_type:
+                time_sig = f"{beats.strip()}/{beat_type.strip()}"
+        elif tag in ('backup', 'forward') and per_beat:
+            shift = float(_child_text(elem, 'duration') or 0)
+            position = max(0.0, position - shift) if tag == 'backup' else position + shift
+        elif tag == 'note':
+            pitch_elem = _child(elem, 'pitch')
+            duration = _child_text(elem, 'duration')
+            if per_beat and duration is not None:
+                if _child(elem, 'chord') is None:
+                    onset = position
+                    position += float(duration)
+            if pitch_elem is not None and duration is not None and measure_index >= 0:
+                midi = _note_midi(pitch_elem)
+                weights[measure_index][midi % 12] += float(duration) / divisions
+                bass = basses[measure_index]
+                if bass is None or midi < bass:
+                    basses[measure_index] = midi
+                if per_beat:
+                    _add_beats(beat_weights[measure_index], beat_basses[measure_index],
+                               onset, float(duration), midi, divisions)
+            elem.clear()
+        elif tag == 'measure':
+            elem.clear()
+            if current_part is not None and elem in current_part:
+                current_part.remove(elem)
+        elif tag == 'part':
+            elem.clear()
+            if root is not None and elem in root:
+                root.remove(elem)
+
+    if root is None:
+        raise ValueError("Empty MusicXML document")
+
+    # Key: signature if present, otherwise estimated from the pitch content
+    if key_fifths is not None:
+        mode = 'minor' if key_mode == 'minor' else 'major'
+        names = _MINOR_BY_FIFTHS if mode == 'minor' else _MAJOR_BY_FIFTHS
+        tonic = names[key_fifths + 7]
+        key_source = 'signature'
+    else:
+        totals = [sum(measure[pc] for measure in weights) for pc in range(12)]
+        tonic, mode = estimate_key(totals)
+        key_source = 'estimated'
+
+    scan = {
+        'tonic': tonic,
+        'mode': mode,
+        'key_source': key_source,
+        'time_sig': time_sig or '4/4',
+        'parts': parts,
+        'weights': weights,
+        'basses': basses,
+    }
+    if per_beat:
+        scan['beat_weights'] = beat_weights
+        scan['beat_basses'] = beat_basses
+    return scan
+
+
+def read_musicxml(fileobj: IO[bytes]) -> Dict[str, Any]:
+    """
+    Streams a partwise MusicXML score and labels each measure with a roman numeral.
+
+    Args:
+        fileobj: Binary stream of a MusicXML document
+
+    Returns:
+        Dict[str, Any]: {'tonic', 'mode', 'key_source', 'time_sig', 'parts',
+        'measures', 'progression'}
+
+    Raises:
+        ValueError: If the document is not a partwise MusicXML score or is malformed
+        DeadlineExceeded: If the current request's deadline passes
+    """
+    scan = scan_musicxml(fileobj)
+    tonic, mode = scan['tonic'], scan['mode']
+
+    # Roman numeral per measure (empty measures continue the previous chord)
+    progression = []
+    previous = 'I' if mode == 'major' else 'i'
+    for measure, bass in zip(scan['weights'], scan['basses']):
+        figure = best_figure(measure, tonic, mode, None if bass is None else bass % 12)
+        if figure is None:
+            figure = previous
+        progression.append(figure)
+        previous = figure
+
+    return {
+        'tonic': tonic,
+        'mode': mode,
+        'key_source': scan['key_source'],
+        'time_sig': scan['time_sig'],
+        'parts': scan['parts'],
+        'measures': len(progression),
+        'progression': progression,
+    }
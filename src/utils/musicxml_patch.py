@@ -0,0 +1,235 @@
+"""
+MusicXML patching module
+
+This module keeps an exported partwise MusicXML document as an element
+tree so a range of measures can be swapped for freshly exported ones
+without exporting the whole score again. Ties and slurs that cross the
+edges of the replaced range are repaired in place.
+"""
+
+import copy
+import xml.etree.ElementTree as ET
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Slurs span at most a few measures, so crossing slurs are searched this far
+SLUR_SEARCH_MEASURES = 4
+
+# (part index, first measure, copies of the measures) saved by ScoreDocument.snapshot
+Snapshot = Tuple[int, int, List[ET.Element]]
+
+
+def _split_header(data: bytes) -> bytes:
+    """Returns the XML declaration and doctype that precede the root element."""
+    index = data.find(b'<score-partwise')
+    return data[:index] if index > 0 else b''
+
+
+def _events(measure: ET.Element) -> List[List[ET.Element]]:
+    """Groups a measure's notes into events (a chord is one event)."""
+    events: List[List[ET.Element]] = []
+    for elem in measure.iter('note'):
+        if elem.find('chord') is not None and events:
+            events[-1].append(elem)
+        else:
+            events.append([elem])
+    return events
+
+
+def _tie_types(note_elem: ET.Element) -> Set[str]:
+    return {t.get('type') for t in note_elem.findall('tie')}
+
+
+def _set_tie_types(note_elem: ET.Element, types: Iterable[str]) -> None:
+    """Rewrites a note's <tie> and <tied> elements to the given types."""
+    types = [t for t in ('stop', 'start') if t in set(types)]
+    for t in note_elem.findall('tie'):
+        note_elem.remove(t)
+    notations = note_elem.find('notations')
+    if notations is not None:
+        for t in notations.findall('tied'):
+            notations.remove(t)
+
+    if types:
+        # <tie> follows <duration> in the MusicXML schema
+        children = list(note_elem)
+        index = next((i + 1 for i, c in enumerate(children) if c.tag == 'duration'), len(children))
+        for offset, t in enumerate(types):
+            tie_elem = ET.Element('tie', {'type': t})
+            note_elem.insert(index + offset, tie_elem)
+        if notations is None:
+            notations = ET.SubElement(note_elem, 'notations')
+        for offset, t in enumerate(types):
+            notations.insert(offset, ET.Element('tied', {'type': t}))
+
+    if notations is not None and len(notations) == 0:
+        note_elem.remove(notations)
+
+
+class ScoreDocument:
+    """
+    Editable element tree of an exported partwise MusicXML score.
+    """
+
+    def __init__(self, data: bytes):
+        """
+        Args:
+            data: MusicXML bytes as produced by score_to_musicxml
+        """
+        self.header = _split_header(data)
+        self.root = ET.fromstring(data)
+        self.parts = self.root.findall('part')
+
+    def measures(self, part_index: int) -> List[ET.Element]:
+        """Returns the measure elements of a part in order."""
+        return self.parts[part_index].findall('measure')
+
+    def replace_measures(self, part_index: int, start: int,
+                         measures: List[ET.Element]) -> None:
+        """
+        Replaces measures [start, start + len(measures)) of a part.
+
+        Args:
+            part_index: Part position in the score (0-based)
+            start: First measure to replace (0-based)
+            measures: New measure elements, numbered like the ones they replace
+        """
+        part = self.parts[part_index]
+        old = self.measures(part_index)
+        position = list(part).index(old[start])
+        for elem in old[start:start + len(measures)]:
+            part.remove(elem)
+        for offset, elem in enumerate(measures):
+            if start > 0:
+                # Key, meter and clef are only written in the first measure
+                for attributes in elem.findall('attributes'):
+                    elem.remove(attributes)
+            part.insert(position + offset, elem)
+
+    def remove_slurs(self, part_index: int, start: int, end: int) -> None:
+        """
+        Removes slurs that touch measures [start, end) of a part.
+
+        Args:
+            part_index: Part position in the score (0-based)
+            start: First measure of the range (0-based)
+            end: End of the range (exclusive)
+        """
+        measures = self.measures(part_index)
+        low = max(0, start - SLUR_SEARCH_MEASURES)
+        high = min(len(measures), end + SLUR_SEARCH_MEASURES)
+        open_slurs = {}
+        for index in range(low, high):
+            for note_elem in measures[index].iter('note'):
+                notations = note_elem.find('notations')
+                if notations is None:
+                    continue
+                for slur in notations.findall('slur'):
+                    number = slur.get('number', '1')
+                    if slur.get('type') == 'start':
+                        open_slurs[number] = (index, note_elem, notations, slur)
+                    elif slur.get('type') == 'stop' and number in open_slurs:
+                        first, first_note, first_notations, first_slur = open_slurs.pop(number)
+                        if first < end and index >= start:
+                            for owner, container, elem in ((first_note, first_notations, first_slur),
+                                                           (note_elem, notations, slur)):
+                                container.remove(elem)
+                                if len(container) == 0:
+                                    owner.remove(container)
+
+    def set_boundary_tie(self, part_index: int, boundary: int, tied: bool) -> None:
+        """
+        Ties (or unties) the last event before a barline to the first event after it.
+
+        Args:
+            part_index: Part position in the score (0-based)
+            boundary: Index of the measure after the barline (0-based)
+            tied: Whether the two events are tied
+        """
+        measures = self.measures(part_index)
+        if boundary <= 0 or boundary >= len(measures):
+            return
+        left = _events(measures[boundary - 1])
+        right = _events(measures[boundary])
+        if not left or not right:
+            return
+        for note_elem in left[-1]:
+            types = _tie_types(note_elem) - {'start'}
+            _set_tie_types(note_elem, types | ({'start'} if tied else set()))
+        for note_elem in right[0]:
+            types = _tie_types(note_elem) - {'stop'}
+            _set_tie_types(note_elem, types | ({'stop'} if tied else set()))
+
+    def snapshot(self, part_index: int, start: int, end: int) -> Snapshot:
+        """
+        Copies measures [start, end) of a part so a failed edit can be undone.
+
+        Args:
+            part_index: Part position in the score (0-based)
+            start: First measure to save (clamped to the part)
+            end: End of the range (exclusive, clamped to the part)
+
+        Returns:
+            Snapshot: Saved measures for restore()
+        """
+        measures = self.measures(part_index)
+        start = max(0, start)
+        return part_index, start, [copy.deepcopy(m) for m in measures[start:max(start, end)]]
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """
+        Puts measures saved by snapshot() back in place.
+
+        Args:
+            snapshot: Result of snapshot() taken before the edit
+        """
+        part_index, start, saved = snapshot
+        if not saved:
+            return
+        part = self.parts[part_index]
+        current = self.measures(part_index)
+        position = list(part).index(current[start])
+        for elem in current[start:start + len(saved)]:
+            part.remove(elem)
+        for offset, elem in enumerate(saved):
+            part.insert(position + offset, elem)
+
+    def to_bytes(self) -> bytes:
+        """Serializes the document with its original declaration and doctype."""
+        return self.header + ET.tostring(self.root, encoding='unicode').encode('utf-8')
+
+
+def fragment_measures(data: bytes) -> List[List[ET.Element]]:
+    """
+    Parses an exported fragment score into per-part measure lists.
+
+    Args:
+        data: MusicXML bytes of a score holding only the replacement measures
+
+    Returns:
+        List[List[ET.Element]]: Measure elements of each part
+    """
+    root = ET.fromstring(data)
+    return [part.findall('measure') for part in root.findall('part')]
+
+
+def event_pitches(measure: ET.Element, last: bool = False) -> Optional[Set[str]]:
+    """
+    Returns the pitches of a measure's first (or last) event as 'step/alter/octave' strings.
+
+    Args:
+        measure: Measure element
+        last: Use the last event instead of the first
+
+    Returns:
+        Optional[Set[str]]: Pitch keys, or None if the event is a rest or the measure is empty
+    """
+    events = _events(measure)
+    if not events:
+        return None
+    result = set()
+    for note_elem in events[-1 if last else 0]:
+        pitch_elem = note_elem.find('pitch')
+        if pitch_elem is None:
+            return None
+        result.add('/'.join(pitch_elem.findtext(tag, '') for tag in ('step', 'alter', 'octave')))
+    return result
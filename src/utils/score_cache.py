@@ -0,0 +1,323 @@
+"""
+Persistent score cache module
+
+This module provides a two-tier cache for rendered generation artifacts
+(MusicXML bytes, analysis JSON): a small in-memory LRU in front of a
+local SQLite database in WAL mode that survives restarts and can be
+shared safely by several worker processes.
+
+When a shared memory tier (src.utils.shared_cache) is available it
+replaces the per-process LRU, so an artifact rendered by one worker is
+served from memory by every other worker.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .shared_cache import SharedMemoryCache, open_shared_cache
+
+# Bump when generation output changes so stale artifacts are not served
+CACHE_VERSION = 4
+
+# Memory-tier hits are written to SQLite `accessed` in batches, at most this
+# often (seconds) or once this many keys are pending, so eviction still sees
+# which entries are hot without a disk write per hit
+TOUCH_INTERVAL = 10.0
+TOUCH_BATCH = 256
+
+# Eviction frees space down to this fraction of max_bytes, so a full cache
+# does not scan for victims on every put
+EVICT_TARGET = 0.9
+
+
+def cache_key(params: Dict[str, Any]) -> str:
+    """
+    Builds a stable cache key from request parameters.
+
+    Args:
+        params: JSON-serializable request parameters
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps({'v': CACHE_VERSION, 'params': params}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ScoreCache:
+    """
+    Size-bounded LRU cache of named binary artifacts per key.
+
+    Each entry is a dict of artifact name -> bytes (for example
+    {'musicxml': b'...', 'result': b'{...}'}).
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS artifacts (
+            key TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            accessed REAL NOT NULL,
+            PRIMARY KEY (key, kind)
+        );
+        CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed);
+        CREATE TABLE IF NOT EXISTS totals (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            size INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO totals (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM artifacts;
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024,
+                 memory_bytes: int = 16 * 1024 * 1024,
+                 shared: Optional[SharedMemoryCache] = None):
+        """
+        Args:
+            path: SQLite database file path
+            max_bytes: Maximum total artifact size on disk
+            memory_bytes: Maximum total artifact size in the memory tier
+            shared: Cross-process memory tier used instead of the per-process one
+        """
+        self.path = path
+        self.shared = shared
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._local = threading.local()
+        self._memory: 'OrderedDict[str, Dict[str, bytes]]' = OrderedDict()
+        self._memory_size = 0
+        self._memory_lock = threading.Lock()
+        self._touches: Dict[str, float] = {}
+        self._touched = time.monotonic()
+        self._touch_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(self._SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Returns this thread's connection (sqlite3 connections are per thread)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    # Memory tier
+
+    @staticmethod
+    def _entry_size(entry: Dict[str, bytes]) -> int:
+        return sum(len(v) for v in entry.values())
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, bytes]]:
+        if self.shared is not None:
+            return self.shared.get(key)
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self, key: str, entry: Dict[str, bytes]) -> None:
+        if self.shared is not None:
+            self.shared.put(key, entry)
+            return
+        size = self._entry_size(entry)
+        if size > self.memory_bytes:
+            return
+        with self._memory_lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= self._entry_size(old)
+            self._memory[key] = entry
+            self._memory_size += size
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= self._entry_size(evicted)
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    # Access times
+
+    def _touch(self, key: str) -> None:
+        """Records a memory-tier hit; flushes pending hits when a batch is due."""
+        with self._touch_lock:
+            self._touches[key] = time.time()
+            due = (len(self._touches) >= TOUCH_BATCH
+                   or time.monotonic() - self._touched >= TOUCH_INTERVAL)
+        if due:
+            try:
+                conn = self._conn()
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    self._flush_touches(conn)
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+            except sqlite3.Error as e:
+                print(f"[ERROR] Score cache access update failed: {e}")
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        """Writes pending memory-tier hits to SQLite `accessed`."""
+        with self._touch_lock:
+            touches, self._touches = self._touches, {}
+            self._touched = time.monotonic()
+        if touches:
+            conn.executemany('UPDATE artifacts SET accessed = MAX(accessed, ?) WHERE key = ?',
+                             [(accessed, key) for key, accessed in touches.items()])
+
+    # Public API
+
+    def get(self, key: str) -> Optional[Dict[str, bytes]]:
+        """
+        Looks up an entry.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[Dict[str, bytes]]: Artifacts by name, or None on a miss
+        """
+        entry = self._memory_get(key)
+        if entry is not None:
+            self._count(True)
+            self._touch(key)
+            return entry
+
+        try:
+            conn = self._conn()
+            rows = conn.execute('SELECT kind, data FROM artifacts WHERE key = ?', (key,)).fetchall()
+            if rows:
+                conn.execute('UPDATE artifacts SET accessed = ? WHERE key = ?', (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"[ERROR] Score cache read failed: {e}")
+            rows = []
+
+        if not rows:
+            self._count(False)
+            return None
+
+        self._count(True)
+        entry = {kind: bytes(data) for kind, data in rows}
+        self._memory_put(key, entry)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, bytes]) -> None:
+        """
+        Stores an entry (replacing any previous one for the key) and evicts
+        least recently used entries over the size limit.
+
+        Args:
+            key: Cache key
+            entry: Artifacts by name
+        """
+        self._memory_put(key, entry)
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._flush_touches(conn)
+                old_size = conn.execute(
+                    'SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE key = ?', (key,)
+                ).fetchone()[0]
+                conn.execute('DELETE FROM artifacts WHERE key = ?', (key,))
+                conn.executemany(
+                    'INSERT INTO artifacts (key, kind, data, size, accessed) VALUES (?, ?, ?, ?, ?)',
+                    [(key, kind, sqlite3.Binary(data), len(data), now) for kind, data in entry.items()]
+                )
+                conn.execute('UPDATE totals SET size = size + ? WHERE id = 0',
+                             (self._entry_size(entry) - old_size,))
+                self._evict(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"[ERROR] Score cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Removes whole entries, oldest access first, once the running total is over the limit."""
+        total = conn.execute('SELECT size FROM totals WHERE id = 0').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TARGET
+        for key, size in conn.execute(
+            'SELECT key, SUM(size) FROM artifacts GROUP BY key ORDER BY MAX(accessed)'
+        ).fetchall():
+            if total <= target:
+                break
+            conn.execute('DELETE FROM artifacts WHERE key = ?', (key,))
+            total -= size
+        conn.execute('UPDATE totals SET size = ? WHERE id = 0', (total,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counts and sizes."""
+        try:
+            conn = self._conn()
+            disk_entries = conn.execute('SELECT COUNT(DISTINCT key) FROM artifacts').fetchone()[0]
+            disk_bytes = conn.execute('SELECT size FROM totals WHERE id = 0').fetchone()[0]
+        except sqlite3.Error:
+            disk_entries, disk_bytes = None, None
+        with self._memory_lock:
+            memory_entries, memory_size = len(self._memory), self._memory_size
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        stats = {
+            'hits': hits,
+            'misses': misses,
+            'memory_entries': memory_entries,
+            'memory_bytes': memory_size,
+            'disk_entries': disk_entries,
+            'disk_bytes': disk_bytes,
+        }
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+
+def open_default_cache(default_dir: str) -> Optional[ScoreCache]:
+    """
+    Opens the cache configured by environment variables.
+
+    CHORDGEN_CACHE=0 disables the cache, CHORDGEN_CACHE_PATH sets the
+    database file and CHORDGEN_CACHE_MAX_MB / CHORDGEN_CACHE_MEMORY_MB set
+    the disk and memory limits. The shared memory tier is opened with
+    open_shared_cache (CHORDGEN_SHARED_CACHE=0 keeps the per-process tier).
+
+    Args:
+        default_dir: Directory used when CHORDGEN_CACHE_PATH is not set
+
+    Returns:
+        Optional[ScoreCache]: The cache, or None if disabled or unavailable
+    """
+    if os.environ.get('CHORDGEN_CACHE', '1') == '0':
+        return None
+    path = os.environ.get('CHORDGEN_CACHE_PATH') or os.path.join(default_dir, 'score_cache.sqlite3')
+    try:
+        max_mb = float(os.environ.get('CHORDGEN_CACHE_MAX_MB', 256))
+        memory_mb = float(os.environ.get('CHORDGEN_CACHE_MEMORY_MB', 16))
+        return ScoreCache(path, int(max_mb * 1024 * 1024), int(memory_mb * 1024 * 1024),
+                          shared=open_shared_cache(default_dir))
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"[ERROR] Score cache disabled: {e}")
+        return None
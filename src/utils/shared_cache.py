@@ -0,0 +1,407 @@
+"""
+Cross-process shared memory cache
+
+This module keeps cached artifacts in one memory-mapped file that every
+worker process maps, so a score rendered by one worker is a memory hit for
+all of them and each process does not hold its own copy.
+
+Layout of the mapped file:
+
+    header   magic, version, geometry, write head, oldest live offset
+    index    set-associative hash table (buckets x ways) of 64-byte slots
+    data     ring of entry blobs, written at a monotonically increasing head
+
+Writers serialize on an exclusive file lock. Readers take no lock: each
+slot carries a sequence number that writers make odd while they change the
+slot (a seqlock), and a reader copies the blob and then checks that the
+sequence number did not move. Before a writer overwrites ring space it
+invalidates the slots that pointed into it.
+
+Eviction approximates LRU at two levels: a full bucket replaces its least
+recently read slot, and a hit on an entry in the oldest quarter of the ring
+re-appends it at the head so hot entries are not overwritten.
+
+The backing file usually lives in a world-writable directory (/dev/shm),
+so it is opened without following symlinks and used only if it is a
+regular file owned by this user with no group or other permissions.
+Entries are plain bytes; nothing read from the file is unpickled.
+
+Requires fcntl (Unix); open_shared_cache returns None elsewhere.
+"""
+
+import hashlib
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no shared tier
+    fcntl = None
+
+_MAGIC = b'CGSC'
+_VERSION = 1
+_HEADER = struct.Struct('<4sIIIQQQ')      # magic, version, buckets, ways, data size, head, oldest
+_HEADER_SIZE = 64
+_SLOT = struct.Struct('<Q32sQIQ4x')       # seq, key digest, offset, length, last read (ns)
+_SLOT_SIZE = 64
+_SEQ = struct.Struct('<Q')
+_ACCESS = struct.Struct('<Q')
+_ACCESS_OFFSET = 52
+_EMPTY_KEY = bytes(32)
+
+# Entry framing: item count, then (name length, data length, name) per item, then the data
+_COUNT = struct.Struct('<H')
+_ITEM = struct.Struct('<BI')
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.sha256(key.encode('utf-8')).digest()
+
+
+def _check_private(fd: int, path: str) -> None:
+    """Raises OSError unless fd is a regular file owned by us and private to us."""
+    st = os.fstat(fd)
+    if not stat.S_ISREG(st.st_mode) or st.st_uid != os.geteuid() or st.st_mode & 0o077:
+        raise OSError(f"Shared cache file is not a private file of this user: {path}")
+
+
+def _encode(entry: Dict[str, bytes]) -> bytes:
+    parts = [_COUNT.pack(len(entry))]
+    for name, data in entry.items():
+        encoded = name.encode('utf-8')
+        parts.append(_ITEM.pack(len(encoded), len(data)))
+        parts.append(encoded)
+    parts.extend(entry.values())
+    return b''.join(parts)
+
+
+class SharedMemoryCache:
+    """
+    Size-bounded artifact cache in a memory-mapped file shared by processes.
+
+    Entries are dicts of artifact name -> bytes, like ScoreCache entries.
+    """
+
+    def __init__(self, path: str, size_bytes: int = 64 * 1024 * 1024, buckets: int = 1024,
+                 ways: int = 8):
+        """
+        Args:
+            path: Backing file (preferably on tmpfs, e.g. /dev/shm)
+            size_bytes: Size of the data ring
+            buckets: Number of index buckets
+            ways: Slots per bucket
+        """
+        if fcntl is None:
+            raise OSError("Shared memory cache requires fcntl")
+        self.path = path
+        self.buckets = buckets
+        self.ways = ways
+        self.data_size = size_bytes
+        self._index_start = _HEADER_SIZE
+        self._data_start = _HEADER_SIZE + buckets * ways * _SLOT_SIZE
+        self.hits = 0
+        self.misses = 0
+        # flock does not exclude threads sharing one descriptor
+        self._thread_lock = threading.Lock()
+
+        total = self._data_start + size_bytes
+        expected = (_MAGIC, _VERSION, buckets, ways, size_bytes)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+        try:
+            _check_private(fd, path)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                size = os.fstat(fd).st_size
+                header = os.pread(fd, _HEADER.size, 0)
+                if size == 0:
+                    os.ftruncate(fd, total)
+                    os.pwrite(fd, _HEADER.pack(*expected, 0, 0), 0)
+                elif (size != total or len(header) < _HEADER.size
+                        or _HEADER.unpack(header)[:5] != expected):
+                    # Different geometry: replace the file rather than resize it
+                    # under processes that still map the old one
+                    fd = self._replace(fd, total, expected)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._mm = mmap.mmap(fd, total, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def _replace(self, fd: int, total: int, header: tuple) -> int:
+        """Swaps in a fresh, empty file and returns its locked descriptor."""
+        directory, name = os.path.split(os.path.abspath(self.path))
+        new_fd, tmp = tempfile.mkstemp(prefix=f'{name}.', suffix='.tmp', dir=directory)
+        try:
+            fcntl.flock(new_fd, fcntl.LOCK_EX)
+            os.ftruncate(new_fd, total)
+            os.pwrite(new_fd, _HEADER.pack(*header, 0, 0), 0)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.close(new_fd)
+            os.unlink(tmp)
+            raise
+        os.close(fd)
+        return new_fd
+
+    # Index
+
+    def _bucket(self, digest: bytes) -> range:
+        first = int.from_bytes(digest[:4], 'little') % self.buckets * self.ways
+        return range(first, first + self.ways)
+
+    def _slot_pos(self, slot: int) -> int:
+        return self._index_start + slot * _SLOT_SIZE
+
+    def _read_head(self):
+        return _HEADER.unpack_from(self._mm, 0)[5:7]
+
+    def _write_head(self, head: int, oldest: int) -> None:
+        struct.pack_into('<QQ', self._mm, 24, head, oldest)
+
+    def _write_slot(self, slot: int, digest: bytes, offset: int, length: int) -> None:
+        pos = self._slot_pos(slot)
+        seq = _SEQ.unpack_from(self._mm, pos)[0]
+        _SEQ.pack_into(self._mm, pos, seq + 1)
+        _SLOT.pack_into(self._mm, pos, seq + 1, digest, offset, length, time.monotonic_ns())
+        _SEQ.pack_into(self._mm, pos, seq + 2)
+
+    def _find(self, digest: bytes):
+        """Returns (slot, seq, offset, length) of a key, or None."""
+        for slot in self._bucket(digest):
+            seq, key, offset, length, _ = _SLOT.unpack_from(self._mm, self._slot_pos(slot))
+            if key == digest and not seq & 1:
+                return slot, seq, offset, length
+        return None
+
+    # Ring
+
+    def _reserve(self, length: int) -> int:
+        """
+        Reserves ring space for a blob (caller holds the lock) and returns its
+        logical offset, invalidating every slot whose data it overwrites.
+        """
+        head, oldest = self._read_head()
+        physical = head % self.data_size
+        if physical + length > self.data_size:
+            # Blobs never wrap around the end of the ring
+            head += self.data_size - physical
+        end = head + length
+        limit = end - self.data_size
+        if oldest < limit:
+            oldest = end
+            for slot in range(self.buckets * self.ways):
+                pos = self._slot_pos(slot)
+                _, key, offset, _, _ = _SLOT.unpack_from(self._mm, pos)
+                if key == _EMPTY_KEY:
+                    continue
+                if offset < limit:
+                    self._write_slot(slot, _EMPTY_KEY, 0, 0)
+                else:
+                    oldest = min(oldest, offset)
+        self._write_head(end, min(oldest, head))
+        return head
+
+    def _append(self, digest: bytes, blob: bytes) -> None:
+        """Writes a blob and points the key's slot at it (caller holds the lock)."""
+        offset = self._reserve(len(blob))
+        start = self._data_start + offset % self.data_size
+        self._mm[start:start + len(blob)] = blob
+
+        found = self._find(digest)
+        if found is not None:
+            slot = found[0]
+        else:
+            # Empty slot, otherwise the least recently read one in the bucket
+            def rank(s):
+                _, key, _, _, access = _SLOT.unpack_from(self._mm, self._slot_pos(s))
+                return (key != _EMPTY_KEY, access)
+            slot = min(self._bucket(digest), key=rank)
+        self._write_slot(slot, digest, offset, len(blob))
+
+    def _lock(self):
+        self._thread_lock.acquire()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def _unlock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    # Public API
+
+    def get(self, key: str) -> Optional[Dict[str, bytes]]:
+        """
+        Looks up an entry without locking.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[Dict[str, bytes]]: Artifacts by name, or None on a miss
+        """
+        digest = _digest(key)
+        found = self._find(digest)
+        entry = None
+        if found is not None:
+            slot, seq, offset, length = found
+            entry = self._read_entry(offset, length)
+            pos = self._slot_pos(slot)
+            if _SEQ.unpack_from(self._mm, pos)[0] != seq:
+                entry = None  # rewritten while reading
+            else:
+                _ACCESS.pack_into(self._mm, pos + _ACCESS_OFFSET, time.monotonic_ns())
+                head, _ = self._read_head()
+                if offset < head - self.data_size * 3 // 4:
+                    self._promote(digest, seq)
+
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def _read_entry(self, offset: int, length: int) -> Optional[Dict[str, bytes]]:
+        """Copies an entry's artifacts straight out of the mapping."""
+        mm = self._mm
+        pos = self._data_start + offset % self.data_size
+        end = pos + length
+        try:
+            count = _COUNT.unpack_from(mm, pos)[0]
+            pos += _COUNT.size
+            items = []
+            for _ in range(count):
+                name_length, data_length = _ITEM.unpack_from(mm, pos)
+                pos += _ITEM.size
+                items.append((mm[pos:pos + name_length].decode('utf-8'), data_length))
+                pos += name_length
+            entry = {}
+            for name, data_length in items:
+                if pos + data_length > end:
+                    return None
+                entry[name] = mm[pos:pos + data_length]
+                pos += data_length
+            return entry
+        except (struct.error, UnicodeDecodeError):
+            return None  # torn read; the sequence check discards it as well
+
+    def _promote(self, digest: bytes, seq: int) -> None:
+        """Re-appends a hot entry that is about to be overwritten."""
+        self._lock()
+        try:
+            found = self._find(digest)
+            if found is None or found[1] != seq:
+                return
+            _, _, offset, length = found
+            start = self._data_start + offset % self.data_size
+            self._append(digest, self._mm[start:start + length])
+        finally:
+            self._unlock()
+
+    def put(self, key: str, entry: Dict[str, bytes]) -> None:
+        """
+        Stores an entry (entries larger than a quarter of the ring are skipped).
+
+        Args:
+            key: Cache key
+            entry: Artifacts by name
+        """
+        blob = _encode(entry)
+        if len(blob) > self.data_size // 4:
+            return
+        self._lock()
+        try:
+            self._append(_digest(key), blob)
+        finally:
+            self._unlock()
+
+    def get_or_build(self, key: str, build: Callable[[], bytes], load: Callable[[bytes], None]) -> bool:
+        """
+        Loads a shared value published by another process, or builds and publishes it.
+
+        The first process to take the lock builds; the others wait and load.
+
+        Args:
+            key: Cache key
+            build: Sets the value up in this process and returns it serialized
+            load: Installs a serialized value published by another process
+
+        Returns:
+            bool: True if the value was loaded from the cache
+        """
+        entry = self.get(key)
+        if entry is None:
+            self._lock()
+            try:
+                found = self._find(_digest(key))
+                if found is not None:
+                    entry = self._read_entry(found[2], found[3])
+                if entry is None:
+                    data = build()
+                    blob = _encode({'value': data})
+                    if len(blob) <= self.data_size // 4:
+                        self._append(_digest(key), blob)
+                    return False
+            finally:
+                self._unlock()
+        load(entry['value'])
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counts and current occupancy."""
+        entries = used = 0
+        for slot in range(self.buckets * self.ways):
+            _, key, _, length, _ = _SLOT.unpack_from(self._mm, self._slot_pos(slot))
+            if key != _EMPTY_KEY:
+                entries += 1
+                used += length
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': used,
+            'size_bytes': self.data_size,
+        }
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+def open_shared_cache(default_dir: str) -> Optional[SharedMemoryCache]:
+    """
+    Opens the shared memory tier configured by environment variables.
+
+    CHORDGEN_SHARED_CACHE=0 disables it, CHORDGEN_SHARED_CACHE_PATH sets the
+    backing file (default: /dev/shm when available, otherwise default_dir)
+    and CHORDGEN_SHARED_CACHE_MB sets the ring size.
+
+    Args:
+        default_dir: Directory used when /dev/shm is not available
+
+    Returns:
+        Optional[SharedMemoryCache]: The cache, or None if disabled or unsupported
+    """
+    if fcntl is None or os.environ.get('CHORDGEN_SHARED_CACHE', '1') == '0':
+        return None
+    path = os.environ.get('CHORDGEN_SHARED_CACHE_PATH')
+    if not path:
+        # One file per installation so separate checkouts do not share entries
+        tag = hashlib.sha1(os.path.abspath(default_dir).encode('utf-8')).hexdigest()[:12]
+        if os.path.isdir('/dev/shm'):
+            path = os.path.join('/dev/shm', f'chordgen-{tag}.cache')
+        else:
+            path = os.path.join(default_dir, 'score_cache.shm')
+    try:
+        size_mb = float(os.environ.get('CHORDGEN_SHARED_CACHE_MB', 64))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SharedMemoryCache(path, int(size_mb * 1024 * 1024))
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Shared memory cache disabled: {e}")
+        return None
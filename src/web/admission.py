@@ -0,0 +1,296 @@
+"""
+Admission control for the web API
+
+Limits how much CPU-bound generation work runs at once, caps how much
+work may wait in the queue, and rate-limits each client with a token
+bucket. Rejected requests get a fast 429 response with Retry-After so the
+server degrades gracefully under bursts instead of queueing without bound.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Tuple
+
+from flask import jsonify, make_response, request
+
+
+def env_float(name: str, default: float) -> float:
+    """Reads a float setting from the environment."""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        print(f"[WARNING] Invalid value for {name}, using {default}")
+        return default
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Holds up to `burst` tokens and refills at `rate` tokens per second.
+    Not thread-safe on its own; ClientRateLimiter serializes access.
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """
+        Takes `cost` tokens if available.
+
+        Args:
+            cost: Number of tokens to take (capped at the burst size)
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds until they will be
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        cost = min(cost, self.burst)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def give(self, cost: float) -> None:
+        """Returns `cost` tokens taken by an earlier take() (up to the burst size)."""
+        self.tokens = min(self.burst, self.tokens + min(cost, self.burst))
+
+
+class ClientRateLimiter:
+    """
+    Per-client token buckets, bounded to the most recently seen clients.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client: str, cost: float) -> None:
+        """
+        Charges `cost` tokens to a client.
+
+        Raises:
+            Rejected: If the client has exhausted its bucket
+        """
+        if self.rate <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.pop(client, None)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[client] = bucket
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            wait = bucket.take(cost)
+        if wait:
+            raise Rejected('Rate limit exceeded', wait)
+
+    def refund(self, client: str, cost: float) -> None:
+        """Returns tokens charged by check() for a request that was not admitted."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is not None:
+                bucket.give(cost)
+
+
+class AdmissionController:
+    """
+    Cost-weighted concurrency limiter with a bounded wait queue.
+
+    At most `max_running` cost units execute at once (a single request
+    larger than that still runs when nothing else is running). Waiting
+    requests may hold at most `max_queued` cost units; anything beyond that,
+    or anything that waits longer than `queue_timeout`, is rejected.
+    """
+
+    def __init__(self, max_running: float, max_queued: float, queue_timeout: float):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.running = 0.0
+        self.queued = 0.0
+        # Moving average of seconds spent per cost unit, for Retry-After estimates
+        self.seconds_per_unit = 0.01
+        self._cond = threading.Condition()
+
+    def _estimate_wait(self) -> float:
+        return max(1.0, (self.running + self.queued) * self.seconds_per_unit)
+
+    def _fits(self, cost: float) -> bool:
+        return self.running == 0 or self.running + cost <= self.max_running
+
+    def acquire(self, cost: float) -> None:
+        """
+        Waits for capacity to run a request of the given cost.
+
+        Raises:
+            Rejected: If the queue is full or the wait times out
+        """
+        with self._cond:
+            if self._fits(cost) and self.queued == 0:
+                self.running += cost
+                return
+            if self.queued + cost > self.max_queued:
+                raise Rejected('Server busy: queue is full', self._estimate_wait())
+            self.queued += cost
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while not self._fits(cost):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Rejected('Server busy: queue wait timed out', self._estimate_wait())
+                    self._cond.wait(remaining)
+            finally:
+                self.queued -= cost
+            self.running += cost
+
+    def release(self, cost: float, elapsed: float) -> None:
+        """Returns capacity and records how long the request took."""
+        with self._cond:
+            self.running -= cost
+            if cost > 0:
+                self.seconds_per_unit = 0.8 * self.seconds_per_unit + 0.2 * (elapsed / cost)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the current load."""
+        with self._cond:
+            return {
+                'running_cost': self.running,
+                'queued_cost': self.queued,
+                'max_running_cost': self.max_running,
+                'max_queued_cost': self.max_queued,
+            }
+
+
+def reject_response(exc: Rejected):
+    """Builds the 429 response for a rejected request."""
+    retry_after = max(1, int(math.ceil(exc.retry_after)))
+    response = jsonify({'success': False, 'error': exc.reason, 'retry_after': retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def _client_id() -> str:
+    forwarded = request.headers.get('X-Forwarded-For', '')
+    if forwarded and os.environ.get('CHORDGEN_TRUST_PROXY') == '1':
+        return forwarded.split(',')[0].strip()
+    return request.remote_addr or 'unknown'
+
+
+# Settings (environment variables)
+#   CHORDGEN_MAX_RUNNING_COST  cost units (measures x parts) running at once
+#   CHORDGEN_MAX_QUEUED_COST   cost units allowed to wait for a slot
+#   CHORDGEN_QUEUE_TIMEOUT     seconds a request may wait before 429
+#   CHORDGEN_RATE              per-client tokens (cost units) per second, 0 disables
+#   CHORDGEN_BURST             per-client bucket size
+controller = AdmissionController(
+    max_running=env_float('CHORDGEN_MAX_RUNNING_COST', 256),
+    max_queued=env_float('CHORDGEN_MAX_QUEUED_COST', 1024),
+    queue_timeout=env_float('CHORDGEN_QUEUE_TIMEOUT', 10),
+)
+rate_limiter = ClientRateLimiter(
+    rate=env_float('CHORDGEN_RATE', 64),
+    burst=env_float('CHORDGEN_BURST', 512),
+)
+
+
+def admit(cost: float) -> Callable[[], None]:
+    """
+    Charges the current client and reserves capacity for work that may
+    outlive the request (such as a background job).
+
+    Args:
+        cost: Work cost in cost units
+
+    Returns:
+        Callable[[], None]: Releases the capacity; call it exactly once when the work ends
+
+    Raises:
+        Rejected: If the client is rate limited or the server is busy (a
+            request rejected by the controller is not charged to the client)
+    """
+    client = _client_id()
+    rate_limiter.check(client, cost)
+    try:
+        controller.acquire(cost)
+    except Rejected:
+        rate_limiter.refund(client, cost)
+        raise
+    started = time.monotonic()
+    return lambda: controller.release(cost, time.monotonic() - started)
+
+
+def admission_limited(cost_fn: Callable[[dict], float]):
+    """
+    Decorator that applies rate limiting and admission control to a view.
+
+    Args:
+        cost_fn: Computes the request cost from the JSON payload
+
+    Returns:
+        Callable: Decorator
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                cost = float(cost_fn(request.get_json(silent=True) or {}))
+            except (TypeError, ValueError):
+                cost = 1.0
+            try:
+                release = admit(cost)
+            except Rejected as exc:
+                return reject_response(exc)
+            streamed = False
+            try:
+                response = make_response(view(*args, **kwargs))
+                if response.is_streamed:
+                    # Streaming bodies do their work after the view returns
+                    response.call_on_close(release)
+                    streamed = True
+                return response
+            finally:
+                if not streamed:
+                    release()
+        return wrapper
+    return decorator
+
+
+def server_options() -> Tuple[int, int, int]:
+    """
+    Returns waitress (threads, connection_limit, backlog) from the environment.
+
+    Returns:
+        Tuple[int, int, int]: waitress settings
+    """
+    threads = int(env_float('CHORDGEN_THREADS', 8))
+    connection_limit = int(env_float('CHORDGEN_CONNECTION_LIMIT', 100))
+    backlog = int(env_float('CHORDGEN_BACKLOG', 64))
+    return threads, connection_limit, backlog
@@ -1,7 +1,16 @@
+import gzip
+import json
+import math
 import os
+import random
 import sys
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from itertools import chain
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 from datetime import datetime
 from music21 import stream, metadata
 
@@ -10,96 +19,967 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.core import (
-    generate_progression,
-    progression_to_part,
-    generate_melody_part,
-    analyze_harmony
+    ACCOMPANIMENT_PARTS,
+    analyze_compact,
+    analyze_harmony,
+    analyze_batch,
+    plan_form,
+    form_progression,
+    PROGRESSION_STYLES,
+    render_form,
+    render_form_events,
+    render_text,
+    render_previews,
+    section_marks,
+    analyze_form,
+    check_deadline,
+    corpus_model,
+    deadline_at,
+    DeadlineExceeded,
+    export_tables,
+    get_meter,
+    install_tables,
+    precompute_tables,
+    harmonize_melody,
+    harmonize_weights,
+    melody_measure_count,
+    select_fields,
+    span,
+    TEXT_FORMATS,
+    to_ticks,
+    Tracer,
+    TraceWriter
 )
-from src.utils import create_musicxml_download
+from src.core.chord_tables import FIGURES, TABLE_FORMAT
+from src.core.harmonizer import MAX_MEASURES
+from src.utils import (
+    score_to_musicxml,
+    musicxml_download_html,
+    download_html,
+    cache_key,
+    open_default_cache,
+    open_musicxml,
+    read_musicxml,
+    scan_musicxml
+)
+from src.web.admission import (
+    Rejected, admission_limited, admit, controller, env_float, reject_response, server_options
+)
+from src.web.fastjson import FastJSONProvider, dumps, dumps_bytes
+from src.web.previews import PreviewStore, is_digest
+from src.web.profiler import PROFILE_MAX_SECONDS, admin_authorized, sampler
+from src.web.progress import SSE_HOLD, SSE_RETRY_MS, event_stream, jobs
+from src.web.sessions import DOCUMENT_OVERHEAD, REROLL_TARGETS, reroll, store as sessions
+from src.web.singleflight import Emit, SingleFlight
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+
+# 시드가 고정된 동일 요청 병합
+flights = SingleFlight()
+
+# 재시작 후에도 유지되는 생성 결과 캐시 (SQLite, 기본 위치: instance/)
+score_cache = open_default_cache(str(project_root / 'instance'))
+
+def load_chord_tables() -> None:
+    """조성 테이블을 준비합니다 (공유 메모리에 있으면 다른 워커가 만든 것을 사용)"""
+    if score_cache is None or score_cache.shared is None:
+        precompute_tables()
+        return
+    try:
+        score_cache.shared.get_or_build(cache_key({'chord_tables': FIGURES, 'format': TABLE_FORMAT}),
+                                        export_tables, install_tables)
+    except ValueError as e:
+        # 공유 메모리의 데이터가 깨졌으면 이 워커에서 직접 만듦
+        print(f"[ERROR] Shared chord tables ignored: {e}")
+        precompute_tables()
+
+load_chord_tables()
+
+# 내용 해시로 찾는 미리보기 SVG (gzip으로 압축해 생성 결과 캐시에 함께 저장)
+previews = PreviewStore(score_cache)
+
+# 느린 요청만 남기는 구간 추적 (CHORDGEN_TRACE=1, 기본 위치: instance/traces/)
+tracer = Tracer(
+    TraceWriter(
+        os.environ.get('CHORDGEN_TRACE_PATH') or str(project_root / 'instance' / 'traces' / 'trace-{pid}.json'),
+        max_bytes=int(env_float('CHORDGEN_TRACE_MAX_MB', 16) * 1024 * 1024),
+        backups=int(env_float('CHORDGEN_TRACE_FILES', 4))
+    ) if os.environ.get('CHORDGEN_TRACE') == '1' else None,
+    threshold_ms=env_float('CHORDGEN_TRACE_MS', 500)
+)
+
+# 추적하지 않는 엔드포인트 (오래 열려 있는 SSE, 프로파일러, 미리보기와 정적 파일)
+UNTRACED_ENDPOINTS = {'job_events', 'debug_profile', 'svg_preview', 'static'}
+
+# 요청 마감 시간(초, 0이면 없음). 요청의 'timeout'(또는 ?timeout=)은 이보다 짧게만 줄 수 있음
+DEFAULT_DEADLINE = env_float('CHORDGEN_DEADLINE', 30)
+
+# 마감 시간을 적용하는 엔드포인트 (부분 재생성은 세션을 제자리에서 고치므로 중간에 멈추지 않음)
+DEADLINE_ENDPOINTS = {'generate', 'create_job', 'analyze', 'upload', 'harmonize'}
+
+@app.before_request
+def begin_trace():
+    """요청 추적 시작"""
+    if tracer.enabled and request.endpoint not in UNTRACED_ENDPOINTS:
+        g.trace = tracer.begin(f"{request.method} {request.path}")
+
+@app.before_request
+def begin_deadline():
+    """요청 마감 시각 계산 (대기열에서 기다린 시간도 포함되도록 요청 도착 시점 기준)"""
+    if request.endpoint not in DEADLINE_ENDPOINTS:
+        return None
+    data = request.get_json(silent=True)
+    value = (data if isinstance(data, dict) else {}).get('timeout', request.args.get('timeout'))
+    seconds = DEFAULT_DEADLINE if DEFAULT_DEADLINE > 0 else None
+    if value is not None:
+        try:
+            requested = float(value)
+        except (TypeError, ValueError):
+            requested = 0
+        if not requested > 0:
+            return jsonify({
+                'success': False,
+                'error': 'timeout must be a positive number of seconds'
+            }), 400
+        seconds = requested if seconds is None else min(seconds, requested)
+    g.deadline_at = None if seconds is None else time.monotonic() + seconds
+    return None
+
+def timeout_body(exc: DeadlineExceeded) -> Dict[str, Any]:
+    """마감 초과 응답 본문 (멈추기 전까지 만든 결과는 'partial')"""
+    return {'success': False, 'error': str(exc), 'timeout': True, 'partial': exc.partial}
+
+@app.after_request
+def record_status(response: Response) -> Response:
+    """추적에 응답 코드 기록"""
+    if g.get('trace') is not None:
+        g.trace[0].args['status'] = response.status_code
+    return response
+
+@app.teardown_request
+def end_trace(exc: Optional[BaseException]) -> None:
+    """요청 추적 종료 (임계값 이상이면 파일에 기록)"""
+    handle = g.pop('trace', None)
+    if handle is not None:
+        tracer.end(handle, **({'error': type(exc).__name__} if exc is not None else {}))
 
 @app.route('/')
 def index():
     """메인 페이지 렌더링"""
-    return render_template('index.html')
+    return render_template('index.html', styles=available_styles())
 
-@app.route('/api/generate', methods=['POST'])
-def generate():
-    """코드 진행 생성 API"""
+def parse_accompaniment(value: Any) -> Tuple[str, ...]:
+    """반주 파트 목록을 정규화합니다 (리스트 또는 쉼표 구분 문자열, 알 수 없는 파트는 무시)."""
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        return ()
+    names = [str(v).strip() for v in value]
+    return tuple(kind for kind in ACCOMPANIMENT_PARTS if kind in names)
+
+def parse_fields(data: dict) -> Optional[Tuple[str, ...]]:
+    """압축 분석 항목 선택 (JSON 'fields' 또는 ?fields=, 없으면 None = 기존 문장형 분석, 알 수 없는 항목은 ValueError)"""
+    value = data.get('fields', request.args.get('fields'))
+    return None if value is None else select_fields(value)
+
+# 악보 형식별 (확장자, MIME 타입)
+EXPORT_FORMATS = {
+    'musicxml': ('musicxml', 'application/vnd.recordare.musicxml+xml'),
+    'abc': ('abc', 'text/vnd.abc'),
+    'ly': ('ly', 'text/x-lilypond'),
+}
+
+def parse_format(data: dict) -> str:
+    """악보 형식 (JSON 'format' 또는 ?format=, 기본 MusicXML)"""
+    fmt = str(data.get('format', request.args.get('format', 'musicxml')))
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+def available_styles() -> Tuple[str, ...]:
+    """지금 쓸 수 있는 코드 진행 스타일 ('chorale'은 학습한 모델 파일을 열 수 있을 때만)"""
     try:
-        data = request.json
-        tonic = data.get('tonic', 'C')
-        mode = data.get('mode', 'major')
-        time_sig = data.get('time_sig', '4/4')
-        length = int(data.get('length', 8))
-        structure = data.get('structure', 'A')
-        add_melody = data.get('add_melody', True)
-        rhythm_option = data.get('rhythm_option', 'random')
-        use_slurs = data.get('use_slurs', False)
-        use_ties = data.get('use_ties', False)
-        only_melody = data.get('only_melody', False)
-
-        # 코드 진행 생성
-        def get_section(l):
-            return generate_progression(tonic, mode, l)
+        corpus_model()
+    except (OSError, ValueError):
+        return tuple(style for style in PROGRESSION_STYLES if style != 'chorale')
+    return PROGRESSION_STYLES
+
+def parse_style(data: dict) -> str:
+    """코드 진행 스타일 (기본 교과서 패턴, 'chorale'은 코퍼스 학습 모델)"""
+    style = str(data.get('style', 'textbook'))
+    if style not in PROGRESSION_STYLES:
+        raise ValueError(f"style must be one of {', '.join(PROGRESSION_STYLES)}")
+    if style == 'chorale':
+        # 모델이 없으면 생성 중 500 대신 요청 오류로
+        corpus_model()
+    return style
+
+def parse_time_sig(data: dict) -> str:
+    """박자표 (기본 4/4, 형식이 잘못되었거나 너무 큰 박자표는 ValueError)"""
+    time_sig = str(data.get('time_sig', '4/4'))
+    get_meter(time_sig)
+    return time_sig
+
+def parse_generate_params(data: dict) -> Dict[str, Any]:
+    """생성 요청 JSON을 정규화된 파라미터로 변환합니다."""
+    seed = data.get('seed')
+    return {
+        'tonic': data.get('tonic', 'C'),
+        'mode': data.get('mode', 'major'),
+        'time_sig': parse_time_sig(data),
+        'length': int(data.get('length', 8)),
+        'structure': data.get('structure', 'A'),
+        'style': parse_style(data),
+        'add_melody': bool(data.get('add_melody', True)),
+        'rhythm_option': data.get('rhythm_option', 'random'),
+        'use_slurs': bool(data.get('use_slurs', False)),
+        'use_ties': bool(data.get('use_ties', False)),
+        'only_melody': bool(data.get('only_melody', False)),
+        'use_repeats': bool(data.get('use_repeats', False)),
+        'accompaniment': parse_accompaniment(data.get('accompaniment')),
+        'bass_style': data.get('bass_style', 'root'),
+        'session': bool(data.get('session', False)),
+        'voicing': data.get('voicing', 'random'),
+        'fields': parse_fields(data),
+        'format': parse_format(data),
+        'seed': None if seed is None else int(seed),
+    }
+
+def shared_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """생성 결과를 결정하는 파라미터 (편집 세션 여부는 결과를 받은 뒤 클라이언트마다 따로 처리)"""
+    return {name: value for name, value in params.items() if name != 'session'}
+
+def request_key(params: Dict[str, Any]) -> Optional[Tuple]:
+    """시드가 고정된 요청의 식별 키 (시드가 없으면 결과가 매번 달라지므로 None)"""
+    if params['seed'] is None:
+        return None
+    return tuple(sorted(shared_params(params).items()))
+
+def generate_cost(data: dict) -> float:
+    """생성 요청 비용 (마디 수 × 파트 수, 진행 중인 동일 요청에 합류하면 1)"""
+    params = parse_generate_params(data)
+    key = request_key(params)
+    if key is not None and flights.in_flight(key):
+        return 1
+    add_melody = params['add_melody']
+    if add_melody and params['only_melody']:
+        parts = 1
+    else:
+        parts = (2 if add_melody else 1) + len(params['accompaniment'])
+    return max(1, params['length']) * parts
+
+def score_title(params: Dict[str, Any]) -> str:
+    """악보 제목"""
+    return f"{params['tonic'].upper()} {params['mode'].capitalize()} Progression"
+
+def store_previews(params: Dict[str, Any], progression: List[str], melody: list,
+                   timeline: list, marks: Dict[int, str]) -> Dict[str, str]:
+    """코드표와 피아노 롤 SVG를 그려 저장하고 종류별 내용 해시를 반환합니다."""
+    with span('previews'):
+        rendered = render_previews(progression, melody, timeline, params['tonic'], params['mode'],
+                                   params['time_sig'], score_title(params), marks)
+        return {kind: previews.put(svg) for kind, svg in rendered.items()}
+
+def build_generation(params: Dict[str, Any], emit: Optional[Emit] = None) -> Dict[str, Any]:
+    """
+    코드 진행 생성, 화성 분석, MusicXML 내보내기를 수행합니다.
+
+    Args:
+        params: parse_generate_params로 정규화된 파라미터
+        emit: 진행 이벤트 콜백 (section, measures, analysis, export 순으로 호출)
+
+    Returns:
+        Dict[str, Any]: 코드 진행, 분석 결과, MusicXML 바이트
+
+    Raises:
+        DeadlineExceeded: 현재 요청의 마감 시각이 지난 경우 (partial에 코드 진행)
+    """
+    tonic = params['tonic']
+    mode = params['mode']
+    length = params['length']
+    rng = random.Random(params['seed'])
+
+    # 형식별 코드 진행 생성 (같은 섹션은 한 번만 생성)
+    with span('plan_form', structure=params['structure'], measures=length):
+        sections = plan_form(params['structure'], tonic, mode, length, rng, params['style'])
+    prog = form_progression(sections)
+    try:
+        return render_generation(params, sections, prog, rng, emit)
+    except DeadlineExceeded as exc:
+        exc.partial.setdefault('progression', prog)
+        exc.partial.setdefault('progression_text', " | ".join(prog))
+        raise
+
+def render_generation(params: Dict[str, Any], sections: list, prog: List[str],
+                      rng: random.Random, emit: Optional[Emit] = None) -> Dict[str, Any]:
+    """
+    build_generation의 렌더링 단계 (멜로디·코드 파트, 화성 분석, 악보 내보내기).
+
+    Raises:
+        DeadlineExceeded: 마감 시각이 지난 경우 (분석을 마쳤으면 partial에 담김)
+    """
+    tonic = params['tonic']
+    mode = params['mode']
+    time_sig = params['time_sig']
+    progress = None
+    if emit is not None:
+        # 코드 진행은 렌더링 전에 확정되므로 섹션 단위로 먼저 보냄
+        done_prog = []
+        for index, (label, section) in enumerate(sections):
+            done_prog.extend(section)
+            emit('section', {
+                'index': index,
+                'section': label,
+                'progression': section,
+                'progression_text': " | ".join(done_prog)
+            })
+        
+        unique = {label: len(section) for label, section in sections}
+        part_count = 1 if params['add_melody'] else 0
+        if not (params['add_melody'] and params['only_melody']):
+            # 텍스트 악보는 반주 파트 없이 화음 타임라인만 만듦
+            part_count += 1 if params['format'] in TEXT_FORMATS else 1 + len(params['accompaniment'])
+        rendered = {'measures': 0, 'total': sum(unique.values()) * part_count}
         
-        if structure == 'A':
-            prog = get_section(length)
-        elif structure == 'AABA':
-            a_len = length // 4
-            b_len = length - a_len * 3
-            prog = get_section(a_len) * 2 + get_section(b_len) + get_section(a_len)
-        else:  # AB
-            a_len = length // 2
-            b_len = length - a_len
-            prog = get_section(a_len) + get_section(b_len)
-
-        # 스코어 생성
+        def progress(kind: str, label: str, measures: int) -> None:
+            rendered['measures'] += measures
+            emit('measures', {'part': kind, 'section': label, **rendered})
+
+    # 스코어 생성 (서로 다른 섹션만 렌더링, 반복 섹션은 복제 또는 도돌이표,
+    # 코드와 반주 파트는 섹션별 화음 타임라인 하나를 공유)
+    # ABC/LilyPond는 music21 스트림 없이 멜로디 이벤트와 화음 타임라인에서 바로 씀
+    title = score_title(params)
+    timelines: Dict[str, list] = {}
+    score, parts, melody = None, [], {}
+    if params['format'] in TEXT_FORMATS:
+        with span('render_events'):
+            melody, timelines = render_form_events(
+                sections, tonic, mode, time_sig,
+                add_melody=params['add_melody'], only_melody=params['only_melody'],
+                rhythm_option=params['rhythm_option'], voicing=params['voicing'], rng=rng,
+                progress=progress
+            )
+    else:
         score = stream.Score()
         score.metadata = metadata.Metadata()
-        score.metadata.title = f"{tonic.upper()} {mode.capitalize()} Progression"
-        
-        if add_melody:
-            melody_part = generate_melody_part(
-                prog, tonic, mode, time_sig,
-                rhythm_option, use_slurs, use_ties
+        score.metadata.title = title
+        with span('render_form'):
+            parts = render_form(
+                sections, tonic, mode, time_sig,
+                add_melody=params['add_melody'], only_melody=params['only_melody'],
+                rhythm_option=params['rhythm_option'], use_slurs=params['use_slurs'],
+                use_ties=params['use_ties'], voicing=params['voicing'],
+                use_repeats=params['use_repeats'], accompaniment=params['accompaniment'],
+                bass_style=params['bass_style'], rng=rng, timelines=timelines, progress=progress,
+                events=melody
             )
-            score.append(melody_part)
-            if not only_melody:
-                chord_part = progression_to_part(prog, tonic, mode, time_sig)
-                score.append(chord_part)
-        else:
-            chord_part = progression_to_part(prog, tonic, mode, time_sig)
-            score.append(chord_part)
+        for part in parts:
+            score.append(part)
+
+    # 화성 분석 (문장형은 섹션별 한 번, 압축형은 요청한 항목만)
+    if params['fields'] is None:
+        analysis = analyze_form(sections, tonic, mode)
+    else:
+        analysis = analyze_compact(prog, tonic, mode, params['fields'])
+    if emit is not None:
+        emit('analysis', {'analysis': analysis})
+    
+    # MusicXML 또는 텍스트 악보 렌더링 (music21 내보내기는 중간에 멈출 수 없으므로 시작 전에 확인)
+    musicxml, notation, size = None, None, 0
+    try:
+        check_deadline()
+    except DeadlineExceeded as exc:
+        exc.partial['analysis'] = analysis
+        raise
+    with span('export', format=params['format']) as export_span:
+        try:
+            if score is not None:
+                musicxml = score_to_musicxml(score)
+                size = len(musicxml)
+            else:
+                notation = render_text(
+                    params['format'], sections, melody, timelines, tonic, mode, time_sig, title,
+                    params['use_slurs'], params['use_ties'], params['use_repeats']
+                )
+                size = len(notation.encode('utf-8'))
+            export_error = None
+            export_span.set(bytes=size)
+        except Exception as e:
+            print(f"[ERROR] Failed to create {params['format']} download: {e}")
+            export_error = str(e)
+    if emit is not None:
+        emit('export', {'bytes': size, 'error': export_error})
+
+    # 곡 전체의 마디별 멜로디와 화음 (미리보기, 편집 세션용)
+    melody_measures = [m for label, _ in sections for m in melody.get(label, [])]
+    timeline = [event for label, _ in sections for event in timelines.get(label, [])]
+    measure_ticks = timeline[0].ticks if timeline else 0
+    timeline = [e._replace(offset=i * measure_ticks) for i, e in enumerate(timeline)]
+    marks = section_marks(sections)
+
+    generation = {
+        'progression': prog,
+        'analysis': analysis,
+        'musicxml': musicxml,
+        'notation': notation,
+        'export_error': export_error,
+        'previews': store_previews(params, prog, melody_measures, timeline, marks)
+    }
+
+    # 부분 재생성용 편집 상태 (세션은 attach_session이 요청마다 만듦,
+    # 도돌이표로 접힌 악보는 마디 위치가 달라 제외)
+    if musicxml is not None and not params['use_repeats']:
+        generation['edit'] = {
+            'timeline': [list(event) for event in timeline],
+            'melody': melody_measures,
+            'kinds': (['melody'] if melody_measures else []) + (
+                ['chords'] + list(params['accompaniment']) if timelines else []),
+            'marks': marks
+        }
+
+    return generation
+
+def cached_generation(params: Dict[str, Any], emit: Optional[Emit] = None) -> Dict[str, Any]:
+    """시드가 고정된 요청은 영구 캐시에서 찾고, 없으면 생성 후 저장합니다."""
+    if score_cache is None:
+        return build_generation(params, emit)
+    
+    key = cache_key(shared_params(params))
+    with span('cache_get') as get_span:
+        entry = score_cache.get(key)
+        get_span.set(hit=entry is not None)
+    if entry is not None:
+        generation = json.loads(entry['result'])
+        generation['musicxml'] = entry.get('musicxml')
+        generation['notation'] = entry['notation'].decode('utf-8') if 'notation' in entry else None
+        generation['export_error'] = None
+        # 미리보기가 먼저 밀려났으면 함께 저장해 둔 사본으로 복원
+        for kind, digest in generation.get('previews', {}).items():
+            if f'preview_{kind}' in entry and previews.get(digest) is None:
+                previews.add(digest, entry[f'preview_{kind}'])
+        return generation
+    
+    generation = build_generation(params, emit)
+    if generation['musicxml'] is not None:
+        document = {'musicxml': generation['musicxml']}
+    elif generation['notation'] is not None:
+        document = {'notation': generation['notation'].encode('utf-8')}
+    else:
+        return generation
+    for kind, digest in generation['previews'].items():
+        compressed = previews.get(digest)
+        if compressed is not None:
+            document[f'preview_{kind}'] = compressed
+    result = {'progression': generation['progression'], 'analysis': generation['analysis'],
+              'previews': generation['previews']}
+    if 'edit' in generation:
+        result['edit'] = generation['edit']
+    with span('cache_put'):
+        score_cache.put(key, {'result': dumps_bytes(result), **document})
+    return generation
+
+def shared_generation(params: Dict[str, Any], at: Optional[float],
+                      emit: Optional[Emit] = None) -> Dict[str, Any]:
+    """
+    생성 결과를 가져옵니다. 시드가 같은 동시 요청은 한 번만 생성하고(영구 캐시 포함)
+    결과와 진행 이벤트를 함께 받습니다.
+
+    생성을 맡은 요청도 기다리는 요청도 자기 마감(at)까지만 씁니다. 생성을 맡은
+    요청이 마감을 넘기면 기다리던 요청 중 하나가 이어받아 자기 마감 안에서 다시
+    생성하므로, 짧은 timeout을 준 요청이 다른 요청을 실패시키지 않습니다.
+
+    Args:
+        params: parse_generate_params로 정규화된 파라미터
+        at: 이 요청의 마감 시각 (None이면 없음)
+        emit: 진행 이벤트 콜백
+
+    Returns:
+        Dict[str, Any]: 생성 결과 (다른 요청과 공유되므로 바꾸지 않음)
+
+    Raises:
+        DeadlineExceeded: 이 요청의 마감 시각이 지난 경우
+    """
+    key = request_key(params)
+    if key is None:
+        with deadline_at(at):
+            return build_generation(params, emit)
+    
+    def work(publish: Emit) -> Dict[str, Any]:
+        with deadline_at(at):
+            return cached_generation(params, publish)
+    
+    generation, _ = flights.do(key, work, at=at, emit=emit)
+    if at is not None and time.monotonic() > at:
+        # 결과는 캐시에 남았지만 이 요청에는 늦음
+        exc = DeadlineExceeded()
+        exc.partial.update(progression=generation['progression'],
+                           progression_text=" | ".join(generation['progression']))
+        raise exc
+    return generation
+
+def attach_session(params: Dict[str, Any], generation: Dict[str, Any]) -> Dict[str, Any]:
+    """편집 세션을 요청했으면 생성 결과의 MusicXML과 편집 상태로 이 요청만의 세션을 만듭니다."""
+    edit = generation.get('edit')
+    if not params['session'] or edit is None or generation['musicxml'] is None:
+        return generation
+    session = sessions.create(params, generation['progression'], edit['timeline'], edit['melody'],
+                              edit['kinds'], generation['musicxml'], edit['marks'])
+    return {**generation, 'session_id': session.id}
+
+def generation_response(params: Dict[str, Any], generation: Dict[str, Any]) -> Dict[str, Any]:
+    """생성 결과를 API 응답 본문으로 만듭니다."""
+    # 악보 다운로드 링크 (HTML 태그 형태)
+    extension, mimetype = EXPORT_FORMATS[params.get('format', 'musicxml')]
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{params['tonic']}_{params['mode']}_progression_{timestamp}.{extension}"
+    notation = generation.get('notation')
+    if generation['musicxml'] is not None:
+        link = musicxml_download_html(generation['musicxml'], filename)
+    elif notation is not None:
+        link = download_html(notation.encode('utf-8'), filename, mimetype)
+    else:
+        link = f"<p>Download generation failed: {generation['export_error']}</p>"
+    
+    prog = generation['progression']
+    response = {
+        'success': True,
+        'progression': prog,
+        'progression_text': " | ".join(prog),
+        'analysis': generation['analysis'],
+        'download_html': link,
+        'previews': {kind: f"/api/preview/{digest}.svg"
+                     for kind, digest in generation.get('previews', {}).items()},
+        'session_id': generation.get('session_id')
+    }
+    if notation is not None:
+        response['format'] = params['format']
+        response['notation'] = notation
+    return response
+
+@app.route('/api/generate', methods=['POST'])
+@admission_limited(generate_cost)
+def generate():
+    """코드 진행 생성 API"""
+    try:
+        params = parse_generate_params(request.get_json(silent=True) or {})
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        # 시드가 같은 동시 요청은 한 번만 생성하고 결과를 공유 (영구 캐시 포함),
+        # 편집 세션은 공유 결과로부터 요청마다 따로 만듦
+        generation = shared_generation(params, g.get('deadline_at'))
+        return jsonify(generation_response(params, attach_session(params, generation)))
 
-        # 화성 분석
-        analysis = analyze_harmony(prog, tonic, mode)
+    except DeadlineExceeded as e:
+        return jsonify(timeout_body(e)), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """백그라운드 생성 작업 API (진행 상황은 /api/jobs/<job_id>/events SSE로 전달)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        params = parse_generate_params(data)
+        cost = generate_cost(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    # 작업이 끝날 때까지 용량을 잡아 둠 (요청 스레드는 바로 반환)
+    try:
+        release = admit(cost)
+    except Rejected as exc:
+        return reject_response(exc)
+    
+    at = g.get('deadline_at')
+    
+    def work(emit: Emit) -> Dict[str, Any]:
+        with tracer.trace('job /api/jobs', measures=params['length']):
+            generation = shared_generation(params, at, emit)
+            return generation_response(params, attach_session(params, generation))
+    
+    job = jobs.submit(work, release)
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'events_url': f"/api/jobs/{job.id}/events"
+    }), 202
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id: str):
+    """작업 진행 SSE API (짧게 읽고 끊어서 대기 중인 클라이언트가 스레드를 잡지 않음)"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown or expired job'
+        }), 404
+    
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id', 0))
+    except ValueError:
+        after = 0
+    # 마지막 이벤트까지 받은 클라이언트의 재연결은 204로 끝냄 (EventSource 재연결 중단)
+    if job.finished is not None and after >= len(job.events):
+        return Response(status=204)
+    
+    return Response(event_stream(job, after, SSE_HOLD, SSE_RETRY_MS),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def reroll_cost(data: dict) -> float:
+    """부분 재생성 비용 (다시 만드는 마디 수 × 파트 수)"""
+    session = sessions.get(str(data.get('session_id', '')))
+    try:
+        measures = int(data.get('end', 0)) - int(data.get('start', 0)) + 1
+    except (TypeError, ValueError):
+        measures = 1
+    parts = len(session.kinds) if session is not None else 1
+    return max(1, measures) * parts
+
+@app.route('/api/reroll', methods=['POST'])
+@admission_limited(reroll_cost)
+def reroll_measures():
+    """부분 재생성 API (세션의 start~end 마디만 다시 생성, 마디 번호는 1부터)"""
+    data = request.get_json(silent=True) or {}
+    session = sessions.get(str(data.get('session_id', '')))
+    if session is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown or expired session'
+        }), 404
+    
+    try:
+        start = int(data['start']) - 1
+        end = int(data.get('end', data['start']))
+        target = data.get('target', 'both')
+        if target not in REROLL_TARGETS:
+            raise ValueError(f"target must be one of {', '.join(REROLL_TARGETS)}")
+        seed = data.get('seed')
+        rng = random.Random(None if seed is None else int(seed))
         
-        # MusicXML 다운로드 링크 (HTML 태그 형태)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{tonic}_{mode}_progression_{timestamp}.musicxml"
-        download_html = create_musicxml_download(score, filename)
+        with session.lock:
+            with span('reroll', target=target, measures=end - start):
+                reroll(session, start, end, target, rng)
+            with span('analysis'):
+                analysis = (session.harmony.analysis() if session.params['fields'] is None
+                            else analyze_compact(session.progression, session.params['tonic'],
+                                                 session.params['mode'], session.params['fields']))
+            with span('export'):
+                musicxml = session.musicxml()
+            sessions.resize(session, len(musicxml) * DOCUMENT_OVERHEAD)
+            generation = {
+                'progression': list(session.progression),
+                'analysis': analysis,
+                'musicxml': musicxml,
+                'export_error': None,
+                'previews': store_previews(session.params, session.progression, session.melody,
+                                           session.timeline, session.marks),
+                'session_id': session.id
+            }
+        
+        return jsonify(generation_response(session.params, generation))
+    
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def analyze_cost(data: dict) -> float:
+    """일괄 분석 요청 비용 (항목 16개 또는 NDJSON 1KB당 1)"""
+    items = data.get('items') if isinstance(data, dict) else data
+    if isinstance(items, list):
+        return 1 + len(items) // 16
+    return 1 + (request.content_length or 0) // 1024
 
+def iter_analyze_items() -> Iterator[Any]:
+    """요청 본문에서 분석 항목을 하나씩 읽습니다 (JSON 또는 NDJSON)."""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"Invalid JSON line: {e}")
+        return
+    
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("Request body must be {'items': [...]} or NDJSON lines")
+    yield from items
+
+@app.route('/api/analyze', methods=['POST'])
+@admission_limited(analyze_cost)
+def analyze():
+    """사용자 코드 진행 일괄 분석 API (NDJSON 응답, 항목당 한 줄)"""
+    items = iter_analyze_items()
+    try:
+        first = next(items, None)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    at = g.get('deadline_at')
+    
+    def generate_lines():
+        if first is None:
+            return
+        count = 0
+        try:
+            with deadline_at(at):
+                for result in analyze_batch(chain([first], items)):
+                    yield dumps(result) + '\n'
+                    count += 1
+        except DeadlineExceeded as e:
+            # 이미 보낸 줄이 부분 결과, 마지막 줄로 마감 초과를 알림
+            yield dumps({'index': count, **timeout_body(e)}) + '\n'
+    
+    return Response(stream_with_context(generate_lines()), mimetype='application/x-ndjson')
+
+def upload_cost(data: dict) -> float:
+    """악보 업로드 비용 (16KB당 1)"""
+    return 1 + (request.content_length or 0) // (16 * 1024)
+
+def uploaded_score():
+    """업로드된 악보 스트림을 반환합니다 (multipart 'file' 필드 또는 요청 본문)."""
+    upload_file = request.files.get('file')
+    source = upload_file.stream if upload_file is not None else request.stream
+    if not source.seekable():
+        # .mxl 판별을 위해 임시 파일로 스풀링
+        import tempfile
+        spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        while True:
+            chunk = source.read(64 * 1024)
+            if not chunk:
+                break
+            spooled.write(chunk)
+        spooled.seek(0)
+        source = spooled
+    return source
+
+@app.route('/api/upload', methods=['POST'])
+@admission_limited(upload_cost)
+def upload():
+    """MusicXML 업로드 분석 API (multipart 'file' 필드 또는 요청 본문)"""
+    try:
+        with deadline_at(g.get('deadline_at')):
+            imported = read_musicxml(open_musicxml(uploaded_score()))
+            prog = imported['progression']
+            if not prog:
+                raise ValueError("Score contains no measures")
+            
+            try:
+                analysis = analyze_harmony(prog, imported['tonic'], imported['mode'])
+            except DeadlineExceeded as e:
+                e.partial.update(imported, progression_text=" | ".join(prog))
+                raise
         return jsonify({
             'success': True,
-            'progression': prog,
+            **imported,
             'progression_text': " | ".join(prog),
-            'analysis': analysis,
-            'download_html': download_html
+            'analysis': analysis
         })
+    
+    except DeadlineExceeded as e:
+        return jsonify(timeout_body(e)), 504
+    except (ValueError, ET.ParseError, zipfile.BadZipFile) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
+def harmonize_cost(data: dict) -> float:
+    """멜로디 화성 붙이기 비용 (멜로디 8마디 또는 악보 16KB당 1)"""
+    if isinstance(data, dict) and 'notes' in data:
+        measures = melody_measure_count(parse_notes(data['notes']), parse_time_sig(data))
+        # 최대 마디 수를 넘는 멜로디는 뷰에서 400으로 거절되므로 비용도 그만큼만
+        return 1 + min(measures, MAX_MEASURES) // 8
+    return upload_cost(data)
+
+def parse_notes(notes: Any) -> list:
+    """JSON 음 목록을 (음, 길이) 목록으로 변환합니다 ({'pitch', 'duration'} 또는 [음, 길이])."""
+    if not isinstance(notes, list) or not notes:
+        raise ValueError("'notes' must be a non-empty list")
+    result = []
+    for note in notes:
+        if isinstance(note, dict):
+            pitch, duration = note.get('pitch'), note.get('duration', 1.0)
+        elif isinstance(note, (list, tuple)) and len(note) == 2:
+            pitch, duration = note
+        else:
+            raise ValueError(f"Invalid note: {note!r}")
+        if (not isinstance(duration, (int, float)) or isinstance(duration, bool)
+                or not math.isfinite(duration) or duration <= 0):
+            raise ValueError(f"Invalid note duration: {duration!r}")
+        # 틱으로 정확히 나타낼 수 없는 길이(0.1 등)는 ValueError
+        to_ticks(duration)
+        result.append((pitch, float(duration)))
+    return result
+
+@app.route('/api/harmonize', methods=['POST'])
+@admission_limited(harmonize_cost)
+def harmonize():
+    """멜로디 화성 붙이기 API (JSON 음 목록 또는 MusicXML 업로드)"""
+    try:
+        with deadline_at(g.get('deadline_at')):
+            data = request.get_json(silent=True)
+            if isinstance(data, dict):
+                time_sig = parse_time_sig(data)
+                harmonized = harmonize_melody(
+                    parse_notes(data.get('notes')),
+                    time_sig=time_sig,
+                    tonic=data.get('tonic'),
+                    mode=data.get('mode')
+                )
+                harmonized['time_sig'] = time_sig
+            else:
+                # 악보 업로드: 조성은 쿼리/폼 값이 있으면 우선
+                scan = scan_musicxml(open_musicxml(uploaded_score()))
+                tonic = request.values.get('tonic') or scan['tonic']
+                mode = request.values.get('mode') or scan['mode']
+                harmonized = {
+                    'tonic': tonic,
+                    'mode': mode,
+                    'time_sig': scan['time_sig'],
+                    'progression': harmonize_weights(scan['weights'], tonic, mode)
+                }
+            
+            prog = harmonized['progression']
+            if not prog:
+                raise ValueError("Melody contains no measures")
+            
+            try:
+                analysis = analyze_harmony(prog, harmonized['tonic'], harmonized['mode'])
+            except DeadlineExceeded as e:
+                e.partial.update(harmonized, progression_text=" | ".join(prog))
+                raise
+        
+        return jsonify({
+            'success': True,
+            **harmonized,
+            'progression_text': " | ".join(prog),
+            'analysis': analysis
+        })
+    
+    except DeadlineExceeded as e:
+        return jsonify(timeout_body(e)), 504
+    except (ValueError, ET.ParseError, zipfile.BadZipFile) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/preview/<digest>.svg')
+def svg_preview(digest: str):
+    """미리보기 SVG API (주소가 내용 해시라 영구 캐시, 압축해 둔 그대로 전송)"""
+    compressed = previews.get(digest) if is_digest(digest) else None
+    if compressed is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown or expired preview'
+        }), 404
+    
+    if 'gzip' in request.accept_encodings:
+        response = Response(compressed, mimetype='image/svg+xml')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(f"{digest}-gz")
+    else:
+        response = Response(gzip.decompress(compressed), mimetype='image/svg+xml')
+        response.set_etag(digest)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response.make_conditional(request)
+
+@app.route('/api/status')
+def status():
+    """현재 부하 상태 API"""
+    stats = controller.stats()
+    stats['coalesced_requests'] = flights.coalesced
+    stats['styles'] = list(available_styles())
+    stats['sessions'] = len(sessions)
+    stats['jobs'] = len(jobs)
+    stats['tracing'] = tracer.stats()
+    if score_cache is not None:
+        stats['score_cache'] = score_cache.stats()
+    return jsonify(stats)
+
+@app.route('/debug/profile')
+def debug_profile():
+    """실행 중인 요청들을 N초 동안 샘플링하는 프로파일러 API (관리자 전용)"""
+    authorized = admin_authorized()
+    if authorized is None:
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    if not authorized:
+        return jsonify({'success': False, 'error': 'Admin token required'}), 403
+
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval', 5))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'seconds and interval must be numbers'}), 400
+    if not (math.isfinite(seconds) and math.isfinite(interval_ms)):
+        return jsonify({'success': False, 'error': 'seconds and interval must be finite numbers'}), 400
+    fmt = request.args.get('format', 'collapsed')
+    if fmt not in ('collapsed', 'pstats', 'json'):
+        return jsonify({'success': False, 'error': 'format must be collapsed, pstats or json'}), 400
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    interval = min(max(interval_ms, 1.0), 100.0) / 1000
+
+    profile = sampler.run(seconds, interval, idle=request.args.get('idle') == '1')
+    if profile is None:
+        return jsonify({'success': False, 'error': 'A profile is already running'}), 409
+
+    # 수집 정보는 헤더로, 본문은 도구가 바로 읽는 형식 그대로
+    if fmt == 'json':
+        return jsonify({'success': True, **profile.summary()})
+    if fmt == 'pstats':
+        response = Response(profile.pstats_bytes(), mimetype='application/octet-stream')
+        response.headers['Content-Disposition'] = 'attachment; filename="chordgen.pstats"'
+    else:
+        response = Response(profile.collapsed(), mimetype='text/plain')
+    response.headers['X-Profile-Samples'] = str(profile.samples)
+    response.headers['X-Profile-Interval-Ms'] = f"{profile.interval * 1000:.3f}"
+    return response
+
 def run_server():
     """Start the production-ready waitress server"""
     from waitress import serve
+    threads, connection_limit, backlog = server_options()
     print("[WEB] Starting local web server on http://127.0.0.1:5000")
-    serve(app, host='127.0.0.1', port=5000)
+    serve(app, host='127.0.0.1', port=5000, threads=threads,
+          connection_limit=connection_limit, backlog=backlog)
 
 if __name__ == '__main__':
     run_server()
@@ -0,0 +1,55 @@
+"""
+Fast JSON encoding for API responses
+
+Uses orjson when it is installed (pip install orjson) and falls back to the
+standard library otherwise. Either way responses are compact UTF-8 without
+key sorting or ASCII escaping, which keeps Korean analysis text small.
+"""
+
+import json
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encodes a value as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(obj: Any) -> str:
+    """Encodes a value as a compact JSON string."""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with dumps_bytes.
+
+    Values orjson cannot encode natively go through Flask's default
+    conversions (dates, dataclasses, objects with __html__).
+    """
+
+    sort_keys = False
+    ensure_ascii = False
+    compact = True
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is None:
+            body = super().dumps(obj).encode('utf-8')
+        else:
+            body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,105 @@
+"""
+Content-addressed store for SVG previews
+
+Rendered previews are gzip-compressed once and stored under a digest of
+their content, so the URL of a preview never changes meaning: it can be
+served with a far-future immutable Cache-Control and revalidated by ETag.
+When the persistent score cache is enabled the previews live there (and in
+its shared memory tier, so any worker can serve a preview another worker
+rendered); otherwise a bounded per-process LRU is used.
+"""
+
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src.utils.score_cache import ScoreCache
+
+# Length of the hex content digest used in preview URLs
+DIGEST_LENGTH = 32
+
+_PREFIX = 'preview-'
+_DIGEST_RE = re.compile(f'[0-9a-f]{{{DIGEST_LENGTH}}}')
+
+
+def preview_digest(svg: bytes) -> str:
+    """Returns the content digest of an SVG document."""
+    return hashlib.sha256(svg).hexdigest()[:DIGEST_LENGTH]
+
+
+def is_digest(value: str) -> bool:
+    """Checks that a URL segment has the shape of a preview digest."""
+    return _DIGEST_RE.fullmatch(value) is not None
+
+
+class PreviewStore:
+    """
+    Gzip-compressed SVG documents keyed by content digest.
+    """
+
+    def __init__(self, cache: Optional[ScoreCache] = None, memory_bytes: int = 8 * 1024 * 1024):
+        """
+        Args:
+            cache: Persistent cache to store previews in (None keeps them in this process)
+            memory_bytes: Maximum compressed size kept when there is no persistent cache
+        """
+        self.cache = cache
+        self.memory_bytes = memory_bytes
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+    def put(self, svg: str) -> str:
+        """
+        Stores a document unless an identical one is already stored.
+
+        Args:
+            svg: SVG document
+
+        Returns:
+            str: Content digest to serve it under
+        """
+        data = svg.encode('utf-8')
+        digest = preview_digest(data)
+        if self.get(digest) is None:
+            self.add(digest, gzip.compress(data, compresslevel=9, mtime=0))
+        return digest
+
+    def add(self, digest: str, compressed: bytes) -> None:
+        """Stores an already compressed document (e.g. restored from a cached generation)."""
+        if self.cache is not None:
+            self.cache.put(_PREFIX + digest, {'svgz': compressed})
+            return
+        if len(compressed) > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(digest, None)
+            if old is not None:
+                self._memory_size -= len(old)
+            self._memory[digest] = compressed
+            self._memory_size += len(compressed)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """
+        Looks up a document.
+
+        Args:
+            digest: Content digest
+
+        Returns:
+            Optional[bytes]: The gzip-compressed document, or None if unknown or evicted
+        """
+        if self.cache is not None:
+            entry = self.cache.get(_PREFIX + digest)
+            return entry.get('svgz') if entry is not None else None
+        with self._lock:
+            compressed = self._memory.get(digest)
+            if compressed is not None:
+                self._memory.move_to_end(digest)
+            return compressed
@@ -0,0 +1,234 @@
+"""
+On-demand sampling profiler for live traffic
+
+The requesting thread wakes every few milliseconds, reads every other
+thread's current stack with sys._current_frames() and counts identical
+stacks. Nothing is hooked into the profiled code, so the cost is one stack
+walk per thread per tick (about 1% of one core at the default 5 ms) and
+only while a profile is being taken. cProfile cannot do this here: it only
+instruments the thread that enables it, and waitress's worker threads
+already exist when a profile starts.
+
+Results are available as Brendan Gregg's collapsed stacks (one
+"frame;frame;frame count" line per stack, ready for flamegraph.pl or
+speedscope), as a pstats file (load with pstats.Stats or snakeviz; times
+are sample counts times the sampling interval, call counts are sample
+counts) or as a JSON summary of the hottest functions.
+"""
+
+import hmac
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import request
+
+from src.web.admission import env_float
+
+# (file, first line, function): the function key pstats uses
+FunctionKey = Tuple[str, int, str]
+
+# Leaf frames in these modules are threads waiting for work (waitress's
+# worker pool and its select loop), not running code
+_IDLE_FILES = tuple(os.sep + name for name in ('threading.py', 'selectors.py', 'queue.py', 'wasyncore.py'))
+
+
+def _short_path(filename: str) -> str:
+    """Strips the longest sys.path prefix so labels stay readable."""
+    best = ''
+    for entry in sys.path:
+        if entry and filename.startswith(entry) and len(entry) > len(best):
+            best = entry
+    return filename[len(best):].lstrip(os.sep) if best else filename
+
+
+class Profile:
+    """
+    Stack counts collected by one sampling run.
+
+    Attributes:
+        stacks: Root-to-leaf tuples of code objects -> number of samples
+        ticks: Number of sampling rounds
+        seconds: Wall-clock duration of the run
+        interval: Mean seconds between sampling rounds
+    """
+
+    def __init__(self, stacks: Counter, ticks: int, seconds: float):
+        self.stacks = stacks
+        self.ticks = ticks
+        self.seconds = seconds
+        self.interval = seconds / ticks if ticks else 0.0
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    @staticmethod
+    def _key(code: CodeType) -> FunctionKey:
+        return code.co_filename, code.co_firstlineno, code.co_name
+
+    def collapsed(self) -> str:
+        """Returns the stacks in collapsed format, most frequent first."""
+        labels: Dict[CodeType, str] = {}
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = []
+            for code in stack:
+                label = labels.get(code)
+                if label is None:
+                    label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+                    label = labels[code] = label.replace(';', ':')
+                frames.append(label)
+            lines.append(f"{';'.join(frames)} {count}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def function_stats(self) -> Dict[FunctionKey, List[Any]]:
+        """
+        Aggregates samples per function.
+
+        Returns:
+            Dict[FunctionKey, List[Any]]: [self samples, total samples,
+            {caller key: [self samples, total samples]}] per function
+        """
+        stats: Dict[FunctionKey, List[Any]] = {}
+        for stack, count in self.stacks.items():
+            keys = [self._key(code) for code in stack]
+            seen = set()
+            for i, key in enumerate(keys):
+                entry = stats.get(key)
+                if entry is None:
+                    entry = stats[key] = [0, 0, {}]
+                leaf = i == len(keys) - 1
+                if leaf:
+                    entry[0] += count
+                if key not in seen:  # count recursive frames once
+                    seen.add(key)
+                    entry[1] += count
+                if i:
+                    edge = entry[2].setdefault(keys[i - 1], [0, 0])
+                    edge[0] += count if leaf else 0
+                    edge[1] += count
+        return stats
+
+    def pstats_bytes(self) -> bytes:
+        """Returns the profile in the marshal format of pstats.Stats.dump_stats."""
+        interval = self.interval
+        data = {}
+        for key, (own, total, callers) in self.function_stats().items():
+            data[key] = (
+                total, total, own * interval, total * interval,
+                {caller: (n, n, s * interval, n * interval) for caller, (s, n) in callers.items()},
+            )
+        return marshal.dumps(data)
+
+    def summary(self, limit: int = 50) -> Dict[str, Any]:
+        """Returns the hottest functions by self samples."""
+        stats = self.function_stats()
+        hottest = sorted(stats.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)[:limit]
+        return {
+            'seconds': round(self.seconds, 3),
+            'interval_ms': round(self.interval * 1000, 3),
+            'ticks': self.ticks,
+            'samples': self.samples,
+            'functions': [
+                {'function': name, 'file': _short_path(filename), 'line': line,
+                 'self': own, 'total': total}
+                for (filename, line, name), (own, total, _) in hottest
+            ],
+        }
+
+
+class StackSampler:
+    """
+    Samples the stacks of all other threads at a fixed interval.
+
+    Only one run is allowed at a time per process.
+    """
+
+    def __init__(self):
+        self._running = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._running.locked()
+
+    @staticmethod
+    def _is_idle(frame: FrameType) -> bool:
+        return frame.f_code.co_filename.endswith(_IDLE_FILES)
+
+    def run(self, seconds: float, interval: float = 0.005, idle: bool = False) -> Optional[Profile]:
+        """
+        Samples for `seconds` from the calling thread.
+
+        Args:
+            seconds: How long to sample
+            interval: Seconds between sampling rounds
+            idle: Also count threads blocked waiting for work
+
+        Returns:
+            Optional[Profile]: The profile, or None if another run is in progress
+        """
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            own = {threading.get_ident()}
+            stacks: Counter = Counter()
+            ticks = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            next_tick = started
+            while True:
+                for ident, frame in sys._current_frames().items():
+                    if ident in own or (not idle and self._is_idle(frame)):
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(frame.f_code)
+                        frame = frame.f_back
+                    stack.reverse()
+                    stacks[tuple(stack)] += 1
+                ticks += 1
+                next_tick += interval
+                now = time.perf_counter()
+                if next_tick >= deadline:
+                    break
+                if next_tick > now:
+                    time.sleep(next_tick - now)
+                else:
+                    next_tick = now  # fell behind: do not burst to catch up
+            return Profile(stacks, ticks, time.perf_counter() - started)
+        finally:
+            self._running.release()
+
+
+def admin_authorized() -> Optional[bool]:
+    """
+    Checks the current request's admin token.
+
+    The token is read from `Authorization: Bearer <token>` or `X-Admin-Token`
+    and compared with CHORDGEN_ADMIN_TOKEN.
+
+    Returns:
+        Optional[bool]: None if no admin token is configured (admin routes
+        are disabled), otherwise whether the request presented it
+    """
+    expected = os.environ.get('CHORDGEN_ADMIN_TOKEN')
+    if not expected:
+        return None
+    supplied = request.headers.get('X-Admin-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        supplied = authorization[len('Bearer '):].strip()
+    return hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+
+# Settings (environment variables)
+#   CHORDGEN_ADMIN_TOKEN          enables /debug routes for requests presenting it
+#   CHORDGEN_PROFILE_MAX_SECONDS  longest profile one request may take
+sampler = StackSampler()
+PROFILE_MAX_SECONDS = env_float('CHORDGEN_PROFILE_MAX_SECONDS', 60)
@@ -0,0 +1,198 @@
+"""
+Background generation jobs with Server-Sent Events progress
+
+A job runs a generation on a small worker pool and appends progress events
+to an in-memory log. Clients read the log over SSE in short, bounded
+requests: each request waits briefly for new events, writes whatever has
+arrived, and ends with a `retry` hint so the browser's EventSource
+reconnects with Last-Event-ID. An idle listener therefore holds no server
+thread between reads, which matters with waitress's fixed thread pool.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.core.deadline import DeadlineExceeded
+from src.web.admission import env_float
+from src.web.fastjson import dumps
+
+# Events that end a job's log
+FINAL_EVENTS = ('done', 'error')
+
+
+class Job:
+    """
+    Append-only progress log of one background generation.
+
+    Attributes:
+        id: Job identifier returned to the client
+        events: (name, data) pairs in emission order; event ids are 1-based positions
+        finished: Monotonic time the job ended, or None while it runs
+    """
+
+    __slots__ = ('id', 'events', 'finished', '_cond')
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.finished: Optional[float] = None
+        self._cond = threading.Condition()
+
+    def emit(self, name: str, data: Dict[str, Any]) -> None:
+        """Appends an event and wakes waiting readers."""
+        with self._cond:
+            if self.finished is not None:
+                return
+            self.events.append((name, data))
+            if name in FINAL_EVENTS:
+                self.finished = time.monotonic()
+            self._cond.notify_all()
+
+    def wait(self, after: int, timeout: float) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Returns events after the given id, waiting up to `timeout` for the first one.
+
+        Args:
+            after: Id of the last event the client has seen (0 for none)
+            timeout: Seconds to wait when no newer event exists
+
+        Returns:
+            List[Tuple[int, str, Dict[str, Any]]]: (id, name, data) triples
+        """
+        with self._cond:
+            if len(self.events) <= after and self.finished is None:
+                self._cond.wait(timeout)
+            return [(index + 1, name, data)
+                    for index, (name, data) in enumerate(self.events[after:], after)]
+
+
+class JobStore:
+    """
+    Bounded store of jobs; finished jobs are kept for `ttl` seconds so late
+    or reconnecting readers still receive the final event.
+    """
+
+    def __init__(self, max_jobs: int = 256, ttl: float = 300.0, workers: int = 4):
+        """
+        Args:
+            max_jobs: Maximum number of jobs kept (oldest finished jobs are dropped first)
+            ttl: Seconds a finished job stays readable
+            workers: Worker threads running generations
+        """
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers),
+                                            thread_name_prefix='chordgen-job')
+
+    def _expire(self, now: float) -> None:
+        for job_id, job in list(self._jobs.items()):
+            if job.finished is None:
+                continue
+            if len(self._jobs) > self.max_jobs or now - job.finished > self.ttl:
+                del self._jobs[job_id]
+
+    def submit(self, work: Callable[[Callable[[str, Dict[str, Any]], None]], Dict[str, Any]],
+               release: Callable[[], None]) -> Job:
+        """
+        Starts a job.
+
+        Args:
+            work: Called with an emit(name, data) function; its return value
+                becomes the data of the final 'done' event
+            release: Called once when the job ends (returns admission capacity)
+
+        Returns:
+            Job: The queued job
+        """
+        job = Job(secrets.token_urlsafe(12))
+        with self._lock:
+            self._expire(time.monotonic())
+            self._jobs[job.id] = job
+
+        def run():
+            try:
+                job.emit('done', work(job.emit))
+            except DeadlineExceeded as e:
+                job.emit('error', {'success': False, 'error': str(e), 'timeout': True,
+                                   'partial': e.partial})
+            except Exception as e:
+                job.emit('error', {'success': False, 'error': str(e)})
+            finally:
+                release()
+
+        try:
+            self._executor.submit(run)
+        except RuntimeError:
+            release()
+            raise
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Returns a job that is still readable."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._jobs.get(job_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+
+def format_event(event_id: int, name: str, data: Dict[str, Any]) -> str:
+    """Formats one SSE event."""
+    payload = dumps(data)
+    return f"id: {event_id}\nevent: {name}\ndata: {payload}\n\n"
+
+
+def event_stream(job: Job, after: int, hold: float, retry_ms: int) -> Iterator[str]:
+    """
+    Yields SSE text for one bounded read of a job's log.
+
+    Streams events as they arrive for at most `hold` seconds, then ends the
+    response. Unless the job has finished, the last chunk tells the client
+    to reconnect after `retry_ms` milliseconds.
+
+    Args:
+        job: Job to read
+        after: Last event id the client has seen
+        hold: Seconds a single request may stay open
+        retry_ms: Reconnection delay suggested to the client
+
+    Returns:
+        Iterator[str]: SSE chunks
+    """
+    deadline = time.monotonic() + hold
+    yield f"retry: {retry_ms}\n\n"
+    while True:
+        remaining = deadline - time.monotonic()
+        events = job.wait(after, max(0.0, remaining))
+        if not events and job.finished is not None:
+            return
+        for event_id, name, data in events:
+            yield format_event(event_id, name, data)
+            after = event_id
+            if name in FINAL_EVENTS:
+                return
+        if time.monotonic() >= deadline:
+            return
+
+
+# Settings (environment variables)
+#   CHORDGEN_JOBS         jobs kept in memory
+#   CHORDGEN_JOB_TTL      seconds a finished job stays readable
+#   CHORDGEN_JOB_THREADS  worker threads running jobs
+#   CHORDGEN_SSE_HOLD     seconds one SSE request may stay open
+#   CHORDGEN_SSE_RETRY    reconnection delay sent to clients (milliseconds)
+jobs = JobStore(
+    max_jobs=int(env_float('CHORDGEN_JOBS', 256)),
+    ttl=env_float('CHORDGEN_JOB_TTL', 300),
+    workers=int(env_float('CHORDGEN_JOB_THREADS', 4)),
+)
+SSE_HOLD = env_float('CHORDGEN_SSE_HOLD', 1.0)
+SSE_RETRY_MS = int(env_float('CHORDGEN_SSE_RETRY', 250))
@@ -0,0 +1,306 @@
+"""
+Editing sessions for partial regeneration
+
+Each generated score can be kept in a bounded, expiring in-memory store
+together with the state needed to edit it: the incremental harmony
+analysis, the per-measure chord timeline, the melody pitches and the
+exported MusicXML element tree. Rerolling a measure range regenerates only
+those measures, exports only them, and splices them into the document, so
+the cost of an edit scales with its size rather than the piece size.
+
+The store is bounded by an estimate of the sessions' memory (mostly the
+parsed element trees) as well as by count.
+"""
+
+import random
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from music21 import stream
+
+from src.core.arrangement import ChordEvent, accompaniment_measures, block_measures, chord_timeline
+from src.core.chord_generator import connect_melody, event_measures, melody_events
+from src.core.form import empty_part
+from src.core.meters import get_meter
+from src.core.reroll import HarmonyState, reroll_progression
+from src.core.streams import append_measures
+from src.utils.file_utils import score_to_musicxml
+from src.utils.musicxml_patch import (
+    SLUR_SEARCH_MEASURES, ScoreDocument, event_pitches, fragment_measures
+)
+from src.web.admission import env_float
+
+REROLL_TARGETS = ('chords', 'melody', 'both')
+
+# Memory of a parsed MusicXML element tree per byte of the document (measured
+# at about 10x with ElementTree), used to estimate a session's size
+DOCUMENT_OVERHEAD = 10
+
+
+class Session:
+    """
+    Editable state of one generated score.
+
+    Attributes:
+        id: Session identifier returned to the client
+        params: Normalized generation parameters
+        harmony: Incremental analysis holding the current progression
+        timeline: Chord timeline per measure
+        melody: Melody (pitch name, ticks) events per measure (empty if there is no melody)
+        kinds: Part kinds in score order ('melody', 'chords', 'bass', ...)
+        document: Exported MusicXML element tree
+        marks: Section labels by first measure (for the chord chart preview)
+        lock: Serializes edits of this session
+        size: Estimated memory of the session in bytes
+    """
+
+    __slots__ = ('id', 'params', 'harmony', 'timeline', 'melody', 'kinds',
+                 'document', 'marks', 'lock', 'touched', 'size')
+
+    def __init__(self, session_id: str, params: Dict[str, Any], harmony: HarmonyState,
+                 timeline: List[ChordEvent], melody: List[List[Tuple[str, int]]],
+                 kinds: List[str], document: ScoreDocument,
+                 marks: Optional[Dict[int, str]] = None, size: int = 0):
+        self.id = session_id
+        self.params = params
+        self.harmony = harmony
+        self.timeline = timeline
+        self.melody = melody
+        self.kinds = kinds
+        self.document = document
+        self.marks = marks or {}
+        self.lock = threading.Lock()
+        self.touched = time.monotonic()
+        self.size = size
+
+    @property
+    def progression(self) -> List[str]:
+        return self.harmony.prog
+
+    def musicxml(self) -> bytes:
+        """Serializes the current score."""
+        return self.document.to_bytes()
+
+
+def _timeline(events: Sequence[Sequence[Any]]) -> List[ChordEvent]:
+    """Rebuilds chord events (also from their JSON form, where tuples are lists)."""
+    return [ChordEvent(e[0], e[1], e[2], tuple(e[3]), tuple(e[4]), *e[5:]) for e in events]
+
+
+def _melody(measures: Sequence[Sequence[Sequence[Any]]]) -> List[List[Tuple[str, int]]]:
+    """Rebuilds melody events per measure (also from their JSON form)."""
+    return [[(name, ticks) for name, ticks in measure] for measure in measures]
+
+
+class SessionStore:
+    """
+    Bounded LRU store of editing sessions with idle expiry.
+    """
+
+    def __init__(self, max_sessions: int = 256, max_bytes: int = 256 * 1024 * 1024,
+                 ttl: float = 1800.0):
+        """
+        Args:
+            max_sessions: Maximum number of sessions kept (least recently used are dropped)
+            max_bytes: Maximum estimated memory of all sessions (least recently used are dropped)
+            ttl: Seconds a session may stay idle before it expires
+        """
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._sessions: 'OrderedDict[str, Session]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if (now - oldest.touched <= self.ttl and len(self._sessions) <= self.max_sessions
+                    and self.size <= self.max_bytes):
+                break
+            self._sessions.popitem(last=False)
+            self.size -= oldest.size
+
+    def create(self, params: Dict[str, Any], progression: List[str],
+               timeline: Sequence[Sequence[Any]], melody: Sequence[Sequence[Sequence[Any]]],
+               kinds: List[str], musicxml: bytes,
+               marks: Optional[Dict[Any, str]] = None) -> Session:
+        """
+        Stores the state of a freshly generated score.
+
+        The state is copied, so several sessions can be created from one
+        shared (cached or coalesced) generation result.
+
+        Args:
+            params: Normalized generation parameters
+            progression: Roman numeral progression
+            timeline: Chord timeline per measure (ChordEvent or its JSON list form)
+            melody: Melody (pitch name, ticks) events per measure
+            kinds: Part kinds in score order
+            musicxml: Exported score
+            marks: Section labels by first measure (keys may be JSON strings)
+
+        Returns:
+            Session: The new session
+        """
+        session = Session(
+            secrets.token_urlsafe(16), params,
+            HarmonyState(progression, params['tonic'], params['mode']),
+            _timeline(timeline), _melody(melody), list(kinds), ScoreDocument(musicxml),
+            {int(measure): label for measure, label in (marks or {}).items()},
+            size=len(musicxml) * DOCUMENT_OVERHEAD
+        )
+        with self._lock:
+            self._sessions[session.id] = session
+            self.size += session.size
+            self._expire(session.touched)
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """Returns a live session and marks it as recently used."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touched = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def resize(self, session: Session, size: int) -> None:
+        """Updates a session's estimated memory after an edit."""
+        with self._lock:
+            if self._sessions.get(session.id) is session:
+                self.size += size - session.size
+            session.size = size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+def reroll(session: Session, start: int, end: int, target: str = 'both',
+           rng: Optional[random.Random] = None) -> None:
+    """
+    Regenerates measures [start, end) of a session.
+
+    Chords are resampled to connect with the neighbouring measures, the
+    melody continues stepwise from the note before the range, and ties and
+    slurs across the range edges are repaired in the stored document.
+
+    The new harmony, timeline and melody are built on copies and only
+    replace the session's state once the document splice has succeeded;
+    if anything fails, the touched measures of the document are restored
+    and the session is left unchanged.
+
+    Args:
+        session: Session to edit (the caller holds session.lock)
+        start: First measure to regenerate (0-based)
+        end: End of the range (exclusive)
+        target: 'chords', 'melody' or 'both'
+        rng: Random number generator
+
+    Raises:
+        ValueError: If the range or target is invalid
+    """
+    if target not in REROLL_TARGETS:
+        raise ValueError(f"Unknown reroll target: {target}")
+    params = session.params
+    tonic, mode, time_sig = params['tonic'], params['mode'], params['time_sig']
+    total = len(session.progression)
+    if not 0 <= start < end <= total:
+        raise ValueError(f"Invalid measure range: {start + 1}-{end}")
+    rng = rng or random.Random()
+    measure_ticks = get_meter(time_sig).measure_ticks
+
+    harmony = session.harmony.copy()
+    timeline = list(session.timeline)
+    melody = list(session.melody)
+
+    # (part kind, first measure, measures) to export and splice
+    fragments = []
+
+    if target in ('chords', 'both') and 'chords' in session.kinds:
+        figures = reroll_progression(harmony.prog, start, end, mode, rng)
+        harmony.replace(start, figures)
+        events = chord_timeline(figures, tonic, mode, time_sig, params['voicing'], rng)
+        timeline[start:end] = [
+            e._replace(offset=(start + i) * measure_ticks) for i, e in enumerate(events)
+        ]
+        # The measure before the range is re-rendered too (walking bass approach notes)
+        low = max(0, start - 1)
+        window = timeline[low:end + 1]
+        for kind in session.kinds:
+            if kind == 'melody':
+                continue
+            if kind == 'chords':
+                measures = block_measures(window)
+            else:
+                measures = accompaniment_measures(kind, window, tonic, mode, time_sig,
+                                                  params['bass_style'])
+            fragments.append((kind, low, measures[:end - low]))
+
+    if target in ('melody', 'both') and 'melody' in session.kinds:
+        previous = melody[start - 1] if start > 0 else []
+        events = melody_events(
+            harmony.prog[start:end], tonic, mode, time_sig, params['rhythm_option'], rng,
+            prev_name=previous[-1][0] if previous else None,
+            first_index=start, total=total
+        )
+        measures = event_measures(events, start)
+        melody[start:end] = events
+        fragments.append(('melody', start, measures))
+
+    if not fragments:
+        raise ValueError(f"Score has no part to reroll for target: {target}")
+
+    # Export only the regenerated measures
+    score = stream.Score()
+    for kind, low, measures in fragments:
+        part = empty_part(kind, tonic, mode, time_sig)
+        for offset, m in enumerate(measures):
+            m.number = low + offset + 1
+        if low + len(measures) == total:
+            measures[-1].rightBarline = 'final'
+        append_measures(part, measures, measure_ticks)
+        if kind == 'melody':
+            connect_melody(part, params['use_slurs'], params['use_ties'])
+        score.append(part)
+    exported = fragment_measures(score_to_musicxml(score))
+
+    # Splice, saving the measures the splice may touch (slur search reaches past the range)
+    document = session.document
+    snapshots = []
+    try:
+        for (kind, low, measures), new_measures in zip(fragments, exported):
+            part_index = session.kinds.index(kind)
+            high = low + len(measures)
+            snapshots.append(document.snapshot(part_index, low - SLUR_SEARCH_MEASURES,
+                                               high + SLUR_SEARCH_MEASURES))
+            if kind == 'melody' and params['use_slurs']:
+                document.remove_slurs(part_index, low, high)
+            document.replace_measures(part_index, low, new_measures)
+            if (kind == 'melody' and params['use_ties']) or kind == 'pad':
+                current = document.measures(part_index)
+                for boundary in (low, high):
+                    if 0 < boundary < total:
+                        left = event_pitches(current[boundary - 1], last=True)
+                        right = event_pitches(current[boundary])
+                        document.set_boundary_tie(part_index, boundary,
+                                                  left is not None and left == right)
+    except BaseException:
+        for snapshot in reversed(snapshots):
+            document.restore(snapshot)
+        raise
+
+    session.harmony, session.timeline, session.melody = harmony, timeline, melody
+
+
+store = SessionStore(
+    max_sessions=int(env_float('CHORDGEN_SESSIONS', 256)),
+    max_bytes=int(env_float('CHORDGEN_SESSIONS_MB', 256) * 1024 * 1024),
+    ttl=env_float('CHORDGEN_SESSION_TTL', 1800),
+)
@@ -0,0 +1,137 @@
+"""
+Single-flight request coalescing
+
+When several identical requests arrive while the first one is still being
+computed, only the first runs the work; the others wait for and share its
+result (or its exception). Progress events of the running work are relayed
+to every caller, including ones that join late (earlier events are replayed).
+
+Every caller, including the one that runs the work, is bounded by its own
+deadline: the work runs inside the running caller's deadline, and waiters
+stop waiting at theirs. A leader that runs out of time (DeadlineExceeded)
+does not fail the waiting callers: they retry, and one of them takes over
+and runs the work under its own deadline.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.core.deadline import DeadlineExceeded
+
+# Progress event callback: (event name, data)
+Emit = Callable[[str, Dict[str, Any]], None]
+
+
+class _Call:
+    """One in-flight computation: its result and the progress events so far."""
+
+    __slots__ = ('future', 'events', 'listeners', 'lock')
+
+    def __init__(self):
+        self.future: Future = Future()
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.listeners: List[Emit] = []
+        self.lock = threading.Lock()
+
+    def listen(self, emit: Optional[Emit]) -> None:
+        """Replays the events so far to a new listener and subscribes it."""
+        if emit is None:
+            return
+        with self.lock:
+            for name, data in self.events:
+                emit(name, data)
+            self.listeners.append(emit)
+
+    def unlisten(self, emit: Optional[Emit]) -> None:
+        if emit is None:
+            return
+        with self.lock:
+            if emit in self.listeners:
+                self.listeners.remove(emit)
+
+    def publish(self, name: str, data: Dict[str, Any]) -> None:
+        """Records an event and relays it to every listener."""
+        with self.lock:
+            self.events.append((name, data))
+            for emit in self.listeners:
+                emit(name, data)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Returns True if a call with this key is currently running."""
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: Hashable, fn: Callable[[Emit], Any], at: Optional[float] = None,
+           emit: Optional[Emit] = None) -> Tuple[Any, bool]:
+        """
+        Runs `fn` once per key among concurrent callers.
+
+        Args:
+            key: Identity of the work
+            fn: Function that computes the result; it is passed an emit
+                callback that relays progress events to all callers. It
+                must enforce this caller's deadline itself (deadline_at)
+            at: This caller's deadline (time.monotonic() value) for waiting
+                on another caller's result (None waits until it is done)
+            emit: Receives this caller's progress events
+
+        Returns:
+            Tuple[Any, bool]: (result, shared) where shared is True if this
+            caller reused another caller's in-flight result
+
+        Raises:
+            DeadlineExceeded: If this caller's deadline passed while waiting,
+                or this caller ran the work and it ran out of time
+            Exception: Whatever `fn` raised, for the caller that ran it and
+                all waiters (except DeadlineExceeded, which waiters retry)
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _Call()
+                    self._calls[key] = call
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                break
+            call.listen(emit)
+            try:
+                # Recomputed on every retry: a takeover does not restart the wait
+                timeout = None if at is None else max(0.0, at - time.monotonic())
+                return call.future.result(timeout=timeout), True
+            except FutureTimeout:
+                raise DeadlineExceeded() from None
+            except DeadlineExceeded:
+                # The leader's deadline is not ours: try again (possibly as the leader)
+                continue
+            finally:
+                call.unlisten(emit)
+
+        call.listen(emit)
+        try:
+            result = fn(call.publish)
+        except BaseException as exc:
+            call.future.set_exception(exc)
+            raise
+        else:
+            call.future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
@@ -8,6 +8,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const welcomeView = document.getElementById('welcome-view');
     const resultView = document.getElementById('result-view');
     const loadingView = document.getElementById('loading-view');
+    const loadingProgress = document.getElementById('loading-progress');
+    const loadingProgression = document.getElementById('loading-progression');
     
     const progressionDisplay = document.getElementById('progression-display');
     const progressionGroups = document.getElementById('progression-groups');
@@ -15,6 +17,20 @@ document.addEventListener('DOMContentLoaded', () => {
     const analysisCadences = document.getElementById('analysis-cadences');
     const analysisProgressions = document.getElementById('analysis-progressions');
     const downloadContainer = document.getElementById('download-container');
+    const previewSection = document.getElementById('preview-section');
+    const previewChart = document.getElementById('preview-chart');
+    const previewRoll = document.getElementById('preview-roll');
+    const rerollSection = document.getElementById('reroll-section');
+    const rerollStart = document.getElementById('reroll_start');
+    const rerollEnd = document.getElementById('reroll_end');
+    const rerollTarget = document.getElementById('reroll_target');
+    const rerollBtn = document.getElementById('reroll-btn');
+    let sessionId = null;
+
+    const CADENCE_NAMES = {
+        authentic: 'Authentic Cadence',
+        plagal: 'Plagal Cadence'
+    };
 
     // Update length display
     lengthInput.addEventListener('input', (e) => {
@@ -43,15 +59,34 @@ document.addEventListener('DOMContentLoaded', () => {
             time_sig: formData.get('time_sig'),
             length: formData.get('length'),
             structure: formData.get('structure'),
+            style: formData.get('style'),
+            use_repeats: formData.get('use_repeats') === 'on',
+            voicing: formData.get('voicing'),
+            accompaniment: formData.getAll('accompaniment'),
+            bass_style: formData.get('bass_style'),
             add_melody: formData.get('add_melody') === 'on',
             rhythm_option: formData.get('rhythm_option'),
             use_slurs: formData.get('use_slurs') === 'on',
             use_ties: formData.get('use_ties') === 'on',
-            only_melody: formData.get('only_melody') === 'on'
+            only_melody: formData.get('only_melody') === 'on',
+            session: true,
+            // Only the analysis sections rendered below (compact format)
+            fields: ['key', 'cadences', 'circle']
         };
 
+        // Shared worksheet links pin the result with ?seed=N
+        const seed = new URLSearchParams(window.location.search).get('seed');
+        if (seed !== null && seed !== '') {
+            data.seed = parseInt(seed, 10);
+        }
+
+        loadingProgress.textContent = '';
+        loadingProgression.textContent = '';
+        loadingProgression.style.display = 'none';
+
         try {
-            const response = await fetch('/api/generate', {
+            // Start a background job and follow its progress over SSE
+            const response = await fetch('/api/jobs', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -59,20 +94,101 @@ document.addEventListener('DOMContentLoaded', () => {
                 body: JSON.stringify(data)
             });
 
+            const job = await response.json();
+
+            if (job.success) {
+                followJob(job.events_url);
+            } else {
+                failGeneration('오류 발생: ' + job.error);
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            failGeneration('서버와 통신 중 오류가 발생했습니다.');
+        }
+    });
+
+    function failGeneration(message) {
+        alert(message);
+        loadingView.style.display = 'none';
+        welcomeView.style.display = 'block';
+    }
+
+    function followJob(eventsUrl) {
+        const source = new EventSource(eventsUrl);
+        let finished = false;
+
+        // The progression is known before the score is rendered
+        source.addEventListener('section', (e) => {
+            const event = JSON.parse(e.data);
+            loadingProgression.textContent = event.progression_text;
+            loadingProgression.style.display = 'block';
+        });
+
+        source.addEventListener('measures', (e) => {
+            const event = JSON.parse(e.data);
+            const percent = Math.round(100 * event.measures / event.total);
+            loadingProgress.textContent = `마디 렌더링 ${percent}% (${event.part})`;
+        });
+
+        source.addEventListener('analysis', () => {
+            loadingProgress.textContent = '화성 분석 완료, 악보 내보내는 중...';
+        });
+
+        source.addEventListener('export', (e) => {
+            const event = JSON.parse(e.data);
+            loadingProgress.textContent = `MusicXML ${Math.round(event.bytes / 1024)}KB 작성 완료`;
+        });
+
+        source.addEventListener('done', (e) => {
+            finished = true;
+            source.close();
+            renderResult(JSON.parse(e.data));
+        });
+
+        source.addEventListener('error', (e) => {
+            // Server-sent 'error' events carry data; connection errors do not
+            if (e.data) {
+                finished = true;
+                source.close();
+                failGeneration('오류 발생: ' + JSON.parse(e.data).error);
+            } else if (source.readyState === EventSource.CLOSED && !finished) {
+                failGeneration('서버와 통신 중 오류가 발생했습니다.');
+            }
+        });
+    }
+
+    // Regenerate a measure range of the current score
+    rerollBtn.addEventListener('click', async () => {
+        if (!sessionId) {
+            return;
+        }
+        rerollBtn.disabled = true;
+        try {
+            const response = await fetch('/api/reroll', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    session_id: sessionId,
+                    start: parseInt(rerollStart.value, 10),
+                    end: parseInt(rerollEnd.value, 10),
+                    target: rerollTarget.value
+                })
+            });
+
             const result = await response.json();
 
             if (result.success) {
                 renderResult(result);
             } else {
                 alert('오류 발생: ' + result.error);
-                loadingView.style.display = 'none';
-                welcomeView.style.display = 'block';
             }
         } catch (error) {
             console.error('Error:', error);
             alert('서버와 통신 중 오류가 발생했습니다.');
-            loadingView.style.display = 'none';
-            welcomeView.style.display = 'block';
+        } finally {
+            rerollBtn.disabled = false;
         }
     });
 
@@ -99,22 +215,36 @@ document.addEventListener('DOMContentLoaded', () => {
         analysisKey.textContent = analysis.key;
         
         analysisCadences.innerHTML = '';
-        analysis.cadences.forEach(c => {
+        analysis.cadences.forEach(([measure, type]) => {
             const li = document.createElement('li');
-            li.textContent = c;
+            li.textContent = `${CADENCE_NAMES[type] || type} (마디 ${measure + 1}-${measure + 2})`;
             analysisCadences.appendChild(li);
         });
 
         analysisProgressions.innerHTML = '';
-        analysis.harmonic_progressions.forEach(p => {
+        analysis.circle.forEach(i => {
             const li = document.createElement('li');
-            li.textContent = p;
+            li.textContent = `Circle of Fifths: ${prog[i]} -> ${prog[i + 1]}`;
             analysisProgressions.appendChild(li);
         });
 
+        // Server-rendered SVG previews (immutable URLs, cached by the browser)
+        const previews = result.previews || {};
+        previewChart.src = previews.chart || '';
+        previewChart.style.display = previews.chart ? 'block' : 'none';
+        previewRoll.src = previews.roll || '';
+        previewRoll.parentElement.style.display = previews.roll ? 'block' : 'none';
+        previewSection.style.display = previews.chart ? 'block' : 'none';
+
         // Download link
         downloadContainer.innerHTML = result.download_html;
 
+        // Partial regeneration is available while the session lives
+        sessionId = result.session_id || null;
+        rerollSection.style.display = sessionId ? 'block' : 'none';
+        rerollStart.max = prog.length;
+        rerollEnd.max = prog.length;
+
         // Switch views
         loadingView.style.display = 'none';
         resultView.style.display = 'block';
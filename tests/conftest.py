@@ -0,0 +1,18 @@
+"""
+Shared pytest setup
+
+Imports the packages from this checkout and keeps the web app from opening
+the persistent and shared score caches of the installation under test
+and from rate limiting the test client.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault('CHORDGEN_CACHE', '0')
+os.environ.setdefault('CHORDGEN_SHARED_CACHE', '0')
+os.environ.setdefault('CHORDGEN_RATE', '0')
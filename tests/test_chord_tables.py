@@ -0,0 +1,41 @@
+"""Tests for sharing the precomputed chord tables (src/core/chord_tables.py)."""
+
+import json
+
+import pytest
+
+from src.core import chord_tables
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    """Runs a test against an empty table dict and restores the real one afterwards."""
+    exported = chord_tables.export_tables()
+    monkeypatch.setattr(chord_tables, '_TABLES', {})
+    return exported
+
+
+def test_export_install_round_trip(tables):
+    chord_tables.install_tables(tables)
+    assert len(chord_tables._TABLES) == len(chord_tables.TONICS) * len(chord_tables.MODES)
+    entry = chord_tables.key_table('G', 'major').chords['V7']
+    assert entry.names == ('D5', 'F#5', 'A5', 'C6')
+    assert isinstance(entry.midi, tuple)
+
+
+def test_export_is_json_with_a_format_version(tables):
+    payload = json.loads(tables)
+    assert payload['format'] == chord_tables.TABLE_FORMAT
+
+
+@pytest.mark.parametrize('data', [
+    b'\x80\x04K\x01.',                                  # a pickle
+    b'{"format": 0, "tables": []}',
+    b'[]',
+    b'{"format": 1, "tables": [["H", "major", [], [], []]]}',
+    b'{"format": 1, "tables": [["C", "major", [], [], [[1, 2]]]]}',
+])
+def test_malformed_data_is_rejected_without_installing(tables, data):
+    with pytest.raises(ValueError):
+        chord_tables.install_tables(data)
+    assert chord_tables._TABLES == {}
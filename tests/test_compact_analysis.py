@@ -0,0 +1,26 @@
+"""Tests for selecting compact analysis fields (src/core/compact_analysis.py)."""
+
+import pytest
+
+from src.core.compact_analysis import COMPACT_FIELDS, select_fields
+from src.web.app import app
+
+
+def test_select_fields_keeps_the_canonical_order():
+    assert select_fields('voice_leading, key,') == ('key', 'voice_leading')
+    assert select_fields(['all']) == COMPACT_FIELDS
+    assert select_fields([]) == ()
+
+
+@pytest.mark.parametrize('value', [['cadence'], 'bogus', 'key,bogus', 5])
+def test_select_fields_rejects_unknown_names(value):
+    with pytest.raises(ValueError):
+        select_fields(value)
+
+
+@pytest.mark.parametrize('fields', [['cadence'], 'bogus'])
+def test_unknown_fields_are_a_bad_request(fields):
+    response = app.test_client().post('/api/generate', json={'length': 4, 'seed': 1, 'fields': fields})
+    assert response.status_code == 400
+    error = response.get_json()['error']
+    assert all(field in error for field in COMPACT_FIELDS)
@@ -0,0 +1,42 @@
+"""Tests for per-request deadlines of coalesced generations (src/web/app.py)."""
+
+import threading
+import time
+
+import pytest
+
+from src.web.app import app
+
+BODY = {'length': 256, 'accompaniment': ['bass']}
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize('seeded', [False, True])
+def test_short_timeout_is_enforced_for_the_caller_that_generates(client, seeded):
+    body = {**BODY, 'timeout': 0.05, **({'seed': 7} if seeded else {})}
+    began = time.monotonic()
+    response = client.post('/api/generate', json=body)
+    assert response.status_code == 504
+    assert response.get_json()['timeout'] is True
+    assert time.monotonic() - began < 1.5
+
+
+def test_follower_takes_over_when_the_leader_times_out():
+    seed = int(time.time())
+    results = {}
+
+    def post(name, body, delay):
+        time.sleep(delay)
+        results[name] = app.test_client().post('/api/generate', json=body).status_code
+
+    threads = [threading.Thread(target=post, args=('short', {**BODY, 'seed': seed, 'timeout': 0.05}, 0)),
+               threading.Thread(target=post, args=('patient', {**BODY, 'seed': seed}, 0.01))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {'short': 504, 'patient': 200}
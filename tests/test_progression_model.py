@@ -0,0 +1,61 @@
+"""Tests for opening progression model files (src/core/progression_model.py)."""
+
+import struct
+
+import pytest
+
+from src.core import progression_model
+from src.core.chord_match import DIATONIC_FIGURES
+from src.core.progression_model import ProgressionModelFile, count_progressions, write_model
+from src.web.app import app
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    path = tmp_path / 'model.bin'
+    counts = count_progressions([('major', ['I', 'IV', 'V', 'I']), ('minor', ['i', 'iv', 'V', 'i'])])
+    write_model(str(path), counts, {mode: DIATONIC_FIGURES[mode] for mode in counts})
+    return path
+
+
+def test_model_round_trip(model_path):
+    model = ProgressionModelFile(str(model_path))
+    table = model.table('major')
+    assert table.vocab == DIATONIC_FIGURES['major']
+    assert table.pieces == 1
+    assert len(table.sample(8)) == 8
+
+
+@pytest.mark.parametrize('cut', [8, 40, -4])
+def test_truncated_file_raises_value_error(model_path, cut):
+    data = model_path.read_bytes()
+    model_path.write_bytes(data[:cut])
+    with pytest.raises(ValueError, match='Truncated'):
+        ProgressionModelFile(str(model_path))
+
+
+def test_entry_offset_past_the_end_raises_value_error(model_path):
+    data = bytearray(model_path.read_bytes())
+    # Data offset of the first entry (last field of '<8sHHII')
+    struct.pack_into('<I', data, 8 + 16, len(data))
+    model_path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match='Truncated'):
+        ProgressionModelFile(str(model_path))
+
+
+def test_foreign_file_raises_value_error(tmp_path):
+    path = tmp_path / 'foreign.bin'
+    path.write_bytes(b'PK\x03\x04' + bytes(100))
+    with pytest.raises(ValueError, match='Not a progression model'):
+        ProgressionModelFile(str(path))
+
+
+def test_damaged_model_hides_the_chorale_style(model_path, monkeypatch):
+    model_path.write_bytes(model_path.read_bytes()[:40])
+    monkeypatch.setenv('CHORDGEN_PROGRESSION_MODEL', str(model_path))
+    monkeypatch.setattr(progression_model, '_loaded', {})
+    client = app.test_client()
+    assert client.get('/api/status').status_code == 200
+    assert 'chorale' not in client.get('/api/status').get_json()['styles']
+    response = client.post('/api/generate', json={'length': 4, 'style': 'chorale'})
+    assert response.status_code == 400
@@ -0,0 +1,111 @@
+"""Tests for partial regeneration of editing sessions (src/web/sessions.py)."""
+
+import random
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from src.web import sessions
+from src.web.app import app
+
+PARAMS = {'length': 8, 'seed': 77, 'accompaniment': ['bass'], 'session': True,
+          'use_slurs': True, 'use_ties': True, 'time_sig': '4/4'}
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def new_session(client) -> sessions.Session:
+    response = client.post('/api/generate', json=PARAMS)
+    assert response.status_code == 200
+    return sessions.store.get(response.get_json()['session_id'])
+
+
+def measures(musicxml: bytes):
+    """Serialized <measure> elements per part."""
+    root = ET.fromstring(musicxml)
+    return [[ET.tostring(m) for m in part.findall('measure')] for part in root.findall('part')]
+
+
+def test_sessions_of_a_shared_seed_are_independent(client):
+    first, second = new_session(client), new_session(client)
+    assert first.id != second.id
+    assert first.progression == second.progression
+    before = second.musicxml()
+    with first.lock:
+        sessions.reroll(first, 2, 4, 'both', random.Random(3))
+    assert second.musicxml() == before
+
+
+@pytest.mark.parametrize('target', ['chords', 'melody', 'both'])
+def test_reroll_splices_only_the_range(client, target):
+    session = new_session(client)
+    before = measures(session.musicxml())
+    melody = [list(m) for m in session.melody]
+    start, end = 3, 5
+    with session.lock:
+        sessions.reroll(session, start, end, target, random.Random(11))
+    after = measures(session.musicxml())
+
+    assert [len(part) for part in after] == [len(part) for part in before]
+    for old, new in zip(before, after):
+        # Ties, slurs and walking-bass approach notes may touch one measure on each side
+        assert old[:start - 1] == new[:start - 1]
+        assert old[end + 1:] == new[end + 1:]
+    assert session.melody[:start] == melody[:start]
+    assert session.melody[end:] == melody[end:]
+    assert len(session.progression) == PARAMS['length']
+    assert len(session.timeline) == PARAMS['length']
+
+
+def test_reroll_endpoint_returns_the_edited_score(client):
+    session = new_session(client)
+    response = client.post('/api/reroll', json={'session_id': session.id, 'start': 2, 'end': 4,
+                                                'seed': 5})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['session_id'] == session.id
+    assert body['progression'] == session.progression
+
+
+def test_failed_splice_leaves_the_session_unchanged(client, monkeypatch):
+    session = new_session(client)
+    progression, timeline, melody = list(session.progression), list(session.timeline), list(session.melody)
+    musicxml = session.musicxml()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('splice failed')
+
+    monkeypatch.setattr(session.document, 'set_boundary_tie', fail)
+    with session.lock, pytest.raises(RuntimeError):
+        sessions.reroll(session, 3, 5, 'both', random.Random(9))
+    monkeypatch.undo()
+    assert session.progression == progression
+    assert session.timeline == timeline
+    assert session.melody == melody
+    assert session.musicxml() == musicxml
+
+
+def test_invalid_ranges_are_rejected(client):
+    session = new_session(client)
+    for start, end in [(-1, 2), (4, 4), (6, 9)]:
+        with pytest.raises(ValueError):
+            sessions.reroll(session, start, end)
+    with pytest.raises(ValueError):
+        sessions.reroll(session, 0, 1, 'drums')
+
+
+def test_store_is_bounded_by_estimated_memory(client):
+    session = new_session(client)
+    musicxml = session.musicxml()
+    size = len(musicxml) * sessions.DOCUMENT_OVERHEAD
+    store = sessions.SessionStore(max_sessions=100, max_bytes=3 * size)
+    created = [store.create(session.params, session.progression, session.timeline,
+                            session.melody, session.kinds, musicxml, session.marks)
+               for _ in range(4)]
+    assert store.size == 3 * size
+    assert len(store) == 3
+    assert store.get(created[0].id) is None
+    assert store.get(created[-1].id) is not None
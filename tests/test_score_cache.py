@@ -0,0 +1,75 @@
+"""Tests for the persistent score cache's LRU eviction (src/utils/score_cache.py)."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import score_cache
+from src.utils.score_cache import ScoreCache, cache_key
+
+ENTRY = 1000
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing wall clock, so access order does not depend on timer resolution."""
+    now = [1000.0]
+
+    def tick():
+        now[0] += 1
+        return now[0]
+
+    monkeypatch.setattr(score_cache, 'time', SimpleNamespace(time=tick, monotonic=time.monotonic))
+    return now
+
+
+def entry(name: str) -> dict:
+    return {'result': name.encode('ascii').ljust(ENTRY, b' ')}
+
+
+def test_cache_key_is_stable_and_order_independent():
+    assert cache_key({'a': 1, 'b': [2]}) == cache_key({'b': [2], 'a': 1})
+    assert cache_key({'a': 1}) != cache_key({'a': 2})
+
+
+def test_evicts_least_recently_read_entries_first(tmp_path, clock):
+    # memory_bytes=1 keeps every read on SQLite
+    cache = ScoreCache(str(tmp_path / 'c.sqlite3'), max_bytes=3500, memory_bytes=1)
+    for name in 'abc':
+        cache.put(name, entry(name))
+    assert cache.get('a') == entry('a')
+    cache.put('d', entry('d'))
+    assert cache.get('b') is None
+    for name in 'acd':
+        assert cache.get(name) == entry(name)
+    assert cache.stats()['disk_bytes'] == 3 * ENTRY
+
+
+def test_eviction_frees_down_to_the_target(tmp_path, clock):
+    cache = ScoreCache(str(tmp_path / 'c.sqlite3'), max_bytes=10 * ENTRY, memory_bytes=1)
+    for i in range(11):
+        cache.put(str(i), entry(str(i)))
+    # Over the limit: evicted to 90% of max_bytes, oldest first
+    assert [cache.get(str(i)) is not None for i in range(11)] == [False, False] + [True] * 9
+    assert cache.stats()['disk_bytes'] == 9 * ENTRY
+
+
+def test_memory_tier_hits_count_as_recent_access(tmp_path, clock):
+    cache = ScoreCache(str(tmp_path / 'c.sqlite3'), max_bytes=3500, memory_bytes=10 * ENTRY)
+    for name in 'abc':
+        cache.put(name, entry(name))
+    # Served from memory; the access time reaches SQLite with the next write
+    assert cache.get('a') == entry('a')
+    cache.put('d', entry('d'))
+    rows = dict(cache._conn().execute('SELECT DISTINCT key, 1 FROM artifacts').fetchall())
+    assert sorted(rows) == ['a', 'c', 'd']
+
+
+def test_replacing_an_entry_keeps_the_running_total(tmp_path, clock):
+    cache = ScoreCache(str(tmp_path / 'c.sqlite3'), memory_bytes=1)
+    cache.put('a', {'result': b'x' * 100, 'musicxml': b'y' * 50})
+    cache.put('a', {'result': b'x' * 10})
+    assert cache.get('a') == {'result': b'x' * 10}
+    assert cache.stats()['disk_bytes'] == 10
+    assert cache.stats()['disk_entries'] == 1
@@ -0,0 +1,155 @@
+"""Tests for the cross-process shared memory cache (src/utils/shared_cache.py)."""
+
+import multiprocessing
+import os
+
+import pytest
+
+from src.utils import shared_cache
+from src.utils.shared_cache import SharedMemoryCache
+
+pytestmark = pytest.mark.skipif(shared_cache.fcntl is None, reason='requires fcntl')
+
+RING = 64 * 1024
+
+
+def value_of(key: str, size: int = 4000) -> bytes:
+    """Deterministic payload of a key, so any hit can be checked for consistency."""
+    return (key.encode('ascii') * (size // len(key) + 1))[:size]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = SharedMemoryCache(str(tmp_path / 'shared.cache'), RING, buckets=64, ways=4)
+    yield c
+    c.close()
+
+
+def test_put_get_and_replace(cache):
+    assert cache.get('a') is None
+    cache.put('a', {'result': b'{}', 'musicxml': b'<score/>'})
+    assert cache.get('a') == {'result': b'{}', 'musicxml': b'<score/>'}
+    cache.put('a', {'result': b'[1]'})
+    assert cache.get('a') == {'result': b'[1]'}
+    assert cache.stats()['entries'] == 1
+
+
+def test_entries_over_a_quarter_of_the_ring_are_skipped(cache):
+    cache.put('big', {'data': bytes(RING // 4 + 1)})
+    assert cache.get('big') is None
+
+
+def test_reader_discards_a_slot_rewritten_while_reading(cache, monkeypatch):
+    cache.put('k', {'v': b'old'})
+    read_entry = cache._read_entry
+
+    def racing_read(offset, length):
+        entry = read_entry(offset, length)
+        cache.put('k', {'v': b'new'})  # a writer moves the slot's sequence number
+        return entry
+
+    monkeypatch.setattr(cache, '_read_entry', racing_read)
+    assert cache.get('k') is None
+    monkeypatch.undo()
+    assert cache.get('k') == {'v': b'new'}
+
+
+def test_slot_being_written_is_invisible(cache):
+    cache.put('k', {'v': b'1'})
+    slot, seq, _, _ = cache._find(shared_cache._digest('k'))
+    shared_cache._SEQ.pack_into(cache._mm, cache._slot_pos(slot), seq + 1)
+    assert cache.get('k') is None
+
+
+def test_ring_wrap_invalidates_overwritten_entries(cache):
+    keys = [f"key-{i:03d}" for i in range(60)]
+    for key in keys:
+        cache.put(key, {'v': value_of(key)})
+    # About 16 entries fit in the ring: the oldest are gone, none is corrupted
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) == {'v': value_of(keys[-1])}
+    for key in keys:
+        entry = cache.get(key)
+        assert entry is None or entry == {'v': value_of(key)}
+    assert cache.stats()['bytes'] <= RING
+
+
+def test_hot_entry_is_promoted_before_it_is_overwritten(cache):
+    cache.put('hot', {'v': value_of('hot')})
+    cache.put('cold', {'v': value_of('cold')})
+    for i in range(60):
+        cache.put(f"filler-{i}", {'v': value_of(f"filler-{i}")})
+        assert cache.get('hot') == {'v': value_of('hot')}
+    assert cache.get('cold') is None
+
+
+def _writer(path: str, keys, rounds: int) -> None:
+    c = SharedMemoryCache(path, RING, buckets=64, ways=4)
+    for _ in range(rounds):
+        for key in keys:
+            c.put(key, {'v': value_of(key, 3000)})
+    c.close()
+
+
+def test_processes_see_consistent_entries(tmp_path):
+    path = str(tmp_path / 'shared.cache')
+    reader = SharedMemoryCache(path, RING, buckets=64, ways=4)
+    context = multiprocessing.get_context('fork')
+    writers = [context.Process(target=_writer, args=(path, [f"w{n}-{i}" for i in range(12)], 30))
+               for n in range(2)]
+    for w in writers:
+        w.start()
+    keys = [f"w{n}-{i}" for n in range(2) for i in range(12)]
+    while any(w.is_alive() for w in writers):
+        for key in keys:
+            entry = reader.get(key)
+            assert entry is None or entry == {'v': value_of(key, 3000)}
+    for w in writers:
+        w.join()
+        assert w.exitcode == 0
+    # An entry written by another process is visible here
+    late = context.Process(target=_writer, args=(path, ['late'], 1))
+    late.start()
+    late.join()
+    assert reader.get('late') == {'v': value_of('late', 3000)}
+    reader.close()
+
+
+def test_get_or_build_builds_once(tmp_path):
+    path = str(tmp_path / 'shared.cache')
+    first = SharedMemoryCache(path, RING)
+    second = SharedMemoryCache(path, RING)
+    loaded = []
+    assert first.get_or_build('tables', lambda: b'payload', loaded.append) is False
+    assert second.get_or_build('tables', lambda: pytest.fail('built twice'), loaded.append) is True
+    assert loaded == [b'payload']
+    first.close()
+    second.close()
+
+
+def test_geometry_change_replaces_the_file(tmp_path):
+    path = str(tmp_path / 'shared.cache')
+    c = SharedMemoryCache(path, RING)
+    c.put('k', {'v': b'1'})
+    c.close()
+    c = SharedMemoryCache(path, 2 * RING)
+    assert c.get('k') is None
+    c.close()
+    assert os.listdir(tmp_path) == ['shared.cache']
+
+
+def test_refuses_files_other_users_can_access(tmp_path):
+    path = str(tmp_path / 'shared.cache')
+    SharedMemoryCache(path, RING).close()
+    os.chmod(path, 0o644)
+    with pytest.raises(OSError):
+        SharedMemoryCache(path, RING)
+
+
+def test_refuses_symlinks(tmp_path):
+    target = tmp_path / 'target'
+    SharedMemoryCache(str(target), RING).close()
+    link = tmp_path / 'link'
+    link.symlink_to(target)
+    with pytest.raises(OSError):
+        SharedMemoryCache(str(link), RING)
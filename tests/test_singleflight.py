@@ -0,0 +1,186 @@
+"""Tests for request coalescing with per-caller deadlines (src/web/singleflight.py)."""
+
+import threading
+import time
+
+import pytest
+
+from src.core.deadline import DeadlineExceeded, check_deadline, deadline_at
+from src.web.singleflight import SingleFlight
+
+
+def start(target, *args, **kwargs):
+    """Runs target in a thread; returns the thread and a dict with its result or exception."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = target(*args, **kwargs)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def wait_in_flight(flights, key):
+    while not flights.in_flight(key):
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def work(publish):
+        runs.append(1)
+        release.wait(5)
+        return 'score'
+
+    leader, first = start(flights.do, 'k', work)
+    wait_in_flight(flights, 'k')
+    follower, second = start(flights.do, 'k', work)
+    while flights.coalesced == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+    assert first['result'] == ('score', False)
+    assert second['result'] == ('score', True)
+    assert len(runs) == 1
+    assert not flights.in_flight('k')
+
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def work(publish):
+        release.wait(5)
+        raise ValueError('bad parameters')
+
+    leader, first = start(flights.do, 'k', work)
+    wait_in_flight(flights, 'k')
+    follower, second = start(flights.do, 'k', work)
+    while flights.coalesced == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+    assert isinstance(first['error'], ValueError)
+    assert isinstance(second['error'], ValueError)
+
+
+def test_progress_events_are_replayed_and_relayed_to_joiners():
+    flights = SingleFlight()
+    published = threading.Event()
+    release = threading.Event()
+    seen = {'leader': [], 'follower': []}
+
+    def work(publish):
+        publish('section', {'index': 0})
+        published.set()
+        release.wait(5)
+        publish('measures', {'measures': 4})
+        return 'score'
+
+    leader, _ = start(flights.do, 'k', work, emit=lambda name, data: seen['leader'].append(name))
+    published.wait(5)
+    follower, outcome = start(flights.do, 'k', work,
+                              emit=lambda name, data: seen['follower'].append(name))
+    while flights.coalesced == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+    assert outcome['result'] == ('score', True)
+    assert seen['leader'] == seen['follower'] == ['section', 'measures']
+
+
+def test_follower_waits_only_until_its_own_timeout():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def work(publish):
+        release.wait(5)
+        return 'score'
+
+    leader, first = start(flights.do, 'k', work)
+    wait_in_flight(flights, 'k')
+    began = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        flights.do('k', work, at=time.monotonic() + 0.05)
+    assert time.monotonic() - began < 1
+    release.set()
+    leader.join()
+    assert first['result'] == ('score', False)
+
+
+def test_leader_deadline_is_not_propagated_to_followers():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def short_work(publish):
+        # The first caller's work runs under a deadline that has already passed
+        runs.append('short')
+        release.wait(5)
+        with deadline_at(time.monotonic() - 1):
+            check_deadline()
+
+    def work(publish):
+        runs.append('full')
+        return 'score'
+
+    leader, first = start(flights.do, 'k', short_work)
+    wait_in_flight(flights, 'k')
+    follower, second = start(flights.do, 'k', work)
+    while flights.coalesced == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+    assert isinstance(first['error'], DeadlineExceeded)
+    # The follower retried and ran the work itself
+    assert second['result'] == ('score', False)
+    assert runs == ['short', 'full']
+
+
+def test_retry_does_not_restart_the_wait():
+    flights = SingleFlight()
+    failing = threading.Event()
+    release = threading.Event()
+
+    def short_work(publish):
+        failing.wait(5)
+        raise DeadlineExceeded()
+
+    def slow_work(publish):
+        release.wait(5)
+        return 'score'
+
+    def bounded_work(publish):
+        # Runs only if this caller takes over; bounded by its own deadline like the app's work
+        with deadline_at(at):
+            while True:
+                check_deadline()
+                time.sleep(0.005)
+
+    leader, _ = start(flights.do, 'k', short_work)
+    wait_in_flight(flights, 'k')
+    waiter, _ = start(flights.do, 'k', slow_work)
+    at = time.monotonic() + 0.3
+    began = time.monotonic()
+    follower, outcome = start(flights.do, 'k', bounded_work, at=at)
+    while flights.coalesced < 2:
+        time.sleep(0.001)
+    time.sleep(0.15)
+    failing.set()
+    follower.join()
+    assert isinstance(outcome['error'], DeadlineExceeded)
+    assert time.monotonic() - began < 0.42
+    release.set()
+    leader.join()
+    waiter.join()
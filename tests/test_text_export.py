@@ -0,0 +1,97 @@
+"""Tests for ABC and LilyPond output written from event data (src/core/text_export.py)."""
+
+import random
+
+import pytest
+from music21 import converter, harmony
+
+from src.core import form_to_abc, form_to_lilypond, plan_form, render_form, render_form_events, render_text
+
+
+def events(structure: str, tonic: str, mode: str, time_sig: str, length: int, seed: int):
+    rng = random.Random(seed)
+    sections = plan_form(structure, tonic, mode, length, rng)
+    melody, timelines = render_form_events(sections, tonic, mode, time_sig, rng=rng)
+    return sections, melody, timelines
+
+
+def pitches_and_length(part):
+    """MIDI pitches (tied pieces merged) and total quarter length of a part's notes."""
+    notes = [n for n in part.recurse().notes if not isinstance(n, harmony.ChordSymbol)]
+    merged = []
+    for n in notes:
+        item = tuple(p.midi for p in n.pitches)
+        if not merged or merged[-1] != item:
+            merged.append(item)
+    return merged, sum(float(n.quarterLength) for n in notes)
+
+
+@pytest.mark.parametrize('tonic, mode, time_sig', [
+    ('C', 'major', '4/4'), ('Eb', 'minor', '3/4'), ('F#', 'major', '6/8'), ('Bb', 'minor', '5/4'),
+])
+def test_abc_matches_the_music21_score(tonic, mode, time_sig):
+    rng = random.Random(4)
+    parts = render_form(plan_form('AABA', tonic, mode, 8, rng), tonic, mode, time_sig,
+                        use_ties=True, use_slurs=True, rng=rng)
+    sections, melody, timelines = events('AABA', tonic, mode, time_sig, 8, 4)
+    abc = form_to_abc(sections, melody, timelines, tonic, mode, time_sig, 'Test', True, True, False)
+    parsed = converter.parse(abc, format='abc')
+    assert len(parsed.parts) == len(parts)
+    for expected, written in zip(parts, parsed.parts):
+        assert pitches_and_length(written) == pitches_and_length(expected)
+
+
+def test_abc_header_and_repeats():
+    sections, melody, timelines = events('AABA', 'G', 'major', '3/4', 4, 1)
+    abc = form_to_abc(sections, melody, timelines, 'G', 'major', '3/4', 'Worksheet',
+                      use_slurs=True, use_ties=True, use_repeats=True)
+    lines = abc.splitlines()
+    assert lines[:5] == ['X:1', 'T:Worksheet', 'M:3/4', 'L:1/8', 'K:G']
+    assert 'V:1 clef=treble name="Melody"' in lines
+    melody_line = lines[lines.index('V:1 clef=treble name="Melody"') + 1]
+    assert melody_line.startswith('|:') and ':|' in melody_line
+    assert melody_line.endswith('|]')
+    assert '"G"' in melody_line
+
+
+def test_abc_minor_key_name():
+    sections, melody, timelines = events('A', 'Eb', 'minor', '4/4', 4, 2)
+    abc = form_to_abc(sections, melody, timelines, 'Eb', 'minor', '4/4')
+    assert 'K:Ebm' in abc.splitlines()
+
+
+def test_lilypond_structure():
+    sections, melody, timelines = events('AABA', 'G', 'major', '3/4', 4, 1)
+    ly = form_to_lilypond(sections, melody, timelines, 'G', 'major', '3/4', 'Worksheet',
+                          use_slurs=True, use_ties=True, use_repeats=True)
+    assert ly.startswith('\\version "2.24.0"')
+    assert '\\header { title = "Worksheet" tagline = ##f }' in ly
+    assert '\\clef treble \\key g \\major \\time 3/4' in ly
+    assert '\\repeat volta 2 {' in ly
+    assert 'g1*3/4' in ly  # chord names last a whole 3/4 measure
+    assert '\\new Staff \\with { instrumentName = "Melody" } \\melodyPart' in ly
+    assert ly.count('{') == ly.count('}')
+
+
+def test_lilypond_minor_key_and_final_bar():
+    sections, melody, timelines = events('A', 'Eb', 'minor', '4/4', 4, 2)
+    ly = form_to_lilypond(sections, melody, timelines, 'Eb', 'minor', '4/4')
+    assert '\\key ees \\minor' in ly
+    assert '\\bar "|."' in ly
+
+
+def test_event_rendering_reports_progress_per_section():
+    rng = random.Random(5)
+    sections = plan_form('AABA', 'C', 'major', 8, rng)
+    calls = []
+    render_form_events(sections, 'C', 'major', '4/4', rng=rng,
+                       progress=lambda kind, label, measures: calls.append((kind, label, measures)))
+    assert calls == [('melody', 'A', 2), ('melody', 'B', 2), ('chords', 'A', 2), ('chords', 'B', 2)]
+
+
+def test_render_text_dispatches_by_format():
+    args = events('A', 'C', 'major', '4/4', 4, 3) + ('C', 'major', '4/4')
+    assert render_text('abc', *args) == form_to_abc(*args)
+    assert render_text('ly', *args) == form_to_lilypond(*args)
+    with pytest.raises(ValueError):
+        render_text('midi', *args)
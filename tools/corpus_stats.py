@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Corpus harmonic statistics
+
+Computes the compact harmony analysis (cadence types, circle-of-fifths
+motion, scale-degree usage, tensions) of many progressions in a process
+pool and aggregates the histograms per source and mode, so generated
+exercise banks can be compared with real repertoire. Sources:
+
+  --generate N     N progressions from generate_progression (seeds S..S+N-1)
+  --ndjson FILE    progressions in the POST /api/analyze NDJSON format
+  --composer NAME  scores from music21's bundled corpus
+  --folder DIR     MusicXML scores under a directory
+
+Every finished unit of work (a score, or a chunk of progressions) is
+appended to OUTPUT.partial as it completes. If the run is interrupted,
+running the same command again skips the journaled units and continues;
+the journal is removed once OUTPUT has been written.
+
+Usage:
+  python tools/corpus_stats.py [--generate N] [--ndjson FILE ...] [--composer bach]
+                               [--folder DIR ...] [--output PATH] [--jobs N] [--restart]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from music21.exceptions21 import Music21Exception
+
+from src.core.batch import parse_progression
+from src.core.chord_tables import chord_entry
+from src.core.chord_generator import PROGRESSION_STYLES, generate_progression
+from src.core.harmony_stats import HarmonyHistogram, batch_statistics
+from src.utils.corpus import corpus_paths, file_statistics, map_parallel
+
+# Journal format version (a journal written by another version is not resumed)
+JOURNAL_VERSION = 1
+
+# (unit id, group, (kind, payload))
+Unit = Tuple[str, str, Tuple[str, Any]]
+
+
+def generated_statistics(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Generates one chunk of progressions and returns their statistics."""
+    items = []
+    for seed in range(spec['start'], spec['start'] + spec['count']):
+        mode = spec['modes'][seed % len(spec['modes'])]
+        prog = generate_progression(spec['tonic'], mode, spec['length'],
+                                    rng=random.Random(seed), style=spec['style'])
+        items.append((prog, spec['tonic'], mode))
+    return {'stats': batch_statistics(items)}
+
+
+def run_unit(work: Tuple[str, Any]) -> Dict[str, Any]:
+    """Worker entry point: dispatches a unit to its statistics function."""
+    kind, payload = work
+    if kind == 'file':
+        return file_statistics(payload)
+    if kind == 'generate':
+        return generated_statistics(payload)
+    return {'stats': batch_statistics(payload)}
+
+
+def read_ndjson(path: str, batch: int) -> List[Unit]:
+    """
+    Splits an NDJSON progression file into units of batch items.
+
+    Lines that are not valid JSON, or whose mode, tonic or chord figures
+    cannot be read, are reported with their line number and skipped.
+    """
+    units, items, first = [], [], 1
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                prog = parse_progression(item.get('progression'))
+                mode = item.get('mode', 'major')
+                if mode not in ('major', 'minor'):
+                    raise ValueError(f"Unknown mode: {mode!r}")
+                tonic = item.get('tonic', 'C')
+                if not isinstance(tonic, str):
+                    raise ValueError(f"Invalid tonic: {tonic!r}")
+                # Skip the line here rather than fail its whole batch in a worker
+                for figure in prog:
+                    chord_entry(figure, tonic, mode)
+            except (ValueError, AttributeError, Music21Exception) as e:
+                print(f"[WARN] {path}:{number}: {e}", file=sys.stderr)
+                continue
+            if not items:
+                first = number
+            items.append((prog, tonic, mode))
+            if len(items) >= batch:
+                units.append((f"{path}:{first}", path, ('batch', items)))
+                items = []
+    if items:
+        units.append((f"{path}:{first}", path, ('batch', items)))
+    return units
+
+
+def plan_units(args: argparse.Namespace) -> List[Unit]:
+    """Lists the units of work of every requested source."""
+    units: List[Unit] = []
+    if args.generate:
+        modes = ['major', 'minor'] if args.mode == 'both' else [args.mode]
+        for start in range(args.seed, args.seed + args.generate, args.batch):
+            count = min(args.batch, args.seed + args.generate - start)
+            spec = {'start': start, 'count': count, 'tonic': args.tonic, 'modes': modes,
+                    'length': args.length, 'style': args.style}
+            units.append((f"generated:{start}", 'generated', ('generate', spec)))
+    for path in args.ndjson:
+        units.extend(read_ndjson(path, args.batch))
+    if args.composer:
+        group = f"corpus:{args.composer}"
+        units.extend((path, group, ('file', path)) for path in corpus_paths(args.composer))
+    for folder in args.folder:
+        units.extend((path, folder, ('file', path)) for path in corpus_paths(None, [folder]))
+    return units
+
+
+def read_journal(path: str, config: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Reads the finished units of an interrupted run.
+
+    A torn last line (the process was killed mid-write) is cut off so new
+    entries append cleanly.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: Journal entries, or None if the
+        journal belongs to a run with different options
+    """
+    entries: List[Dict[str, Any]] = []
+    with open(path, 'rb+') as f:
+        header = f.readline()
+        try:
+            if json.loads(header).get('config') != config:
+                return None
+        except ValueError:
+            return None
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                f.truncate(offset)
+                break
+    return entries
+
+
+def write_json(path: str, data: Dict[str, Any]) -> None:
+    """Writes the result file atomically (temporary file, then rename)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def print_report(groups: Dict[str, Dict[str, HarmonyHistogram]]) -> None:
+    """Prints one comparison line per source and mode."""
+    for group, modes in groups.items():
+        for mode, histogram in sorted(modes.items()):
+            summary = histogram.summary()
+            cadences = ', '.join(f"{kind} {rate:.0%}" for kind, rate in summary['cadences'].items())
+            degrees = ' '.join(f"{rate:.0%}" for rate in summary['scale_degrees'])
+            top = ', '.join(f"{pair} {count}" for pair, count in histogram.circle.most_common(3))
+            print(f"{group} [{mode}] {histogram.progressions} progressions, {histogram.measures} measures")
+            print(f"  cadences: {cadences}")
+            print(f"  circle of fifths: {summary['circle_rate']:.1%} of transitions ({top})")
+            print(f"  scale degrees 1-{len(summary['scale_degrees'])}: {degrees}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate harmonic statistics over progressions')
+    parser.add_argument('--generate', type=int, default=0, help='Generated progressions to include')
+    parser.add_argument('--seed', type=int, default=0, help='First seed of the generated progressions')
+    parser.add_argument('--tonic', default='C', help='Key of the generated progressions')
+    parser.add_argument('--mode', choices=('major', 'minor', 'both'), default='both',
+                        help='Mode of the generated progressions (both alternates)')
+    parser.add_argument('--length', type=int, default=8, help='Measures per generated progression')
+    parser.add_argument('--style', choices=PROGRESSION_STYLES, default='textbook',
+                        help='Progression style of the generated progressions')
+    parser.add_argument('--ndjson', action='append', default=[],
+                        help='NDJSON file of {"progression", "tonic", "mode"} items (repeatable)')
+    parser.add_argument('--composer', default=None, help="music21 corpus composer (e.g. 'bach')")
+    parser.add_argument('--folder', action='append', default=[],
+                        help='Directory of MusicXML files to include (repeatable)')
+    parser.add_argument('--output', default=str(project_root / 'instance' / 'corpus_stats.json'),
+                        help='Result file (the journal is OUTPUT.partial)')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=4, help='Units per worker task')
+    parser.add_argument('--batch', type=int, default=256,
+                        help='Generated or NDJSON progressions per unit')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Seconds one unit may run before it is stopped (its worker killed if needed)')
+    parser.add_argument('--restart', action='store_true', help='Discard an interrupted run')
+    args = parser.parse_args()
+
+    units = plan_units(args)
+    if not units:
+        parser.error('nothing to analyze (use --generate, --ndjson, --composer or --folder)')
+    config = {'version': JOURNAL_VERSION, 'units': [unit_id for unit_id, _, _ in units],
+              'generate': [args.generate, args.seed, args.tonic, args.mode, args.length, args.style],
+              'batch': args.batch}
+
+    journal_path = f"{args.output}.partial"
+    entries: List[Dict[str, Any]] = []
+    if os.path.exists(journal_path) and not args.restart:
+        entries = read_journal(journal_path, config)
+        if entries is None:
+            parser.error(f"{journal_path} is from a run with different options "
+                         f"(use --restart to discard it)")
+        print(f"Resuming: {len(entries)} of {len(units)} units already done")
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(journal_path)), exist_ok=True)
+        with open(journal_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'config': config}) + '\n')
+
+    done: Set[str] = {entry['unit'] for entry in entries}
+    pending = [unit for unit in units if unit[0] not in done]
+
+    started = time.perf_counter()
+    try:
+        with open(journal_path, 'a', encoding='utf-8') as journal:
+            results = map_parallel(run_unit, [work for _, _, work in pending], args.jobs,
+                                   args.chunksize, args.timeout)
+            for (unit_id, group, _), (_, result) in zip(pending, results):
+                entry = {'unit': unit_id, 'group': group}
+                if 'error' in result:
+                    entry['error'] = result['error']
+                    print(f"[WARN] {unit_id}: {result['error']}", file=sys.stderr)
+                else:
+                    entry['stats'] = result['stats']
+                journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                journal.flush()
+                entries.append(entry)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {len(entries)} of {len(units)} units; "
+              f"run the same command again to resume", file=sys.stderr)
+        sys.exit(130)
+    elapsed = time.perf_counter() - started
+
+    totals: Dict[str, Dict[str, HarmonyHistogram]] = {}
+    errors = []
+    for entry in entries:
+        if 'error' in entry:
+            errors.append({'unit': entry['unit'], 'error': entry['error']})
+            continue
+        modes = totals.setdefault(entry['group'], {})
+        for mode, stats in entry['stats'].items():
+            modes.setdefault(mode, HarmonyHistogram()).add(stats)
+
+    write_json(args.output, {
+        'groups': {group: {mode: {'stats': histogram.to_dict(), 'summary': histogram.summary()}
+                           for mode, histogram in sorted(modes.items())}
+                   for group, modes in totals.items()},
+        'units': len(units),
+        'errors': errors,
+    })
+    os.remove(journal_path)
+
+    print(f"{len(units)} units ({len(done)} resumed, {len(pending)} computed in {elapsed:.1f}s, "
+          f"{len(errors)} failed) -> {args.output}")
+    print_report(totals)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+Load test with classroom traffic profiles
+
+Replays a generation traffic mix against a local server and reports
+throughput, latency percentiles, error rates and the server's CPU and RSS
+over time. Arrivals are scheduled up front (open loop) from a seeded RNG,
+and latency is measured from each request's scheduled time, so a server
+that falls behind shows up as latency rather than as a slower client.
+
+Profiles:
+  steady     Poisson arrivals with the everyday parameter mix
+  classroom  a trickle of requests plus bursts where a whole class clicks
+             "generate" within a couple of seconds, mostly on the same
+             worksheet seed
+  longtail   Poisson arrivals with heavy-tailed lengths and more
+             accompaniment parts
+
+Clients:
+  api  one POST /api/generate per request
+  ui   what the browser page does: POST /api/jobs with session=true and the
+       page's analysis fields, then bounded SSE reads of the job's events
+       (reconnecting with Last-Event-ID after the server's retry delay)
+       until 'done' or 'error'; latency runs to the final event
+The classroom profile uses the ui client by default, the others api.
+
+The server is either started here (--spawn, one process of main.py with
+--env overrides, e.g. CHORDGEN_THREADS=16) or an already running one is
+sampled by --pid. Results are saved as JSON; --compare prints the
+summaries of saved runs side by side.
+
+Usage:
+  python tools/load_test.py [--profile classroom] [--client ui|api] [--duration 60] [--spawn]
+                            [--env KEY=VALUE ...]
+                            [--pid PID] [--url http://127.0.0.1:5000] [--label NAME] [--output PATH]
+  python tools/load_test.py --compare RUN.json [RUN.json ...]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+project_root = Path(__file__).parent.parent
+
+# Traffic profiles: background arrival rate (requests/s), length distribution,
+# optional bursts (every N seconds, `size` requests spread over `spread`
+# seconds, a `shared_seed` fraction of them on the same worksheet seed) and
+# default client
+PROFILES: Dict[str, Dict[str, Any]] = {
+    'steady': {'rate': 4.0, 'lengths': 'typical', 'burst': None, 'client': 'api'},
+    'classroom': {'rate': 0.5, 'lengths': 'typical',
+                  'burst': {'every': 20.0, 'size': 30, 'spread': 2.0, 'shared_seed': 0.7},
+                  'client': 'ui'},
+    'longtail': {'rate': 3.0, 'lengths': 'longtail', 'burst': None, 'client': 'api'},
+}
+
+CLIENTS = ('api', 'ui')
+
+# Analysis fields the page asks for (src/web/static/js/script.js)
+UI_FIELDS = ['key', 'cadences', 'circle']
+
+# Events that end a job's SSE log
+FINAL_EVENTS = ('done', 'error')
+
+# Everyday parameter mix (value, weight)
+TONICS = [('C', 6), ('G', 4), ('F', 4), ('D', 3), ('A', 2), ('Bb', 2), ('E', 1), ('Eb', 1)]
+TIME_SIGNATURES = [('4/4', 8), ('3/4', 3), ('6/8', 2), ('2/4', 1)]
+STRUCTURES = [('A', 6), ('AABA', 3), ('AB', 2)]
+FORMATS = [('musicxml', 8), ('abc', 1), ('ly', 1)]
+ACCOMPANIMENTS = [((), 6), (('bass',), 2), (('bass', 'pad'), 1), (('arpeggio',), 1)]
+TYPICAL_LENGTHS = [(4, 2), (8, 6), (16, 3), (32, 1)]
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def weighted(rng: random.Random, choices: List[Tuple[Any, float]]) -> Any:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def sample_length(rng: random.Random, lengths: str) -> int:
+    """Draws a length in measures (longtail: Pareto, mostly short, a few up to 64)."""
+    if lengths == 'longtail':
+        return min(64, max(2, int(4 * rng.paretovariate(1.2))))
+    return weighted(rng, TYPICAL_LENGTHS)
+
+
+def sample_params(rng: random.Random, lengths: str) -> Dict[str, Any]:
+    """Draws the JSON body of one /api/generate request."""
+    accompaniment = weighted(rng, ACCOMPANIMENTS)
+    if lengths == 'longtail' and rng.random() < 0.3:
+        accompaniment = ('bass', 'pad')
+    params = {
+        'tonic': weighted(rng, TONICS),
+        'mode': 'major' if rng.random() < 0.7 else 'minor',
+        'time_sig': weighted(rng, TIME_SIGNATURES),
+        'length': sample_length(rng, lengths),
+        'structure': weighted(rng, STRUCTURES),
+        'add_melody': rng.random() < 0.9,
+        'accompaniment': list(accompaniment),
+        'format': weighted(rng, FORMATS),
+    }
+    if rng.random() < 0.3:
+        params['fields'] = ['key', 'cadences', 'circle']
+    if rng.random() < 0.2:
+        params['seed'] = rng.randrange(1000)
+    return params
+
+
+def ui_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """The body the page sends for the same settings: MusicXML, an editing session, its fields."""
+    body = {key: value for key, value in params.items() if key not in ('format', 'fields')}
+    body.update(session=True, fields=UI_FIELDS)
+    return body
+
+
+def plan_requests(profile: Dict[str, Any], duration: float, seed: int) -> List[Tuple[float, str, Dict[str, Any]]]:
+    """
+    Schedules every request of a run.
+
+    Returns:
+        List[Tuple[float, str, Dict[str, Any]]]: (send time in seconds, kind, JSON body)
+        sorted by time; kind is 'background' or 'burst'
+    """
+    rng = random.Random(seed)
+    lengths = profile['lengths']
+    schedule = []
+    t = rng.expovariate(profile['rate']) if profile['rate'] > 0 else duration
+    while t < duration:
+        schedule.append((t, 'background', sample_params(rng, lengths)))
+        t += rng.expovariate(profile['rate'])
+
+    burst = profile['burst']
+    if burst:
+        start = burst['every'] / 2
+        while start < duration:
+            # One worksheet for the class; students who follow the link share its seed
+            worksheet = sample_params(rng, lengths)
+            worksheet['seed'] = rng.randrange(1000)
+            for _ in range(burst['size']):
+                if rng.random() < burst['shared_seed']:
+                    params = dict(worksheet)
+                else:
+                    params = sample_params(rng, lengths)
+                schedule.append((start + rng.uniform(0, burst['spread']), 'burst', params))
+            start += burst['every']
+    schedule.sort(key=lambda entry: entry[0])
+    return schedule
+
+
+async def post_json(host: str, port: int, path: str, body: bytes,
+                    timeout: float) -> Tuple[int, bytes]:
+    """
+    Sends one HTTP/1.1 POST on a fresh connection.
+
+    Returns:
+        Tuple[int, bytes]: (status code, response body)
+    """
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('ascii') + body
+        )
+        await writer.drain()
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+        status = int(head.split(b' ', 2)[1])
+        data = await asyncio.wait_for(reader.read(), timeout)
+        return status, data
+    finally:
+        writer.close()
+
+
+async def read_events(host: str, port: int, path: str, last_id: int,
+                      timeout: float) -> Tuple[int, List[Tuple[int, str, str]], Optional[int], int]:
+    """
+    Reads one bounded SSE response like EventSource does after a reconnect.
+
+    HTTP/1.0 is used so the server streams the body unchunked and closes it.
+
+    Returns:
+        Tuple: (status code, (id, event, data) triples, retry hint in ms or
+        None, response bytes)
+    """
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.0\r\nHost: {host}:{port}\r\nAccept: text/event-stream\r\n"
+            f"Last-Event-ID: {last_id}\r\n\r\n".encode('ascii')
+        )
+        await writer.drain()
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+        status = int(head.split(b' ', 2)[1])
+        data = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    events, retry = [], None
+    for block in data.decode('utf-8').split('\n\n'):
+        fields: Dict[str, str] = {}
+        for line in block.splitlines():
+            name, _, value = line.partition(': ')
+            fields[name] = value
+        if 'retry' in fields:
+            retry = int(fields['retry'])
+        if 'event' in fields:
+            events.append((int(fields.get('id', last_id)), fields['event'], fields.get('data', '')))
+    return status, events, retry, len(data)
+
+
+async def follow_job(host: str, port: int, body: bytes, timeout: float,
+                     gate: asyncio.Semaphore) -> Dict[str, Any]:
+    """
+    Runs one generation the way the page does: start a job, then read its
+    events until the final one.
+
+    Returns:
+        Dict[str, Any]: status (200 for 'done', 504/500 for a timed-out or
+        failed job, otherwise the HTTP status), bytes and SSE reads
+    """
+    async with gate:
+        status, data = await post_json(host, port, '/api/jobs', body, timeout)
+    if status != 202:
+        return {'status': status, 'bytes': len(data), 'reads': 0}
+    events_url = json.loads(data)['events_url']
+    size, reads, last_id, retry_ms = len(data), 0, 0, 0
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        await asyncio.sleep(retry_ms / 1000)
+        async with gate:
+            status, events, retry, received = await read_events(host, port, events_url, last_id,
+                                                                timeout)
+        size += received
+        reads += 1
+        if status != 200:
+            return {'status': status, 'bytes': size, 'reads': reads}
+        retry_ms = retry if retry is not None else retry_ms
+        for event_id, name, payload in events:
+            last_id = event_id
+            if name == 'done':
+                return {'status': 200, 'bytes': size, 'reads': reads}
+            if name == 'error':
+                failed = 504 if json.loads(payload).get('timeout') else 500
+                return {'status': failed, 'bytes': size, 'reads': reads}
+    raise asyncio.TimeoutError()
+
+
+def read_process(pid: int) -> Optional[Tuple[float, int]]:
+    """Returns (user + system CPU seconds, RSS bytes) of a process from /proc, or None."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+    except (OSError, StopIteration, IndexError, ValueError):
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    return (int(fields[11]) + int(fields[12])) / ticks, rss_kb * 1024
+
+
+def fetch_status(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        with urllib.request.urlopen(f"{url}/api/status", timeout=2) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+async def sample_server(pid: Optional[int], url: str, interval: float, started: float,
+                        samples: List[Dict[str, Any]], stop: asyncio.Event) -> None:
+    """Records the server's CPU %, RSS and admission load every interval."""
+    loop = asyncio.get_running_loop()
+    previous = read_process(pid) if pid else None
+    previous_time = time.monotonic()
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        now = time.monotonic()
+        sample: Dict[str, Any] = {'t': round(now - started, 3)}
+        current = read_process(pid) if pid else None
+        if current is not None:
+            if previous is not None:
+                sample['cpu_percent'] = round(100 * (current[0] - previous[0]) / (now - previous_time), 1)
+            sample['rss_mb'] = round(current[1] / 2 ** 20, 1)
+        previous, previous_time = current, now
+        status = await loop.run_in_executor(None, fetch_status, url)
+        if status is not None:
+            sample['status'] = {key: status[key] for key in
+                                ('running_cost', 'queued_cost', 'coalesced_requests')
+                                if key in status}
+        samples.append(sample)
+
+
+async def run_load(url: str, schedule: List[Tuple[float, str, Dict[str, Any]]], timeout: float,
+                   max_in_flight: int, pid: Optional[int], interval: float,
+                   client: str = 'api') -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], float]:
+    """
+    Sends the scheduled requests and samples the server meanwhile.
+
+    With the ui client each request is a job followed over SSE, and
+    max_in_flight bounds open connections rather than whole jobs.
+
+    Returns:
+        Tuple: (per-request results, server samples, wall time in seconds)
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname or '127.0.0.1', parts.port or 80
+    gate = asyncio.Semaphore(max_in_flight)
+    results: List[Dict[str, Any]] = []
+    samples: List[Dict[str, Any]] = []
+    stop = asyncio.Event()
+    started = time.monotonic()
+
+    async def send(at: float, kind: str, params: Dict[str, Any]) -> None:
+        await asyncio.sleep(max(0.0, started + at - time.monotonic()))
+        result = {'t': round(at, 3), 'kind': kind, 'length': params['length']}
+        try:
+            if client == 'ui':
+                result.update(await follow_job(host, port, json.dumps(ui_params(params)).encode('utf-8'),
+                                               timeout, gate))
+            else:
+                async with gate:
+                    status, data = await post_json(host, port, '/api/generate',
+                                                   json.dumps(params).encode('utf-8'), timeout)
+                result.update(status=status, bytes=len(data))
+        except asyncio.TimeoutError:
+            result['error'] = 'timeout'
+        except (OSError, ValueError, KeyError, asyncio.IncompleteReadError) as e:
+            result['error'] = type(e).__name__
+        # From the scheduled time, so waiting for a free connection counts too
+        result['latency'] = round(time.monotonic() - started - at, 4)
+        results.append(result)
+
+    sampler = asyncio.create_task(sample_server(pid, url, interval, started, samples, stop))
+    await asyncio.gather(*(send(at, kind, params) for at, kind, params in schedule))
+    stop.set()
+    await sampler
+    return results, samples, time.monotonic() - started
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = sorted(r['latency'] for r in results if r.get('status') == 200)
+    summary: Dict[str, Any] = {f"p{p}": percentile(latencies, p) for p in PERCENTILES}
+    summary['max'] = latencies[-1] if latencies else None
+    summary['mean'] = round(sum(latencies) / len(latencies), 4) if latencies else None
+    return summary
+
+
+def summarize(results: List[Dict[str, Any]], samples: List[Dict[str, Any]],
+              wall: float) -> Dict[str, Any]:
+    """Overall and per-kind throughput, latency, errors and server resource peaks."""
+    outcomes: Dict[str, int] = {}
+    for r in results:
+        outcome = r.get('error') or str(r['status'])
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    ok = outcomes.get('200', 0)
+    cpu = [s['cpu_percent'] for s in samples if 'cpu_percent' in s]
+    rss = [s['rss_mb'] for s in samples if 'rss_mb' in s]
+    reads = [r['reads'] for r in results if 'reads' in r]
+    return {
+        'requests': len(results),
+        'wall_seconds': round(wall, 2),
+        'throughput_rps': round(ok / wall, 2) if wall else 0.0,
+        'error_rate': round(1 - ok / len(results), 4) if results else 0.0,
+        'rejected_rate': round(outcomes.get('429', 0) / len(results), 4) if results else 0.0,
+        'outcomes': outcomes,
+        'latency': latency_summary(results),
+        'by_kind': {kind: {'requests': sum(1 for r in results if r['kind'] == kind),
+                           'latency': latency_summary([r for r in results if r['kind'] == kind])}
+                    for kind in sorted({r['kind'] for r in results})},
+        'sse_reads_mean': round(sum(reads) / len(reads), 2) if reads else None,
+        'server': {'cpu_percent_mean': round(sum(cpu) / len(cpu), 1) if cpu else None,
+                   'cpu_percent_max': max(cpu) if cpu else None,
+                   'rss_mb_max': max(rss) if rss else None},
+    }
+
+
+def timeline(results: List[Dict[str, Any]], wall: float) -> List[Dict[str, Any]]:
+    """Per-second buckets by completion time: completed, errors and latency percentiles."""
+    buckets: List[List[Dict[str, Any]]] = [[] for _ in range(int(wall) + 1)]
+    for r in results:
+        buckets[min(len(buckets) - 1, int(r['t'] + r['latency']))].append(r)
+    rows = []
+    for second, bucket in enumerate(buckets):
+        latencies = sorted(r['latency'] for r in bucket if r.get('status') == 200)
+        rows.append({'second': second, 'completed': len(latencies),
+                     'errors': len(bucket) - len(latencies),
+                     'p50': percentile(latencies, 50), 'p99': percentile(latencies, 99)})
+    return rows
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(env_overrides: Dict[str, str], url: str, wait: float) -> subprocess.Popen:
+    """Starts main.py with the given environment and waits until /api/status answers."""
+    env = {**os.environ, **env_overrides}
+    process = subprocess.Popen([sys.executable, str(project_root / 'main.py')], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        if fetch_status(url) is not None:
+            return process
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"server did not answer at {url} within {wait:g}s")
+
+
+def format_seconds(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value * 1000:.0f}ms"
+
+
+def print_summary(label: str, summary: Dict[str, Any]) -> None:
+    latency = summary['latency']
+    server = summary['server']
+    print(f"{label}: {summary['requests']} requests in {summary['wall_seconds']}s, "
+          f"{summary['throughput_rps']} ok/s, errors {summary['error_rate']:.1%} "
+          f"(429 {summary['rejected_rate']:.1%}) {summary['outcomes']}")
+    print("  latency " + ' '.join(f"{key} {format_seconds(latency[key])}"
+                                  for key in [f"p{p}" for p in PERCENTILES] + ['max']))
+    for kind, row in summary['by_kind'].items():
+        print(f"  {kind}: {row['requests']} requests, p50 {format_seconds(row['latency']['p50'])}, "
+              f"p99 {format_seconds(row['latency']['p99'])}")
+    if summary.get('sse_reads_mean') is not None:
+        print(f"  SSE reads per job: {summary['sse_reads_mean']}")
+    if server['cpu_percent_mean'] is not None:
+        print(f"  server CPU mean {server['cpu_percent_mean']}% max {server['cpu_percent_max']}%, "
+              f"RSS max {server['rss_mb_max']} MB")
+
+
+def compare(paths: List[str]) -> None:
+    """Prints the summaries of saved runs, one line each."""
+    print(f"{'run':<32} {'profile':<10} {'client':<6} {'ok/s':>7} {'err':>6} {'p50':>8} {'p99':>8} "
+          f"{'cpu%':>6} {'rss MB':>7}")
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            run = json.load(f)
+        summary = run['summary']
+        server = summary['server']
+        print(f"{run['label'][:32]:<32} {run['profile']:<10} "
+              f"{run['config'].get('client', 'api'):<6} {summary['throughput_rps']:>7} "
+              f"{summary['error_rate']:>6.1%} {format_seconds(summary['latency']['p50']):>8} "
+              f"{format_seconds(summary['latency']['p99']):>8} "
+              f"{server['cpu_percent_mean'] if server['cpu_percent_mean'] is not None else '-':>6} "
+              f"{server['rss_mb_max'] if server['rss_mb_max'] is not None else '-':>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay classroom traffic against a local server')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='classroom')
+    parser.add_argument('--client', choices=CLIENTS, default=None,
+                        help="Request flow (default: the profile's; classroom uses ui)")
+    parser.add_argument('--duration', type=float, default=60, help='Seconds of scheduled traffic')
+    parser.add_argument('--rate', type=float, default=None, help='Background requests per second')
+    parser.add_argument('--class-size', type=int, default=None, help='Requests per burst')
+    parser.add_argument('--burst-every', type=float, default=None, help='Seconds between bursts')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the traffic schedule')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--spawn', action='store_true', help='Start main.py for the run')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Environment of the spawned server (repeatable)')
+    parser.add_argument('--pid', type=int, default=None, help='Process id of a running server to sample')
+    parser.add_argument('--timeout', type=float, default=60, help='Client timeout per request')
+    parser.add_argument('--max-in-flight', type=int, default=256, help='Open connections at most')
+    parser.add_argument('--interval', type=float, default=0.5, help='Server sampling interval')
+    parser.add_argument('--label', default=None, help='Name of the run (default: profile and env)')
+    parser.add_argument('--output', default=None,
+                        help='Result file (default: instance/loadtests/LABEL-TIMESTAMP.json)')
+    parser.add_argument('--compare', nargs='+', metavar='RUN', help='Compare saved runs and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+
+    profile = dict(PROFILES[args.profile])
+    if args.rate is not None:
+        profile['rate'] = args.rate
+    if args.client is not None:
+        profile['client'] = args.client
+    if profile['burst'] and (args.class_size is not None or args.burst_every is not None):
+        profile['burst'] = dict(profile['burst'])
+        if args.class_size is not None:
+            profile['burst']['size'] = args.class_size
+        if args.burst_every is not None:
+            profile['burst']['every'] = args.burst_every
+    try:
+        env = dict(item.split('=', 1) for item in args.env)
+    except ValueError:
+        parser.error('--env takes KEY=VALUE')
+    label = args.label or '-'.join([args.profile, profile['client']] +
+                                   [f"{k}={v}" for k, v in sorted(env.items())])
+
+    schedule = plan_requests(profile, args.duration, args.seed)
+    if not schedule:
+        parser.error('the profile schedules no requests in this duration')
+
+    started = datetime.now()
+    server = start_server(env, args.url, 60) if args.spawn else None
+    pid = server.pid if server is not None else args.pid
+    if pid is None:
+        print('[WARN] no --spawn or --pid: server CPU/RSS are not recorded', file=sys.stderr)
+    try:
+        results, samples, wall = asyncio.run(run_load(args.url, schedule, args.timeout,
+                                                      args.max_in_flight, pid, args.interval,
+                                                      profile['client']))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+
+    summary = summarize(results, samples, wall)
+    output = args.output or str(project_root / 'instance' / 'loadtests' /
+                                f"{label}-{started.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'label': label,
+            'profile': args.profile,
+            'config': {**profile, 'duration': args.duration, 'seed': args.seed, 'url': args.url,
+                       'max_in_flight': args.max_in_flight, 'timeout': args.timeout},
+            'server_env': env,
+            'revision': git_revision(),
+            'started': started.isoformat(timespec='seconds'),
+            'summary': summary,
+            'timeline': timeline(results, wall),
+            'server_samples': samples,
+            'requests': sorted(results, key=lambda r: r['t']),
+        }, f, ensure_ascii=False)
+
+    print_summary(label, summary)
+    print(f"-> {output}")
+
+
+if __name__ == '__main__':
+    main()
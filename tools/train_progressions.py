@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Progression model training
+
+Scans a corpus of MusicXML scores in parallel, labels every beat with a
+roman numeral in the piece's home key (consecutive repeats merged) and
+writes the per-mode start, transition and final-chord statistics to the
+memory-mapped model file that generate_progression(style='chorale') reads.
+
+Per-file results are cached (instance/corpus_cache.sqlite3 by default), so
+retraining after adding or editing scores only parses the changed files.
+
+Usage:
+  python tools/train_progressions.py [--composer bach] [--folder DIR ...]
+                                     [--output PATH] [--jobs N] [--no-cache]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.chord_match import DIATONIC_FIGURES
+from src.core.progression_model import DEFAULT_MODEL_PATH, corpus_model, count_progressions, write_model
+from src.utils.corpus import FIGURES_VERSION, corpus_paths, map_files, piece_figures
+from src.utils.score_cache import ScoreCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the corpus progression model')
+    parser.add_argument('--composer', default='bach',
+                        help="music21 corpus composer to include ('' for none)")
+    parser.add_argument('--folder', action='append', default=[],
+                        help='Directory of MusicXML files to include (repeatable)')
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help='Model file to write')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=8, help='Files per worker task')
+    parser.add_argument('--cache', default=str(project_root / 'instance' / 'corpus_cache.sqlite3'),
+                        help='Per-file result cache')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Seconds one file may take before it is skipped (its worker killed if needed)')
+    parser.add_argument('--no-cache', action='store_true', help='Parse every file again')
+    args = parser.parse_args()
+
+    paths = corpus_paths(args.composer or None, args.folder)
+    if not paths:
+        parser.error('no MusicXML files found')
+    cache = None if args.no_cache else ScoreCache(args.cache)
+
+    started = time.perf_counter()
+    pieces, cached, failed = [], 0, 0
+    for path, result, from_cache in map_files(piece_figures, paths, cache, 'figures', FIGURES_VERSION,
+                                              args.jobs, args.chunksize, args.timeout):
+        if 'error' in result:
+            failed += 1
+            print(f"[WARN] {path}: {result['error']}", file=sys.stderr)
+            continue
+        cached += from_cache
+        if len(result['figures']) > 1:
+            pieces.append((result['mode'], result['figures']))
+
+    counts = count_progressions(pieces)
+    write_model(args.output, counts, {mode: DIATONIC_FIGURES[mode] for mode in counts})
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(paths)} files ({cached} cached, {len(paths) - cached - failed} parsed, "
+          f"{failed} failed) in {elapsed:.1f}s -> {args.output}")
+    model = corpus_model(args.output)
+    for mode, table in sorted(model.tables.items()):
+        transitions = sum(counts[mode].transitions.values())
+        likely = [table.vocab[max(range(len(table.vocab)), key=lambda b: table.row(a)[b])]
+                  for a in range(len(table.vocab))]
+        print(f"  {mode}: {table.pieces} pieces, {transitions} transitions; most likely next: "
+              + ', '.join(f"{a}->{b}" for a, b in zip(table.vocab, likely)))
+
+
+if __name__ == '__main__':
+    main()